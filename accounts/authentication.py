@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Everything the permission classes and views read from request.user.
+CACHED_USER_FIELDS = ('id', 'username', 'email', 'role', 'dept', 'is_staff', 'is_superuser', 'is_active')
+
+
+def user_cache_key(user_id):
+    return f'accounts:auth-user:{user_id}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the Django cache,
+    so an authenticated request does not need a query for the user.
+
+    The cached instance carries only CACHED_USER_FIELDS; the rest are
+    deferred and load on first access. Entries expire after
+    AUTH_USER_CACHE_TIMEOUT seconds and are dropped when the user is saved
+    or deleted (see accounts.signals).
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which we do not keep in the cache.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = (
+                self.user_model.objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values(*CACHED_USER_FIELDS)
+                .first()
+            )
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not values['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in values
+        ]
+        db = router.db_for_read(self.user_model)
+        return self.user_model.from_db(db, field_names, [values[name] for name in field_names])
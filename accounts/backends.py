@@ -1,18 +1,57 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 
 User = get_user_model()
 
+
+def missing_email_cache_key(email):
+    # Keyed on the exact string the lookup uses: the email match is case
+    # sensitive, so a miss for "Alice@..." says nothing about "alice@...".
+    digest = hashlib.sha256(email.encode()).hexdigest()
+    return f'accounts:login-missing-email:{digest}'
+
+
 class EmailBackend(ModelBackend):
+    """
+    Authoritative for credentials that look like an email address.
+
+    A wrong password or an unknown email raises PermissionDenied, which stops
+    django.contrib.auth.authenticate() from trying ModelBackend with another
+    query and another password hash. Plain usernames (the admin login) are
+    left to ModelBackend.
+
+    Unknown emails are remembered for LOGIN_MISSING_EMAIL_CACHE_TIMEOUT
+    seconds to skip the lookup on repeated attempts. The dummy hash still
+    runs, so response timing does not reveal which emails exist.
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = User.objects.get(email=username)
-        except User.DoesNotExist:
+        if username is None or password is None or '@' not in username:
             return None
 
-        if user.check_password(password):
+        missing_key = missing_email_cache_key(username)
+        user = None
+        if not cache.get(missing_key):
+            user = (
+                User.objects.filter(email=username)
+                .only('id', 'username', 'email', 'password', 'is_active', 'is_staff')
+                .first()
+            )
+            if user is None:
+                cache.set(missing_key, True, settings.LOGIN_MISSING_EMAIL_CACHE_TIMEOUT)
+
+        if user is None:
+            User().set_password(password)
+            raise PermissionDenied
+
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
-        return None
+        raise PermissionDenied
 
     def get_user(self, user_id):
         try:
@@ -0,0 +1,155 @@
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken, Token
+from .models import DeniedToken
+
+
+class BaseDenylistStore:
+    """Remembers revoked token ids (jti) until the token would expire anyway."""
+
+    def add(self, jti, expires_at):
+        raise NotImplementedError
+
+    def contains(self, jti):
+        raise NotImplementedError
+
+    def prune(self, batch_size):
+        """
+        Remove up to `batch_size` expired entries and return how many went.
+        Stores whose backend expires entries itself have nothing to do.
+        """
+        return 0
+
+
+class InMemoryDenylistStore(BaseDenylistStore):
+    """
+    Process-local store, for tests and single-process deployments. Expired
+    entries are dropped when looked up, and all of them at most every
+    `prune_interval` seconds by add().
+    """
+    prune_interval = 60
+    prune_batch_size = 5000
+
+    def __init__(self):
+        self._expiry_by_jti = {}
+        self._lock = threading.Lock()
+        self._next_prune = time.time() + self.prune_interval
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        if expires_at > now:
+            with self._lock:
+                self._expiry_by_jti[jti] = expires_at
+        if now >= self._next_prune:
+            self._next_prune = now + self.prune_interval
+            while self.prune(self.prune_batch_size):
+                pass
+
+    def contains(self, jti):
+        expires_at = self._expiry_by_jti.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at > time.time():
+            return True
+        with self._lock:
+            self._expiry_by_jti.pop(jti, None)
+        return False
+
+    def prune(self, batch_size):
+        now = time.time()
+        # One short hold of the lock per batch, so logouts are not held up.
+        with self._lock:
+            expired = [jti for jti, expires_at in self._expiry_by_jti.items() if expires_at <= now][:batch_size]
+            for jti in expired:
+                del self._expiry_by_jti[jti]
+        return len(expired)
+
+
+class CacheDenylistStore(BaseDenylistStore):
+    """
+    Store entries in a Django cache alias, with the cache timeout set to the
+    token's remaining lifetime. Backed by Redis or Memcached the denylist is
+    shared by every worker.
+    """
+    key_prefix = 'accounts:token-denylist:'
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def add(self, jti, expires_at):
+        timeout = int(expires_at - time.time()) + 1
+        if timeout > 0:
+            self.cache.set(self.key_prefix + jti, True, timeout)
+
+    def contains(self, jti):
+        return bool(self.cache.get(self.key_prefix + jti))
+
+
+class DatabaseDenylistStore(BaseDenylistStore):
+    """
+    Store entries as DeniedToken rows, one indexed key per logout, shared by
+    every worker without a cache server. The prune_tokens command deletes
+    expired rows in batches.
+    """
+
+    def add(self, jti, expires_at):
+        DeniedToken.objects.bulk_create(
+            [DeniedToken(jti=jti, expires_at=datetime.fromtimestamp(expires_at, timezone.utc))],
+            ignore_conflicts=True,
+        )
+
+    def contains(self, jti):
+        return DeniedToken.objects.filter(jti=jti, expires_at__gt=datetime.now(timezone.utc)).exists()
+
+    def prune(self, batch_size):
+        expired = DeniedToken.objects.filter(expires_at__lte=datetime.now(timezone.utc)).order_by('expires_at')
+        jtis = list(expired.values_list('jti', flat=True)[:batch_size])
+        return DeniedToken.objects.filter(jti__in=jtis).delete()[0] if jtis else 0
+
+
+@lru_cache(maxsize=None)
+def get_denylist():
+    config = settings.TOKEN_DENYLIST
+    return import_string(config['STORE'])(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def reset_denylist(setting, **kwargs):
+    if setting == 'TOKEN_DENYLIST':
+        get_denylist.cache_clear()
+
+
+class DenylistRefreshToken(Token):
+    """
+    Refresh token checked against the jti denylist instead of the
+    token_blacklist tables, so issuing, verifying or revoking it needs no
+    query.
+    """
+    token_type = 'refresh'
+    lifetime = api_settings.REFRESH_TOKEN_LIFETIME
+    access_token_class = AccessToken
+    no_copy_claims = RefreshToken.no_copy_claims
+    access_token = RefreshToken.access_token
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if get_denylist().contains(self[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def denylist(self):
+        get_denylist().add(self[api_settings.JTI_CLAIM], self['exp'])
+
+    # Called by simplejwt's TokenRefreshSerializer on the old token when
+    # ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION are set.
+    blacklist = denylist
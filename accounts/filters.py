@@ -0,0 +1,52 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class UserFilterBackend(BaseFilterBackend):
+    """
+    Filter users by `role` and `dept` (comma separated values are OR'ed) and
+    `is_staff`, and match `search` as a case-insensitive prefix of the
+    username or email.
+
+    The prefix match compiles to UPPER(column) LIKE 'TERM%', which PostgreSQL
+    serves from the text_pattern_ops expression indexes on CustomUser.
+    """
+    choice_params = {
+        'role': dict(User.ROLE_CHOICES),
+        'dept': dict(User.DEPT_CHOICES),
+    }
+    boolean_values = {'true': True, '1': True, 'false': False, '0': False}
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        errors = {}
+
+        for param, choices in self.choice_params.items():
+            values = [value.strip() for value in params.get(param, '').split(',') if value.strip()]
+            if not values:
+                continue
+            invalid = [value for value in values if value not in choices]
+            if invalid:
+                errors[param] = [f'"{value}" is not a valid choice.' for value in invalid]
+                continue
+            queryset = queryset.filter(**{f'{param}__in': values})
+
+        is_staff = params.get('is_staff', '').strip().lower()
+        if is_staff:
+            if is_staff not in self.boolean_values:
+                errors['is_staff'] = ['Expected true or false.']
+            else:
+                queryset = queryset.filter(is_staff=self.boolean_values[is_staff])
+
+        if errors:
+            raise ValidationError(errors)
+
+        term = params.get(self.search_param, '').strip()
+        if term:
+            queryset = queryset.filter(Q(username__istartswith=term) | Q(email__istartswith=term))
+        return queryset
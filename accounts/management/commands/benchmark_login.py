@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from accounts.serializers import LoginSerializer
+
+User = get_user_model()
+
+BENCH_EMAIL = 'login-benchmark@example.com'
+BENCH_PASSWORD = 'login-benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure logins per second on one core through LoginSerializer '
+        '(backend chain, password hash and token signing), for successful, '
+        'wrong-password and unknown-email attempts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each scenario.')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(
+            email=BENCH_EMAIL,
+            defaults={'username': 'login-benchmark', 'role': 'developer', 'dept': 'python'},
+        )
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+
+        self.stdout.write(f'Preferred hasher: {get_hasher().algorithm}')
+        scenarios = [
+            ('valid credentials', BENCH_EMAIL, BENCH_PASSWORD),
+            ('wrong password', BENCH_EMAIL, 'wrong-password'),
+            ('unknown email', 'nobody-benchmark@example.com', BENCH_PASSWORD),
+        ]
+        try:
+            for label, email, password in scenarios:
+                attempts = 0
+                deadline = time.perf_counter() + options['seconds']
+                started = time.perf_counter()
+                while time.perf_counter() < deadline:
+                    LoginSerializer(data={'email': email, 'password': password}).is_valid()
+                    attempts += 1
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'{label}: {attempts / elapsed:.1f} logins/s/core ({attempts} attempts)')
+        finally:
+            user.delete()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from accounts.denylist import get_denylist
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired entries from the refresh token denylist '
+        '(settings.TOKEN_DENYLIST) in batches, so each delete stays short on '
+        'a large table. Stores that expire entries themselves, such as the '
+        'cache store, have nothing to prune.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        denylist = get_denylist()
+        pruned = 0
+        while batch := denylist.prune(options['batch_size']):
+            pruned += batch
+        self.stdout.write(f'Pruned {pruned} expired denylist entries.')
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:11
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+PREFIX_INDEXES = [
+    models.Index(
+        django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='text_pattern_ops'),
+        name='user_username_prefix_idx',
+    ),
+    models.Index(
+        django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='text_pattern_ops'),
+        name='user_email_prefix_idx',
+    ),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for index in PREFIX_INDEXES:
+            schema_editor.add_index(apps.get_model('accounts', 'CustomUser'), index)
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for index in PREFIX_INDEXES:
+            schema_editor.remove_index(apps.get_model('accounts', 'CustomUser'), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # text_pattern_ops is PostgreSQL only; other backends scan for the
+        # istartswith prefix search.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='customuser', index=index) for index in PREFIX_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['dept', 'username'], name='user_dept_username_idx'),
+        ),
+    ]
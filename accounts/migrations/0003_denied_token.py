@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeniedToken',
+            fields=[
+                ('jti', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# Tables of rest_framework_simplejwt.token_blacklist, which is no longer
+# installed: logout denies token ids through accounts.denylist instead. The
+# blacklist references the outstanding tokens, so it goes first.
+TOKEN_BLACKLIST_TABLES = ['token_blacklist_blacklistedtoken', 'token_blacklist_outstandingtoken']
+
+
+def drop_token_blacklist_tables(apps, schema_editor):
+    existing = set(schema_editor.connection.introspection.table_names())
+    for table in TOKEN_BLACKLIST_TABLES:
+        if table in existing:
+            schema_editor.execute(f'DROP TABLE {schema_editor.quote_name(table)}')
+    # Forget the app's migrations too, so installing it again recreates them.
+    schema_editor.execute('DELETE FROM django_migrations WHERE app = %s', ['token_blacklist'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_denied_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_token_blacklist_tables, migrations.RunPython.noop),
+    ]
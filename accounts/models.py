@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 class CustomUser(AbstractUser):
     DEPT_CHOICES = [
@@ -26,5 +28,26 @@ class CustomUser(AbstractUser):
     dept = models.CharField(max_length=20, choices=DEPT_CHOICES)
     is_staff = models.BooleanField(default=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Prefix search (istartswith) on the user directory and picker.
+            models.Index(OpClass(Upper('username'), name='text_pattern_ops'), name='user_username_prefix_idx'),
+            models.Index(OpClass(Upper('email'), name='text_pattern_ops'), name='user_email_prefix_idx'),
+            models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+            models.Index(fields=['dept', 'username'], name='user_dept_username_idx'),
+        ]
+
     def __str__(self):
         return self.username
+
+
+class DeniedToken(models.Model):
+    """
+    A refresh token id (jti) revoked at logout, kept until the token would
+    expire anyway; see accounts.denylist.DatabaseDenylistStore.
+    """
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
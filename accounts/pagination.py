@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    # username is unique, so DRF's single column cursor never has to step
+    # over ties and each page is a range scan on the username index.
+    ordering = 'username'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from bug_report.instrumentation import TimedSerializerMixin
+from .denylist import DenylistRefreshToken
 
 User = get_user_model()
 
@@ -32,11 +34,11 @@ class LoginSerializer(serializers.Serializer):
     def validate(self, data):
         email = data.get('email')
         password = data.get('password')
-        user = authenticate(username=email, password=password)
+        user = authenticate(self.context.get('request'), username=email, password=password)
         if user is None:
             raise serializers.ValidationError('Invalid login credentials')
 
-        refresh = RefreshToken.for_user(user)
+        refresh = DenylistRefreshToken.for_user(user)
         data = {
             'user_id': user.id,
             'username': user.username,
@@ -46,13 +48,17 @@ class LoginSerializer(serializers.Serializer):
         }
         return data
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Refuses refresh tokens whose jti was denied at logout.
+    token_class = DenylistRefreshToken
+
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'role', 'dept', 'is_staff']
         extra_kwargs = {'email': {'read_only': True}}
 
-class AdminUserProfileSerializer(serializers.ModelSerializer):
+class AdminUserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id','username', 'email', 'role', 'dept', 'is_staff']
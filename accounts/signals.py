@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from bug_report.response_cache import invalidate_responses
+from .authentication import user_cache_key
+from .backends import missing_email_cache_key
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_missing_email(sender, instance, **kwargs):
+    if instance.email:
+        cache.delete(missing_email_cache_key(instance.email))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_responses(sender, instance, **kwargs):
+    invalidate_responses('users')
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_and_project_responses(sender, instance, **kwargs):
+    # Deleting a user also drops their project memberships, which the
+    # cascade does without sending m2m_changed.
+    invalidate_responses('users', 'projects')
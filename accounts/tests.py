@@ -1,8 +1,22 @@
-from django.test import TestCase
-from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
+import time
+from io import StringIO
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import CachedJWTAuthentication
+from .denylist import CacheDenylistStore, DatabaseDenylistStore, DenylistRefreshToken, InMemoryDenylistStore
+from .models import DeniedToken
+from .throttling import LoginEmailRateThrottle, LoginIPRateThrottle
 
 User = get_user_model()
 
@@ -85,7 +99,7 @@ class UserTests(TestCase):
         self.client.force_authenticate(user=self.admin_user)
         response = self.client.get('/api/accounts/users/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 11)  # 10 users + admin
+        self.assertEqual(len(response.data['results']), 11)  # 10 users + admin
     
     def test_get_all_users_as_non_admin(self):
         self.client.force_authenticate(user=self.users[0])
@@ -189,7 +203,7 @@ class UserTests(TestCase):
         self.client.force_authenticate(user=self.admin_user)
         response = self.client.get('/api/accounts/users/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 11)  # 10 users + admin
+        self.assertEqual(len(response.data['results']), 11)  # 10 users + admin
     
     def test_non_admin_user_list(self):
         self.client.force_authenticate(user=self.users[1])
@@ -255,3 +269,354 @@ class UserTests(TestCase):
         })
         print("\n",response.data,"\n")
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cached',
+            email='cached@example.com',
+            password='password123',
+            role='developer',
+            dept='python'
+        )
+        self.factory = APIRequestFactory()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_is_served_from_cache(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.role, 'developer')
+            self.assertFalse(user.is_staff)
+
+    def test_save_invalidates_cache(self):
+        self.authenticate()
+        self.user.role = 'team_lead'
+        self.user.save()
+        self.assertEqual(self.authenticate().role, 'team_lead')
+
+    def test_delete_invalidates_cache(self):
+        self.authenticate()
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_cached_user_saves_only_loaded_fields(self):
+        user = self.authenticate()
+        user.dept = 'java'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.dept, 'java')
+        self.assertTrue(self.user.check_password('password123'))
+
+    def test_profile_endpoint_with_bearer_token(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.get(f'/api/accounts/profile/{self.user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LoginPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='shift',
+            email='shift@example.com',
+            password='password123',
+            role='developer',
+            dept='python'
+        )
+
+    def test_wrong_password_stops_at_email_backend(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(username='shift@example.com', password='wrong'))
+
+    def test_unknown_email_lookup_is_cached(self):
+        self.assertIsNone(authenticate(username='ghost@example.com', password='password123'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(authenticate(username='ghost@example.com', password='password123'))
+
+    def test_new_user_clears_cached_miss(self):
+        self.assertIsNone(authenticate(username='late@example.com', password='password123'))
+        User.objects.create_user(
+            username='late',
+            email='late@example.com',
+            password='password123',
+            role='developer',
+            dept='python'
+        )
+        self.assertIsNotNone(authenticate(username='late@example.com', password='password123'))
+
+    def test_cached_miss_for_other_case_does_not_lock_out(self):
+        self.assertIsNone(authenticate(username='Shift@example.com', password='password123'))
+        self.assertEqual(authenticate(username='shift@example.com', password='password123'), self.user)
+
+    def test_email_change_clears_cached_miss(self):
+        self.assertIsNone(authenticate(username='moved@example.com', password='password123'))
+        self.user.email = 'moved@example.com'
+        self.user.save()
+        self.assertEqual(authenticate(username='moved@example.com', password='password123'), self.user)
+
+    def test_login_body_that_is_not_an_object(self):
+        for body in (['shift@example.com'], 'shift@example.com'):
+            response = self.client.post('/api/accounts/login/', body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_username_login_still_uses_model_backend(self):
+        self.assertEqual(authenticate(username='shift', password='password123'), self.user)
+
+    def test_login_throttled_per_email(self):
+        with mock.patch.object(LoginEmailRateThrottle, 'rate', '2/min', create=True):
+            for _ in range(2):
+                self.client.post('/api/accounts/login/', {'email': 'shift@example.com', 'password': 'wrong'})
+            response = self.client.post('/api/accounts/login/', {'email': 'shift@example.com', 'password': 'password123'})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            response = self.client.post('/api/accounts/login/', {'email': 'other@example.com', 'password': 'x'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_throttled_per_ip(self):
+        with mock.patch.object(LoginIPRateThrottle, 'rate', '1/min', create=True):
+            self.client.post('/api/accounts/login/', {'email': 'a@example.com', 'password': 'x'})
+            response = self.client.post('/api/accounts/login/', {'email': 'b@example.com', 'password': 'x'})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(
+        PASSWORD_HASHERS=['accounts.hashers.ConfigurablePBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher'],
+        PASSWORD_PBKDF2_ITERATIONS=1000,
+    )
+    def test_login_rehashes_to_preferred_hasher(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('password123', hasher='md5'))
+        response = self.client.post('/api/accounts/login/', {'email': 'shift@example.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+
+@override_settings(TOKEN_DENYLIST={'STORE': 'accounts.denylist.InMemoryDenylistStore'})
+class TokenDenylistTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='leaving',
+            email='leaving@example.com',
+            password='password123',
+            role='developer',
+            dept='python'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.refresh_token = str(DenylistRefreshToken.for_user(self.user))
+
+    def test_login_issues_denylist_tokens_without_queries(self):
+        with mock.patch('accounts.serializers.authenticate', return_value=self.user):
+            with self.assertNumQueries(0):
+                response = self.client.post(
+                    '/api/accounts/login/', {'email': 'leaving@example.com', 'password': 'password123'}
+                )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        DenylistRefreshToken(response.data['refresh'])
+
+    def test_refresh(self):
+        response = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+
+    def test_logged_out_token_cannot_refresh(self):
+        self.client.post('/api/accounts/logout/', {'refresh': self.refresh_token})
+        response = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_is_denied(self):
+        with mock.patch.object(api_settings, 'ROTATE_REFRESH_TOKENS', True):
+            response = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh_token})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response.data['refresh'], self.refresh_token)
+            response = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh_token})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_needs_no_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.post('/api/accounts/logout/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+
+    def test_token_cannot_be_logged_out_twice(self):
+        self.client.post('/api/accounts/logout/', {'refresh': self.refresh_token})
+        response = self.client.post('/api/accounts/logout/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_access_token_is_not_a_refresh_token(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        response = self.client.post('/api/accounts/logout/', {'refresh': access})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_entries_expire_with_the_token(self):
+        store = InMemoryDenylistStore()
+        store.add('expired', time.time() - 1)
+        store.add('live', time.time() + 60)
+        self.assertFalse(store.contains('expired'))
+        self.assertTrue(store.contains('live'))
+
+    def test_cache_store(self):
+        store = CacheDenylistStore()
+        store.add('cached-jti', time.time() + 60)
+        self.assertTrue(store.contains('cached-jti'))
+        self.assertFalse(store.contains('other-jti'))
+
+    def test_in_memory_store_evicts_lazily(self):
+        store = InMemoryDenylistStore()
+        store._expiry_by_jti.update({'stale': time.time() - 1, 'older': time.time() - 2})
+        store.add('live', time.time() + 60)
+        self.assertIn('stale', store._expiry_by_jti)
+        self.assertFalse(store.contains('stale'))
+        self.assertNotIn('stale', store._expiry_by_jti)
+
+        store._next_prune = 0
+        store.add('another', time.time() + 60)
+        self.assertEqual(set(store._expiry_by_jti), {'live', 'another'})
+
+    @override_settings(TOKEN_DENYLIST={'STORE': 'accounts.denylist.DatabaseDenylistStore'})
+    def test_database_store(self):
+        response = self.client.post('/api/accounts/logout/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        response = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Logging the same token out again is refused before it is stored twice.
+        response = self.client.post('/api/accounts/logout/', {'refresh': self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(DeniedToken.objects.count(), 1)
+
+    @override_settings(TOKEN_DENYLIST={'STORE': 'accounts.denylist.DatabaseDenylistStore'})
+    def test_prune_tokens(self):
+        store = DatabaseDenylistStore()
+        for index in range(3):
+            store.add(f'expired-{index}', time.time() - 60)
+        store.add('live', time.time() + 60)
+        self.assertFalse(store.contains('expired-0'))
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+        self.assertIn('Pruned 3 ', out.getvalue())
+        self.assertEqual(list(DeniedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='password123',
+            role='manager', dept='management'
+        )
+        self.tester = User.objects.create_user(
+            username='tester', email='qa@example.com', password='password123', role='tester', dept='tester'
+        )
+        for i in range(5):
+            User.objects.create_user(
+                username=f'dev{i}', email=f'dev{i}@example.com', password='password123',
+                role='developer', dept='python' if i % 2 else 'java'
+            )
+        User.objects.create_user(
+            username='devops', email='ops@example.com', password='password123',
+            role='developer', dept='devops', is_staff=True, is_active=False
+        )
+
+    def usernames(self, response):
+        return [user['username'] for user in response.data['results']]
+
+    def test_list_is_paginated_by_username(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/accounts/users/', {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.usernames(response), ['dev0', 'dev1', 'dev2'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.usernames(response), ['dev3', 'dev4', 'devops'])
+
+    def test_list_filters(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/accounts/users/', {'role': 'developer', 'dept': 'python,devops'})
+        self.assertEqual(self.usernames(response), ['dev1', 'dev3', 'devops'])
+        response = self.client.get('/api/accounts/users/', {'is_staff': 'true'})
+        self.assertEqual(self.usernames(response), ['devops'])
+        response = self.client.get('/api/accounts/users/', {'role': 'wizard', 'is_staff': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'role', 'is_staff'})
+
+    def test_prefix_search_matches_username_or_email(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/accounts/users/', {'search': 'DEV'})
+        self.assertEqual(len(self.usernames(response)), 6)
+        response = self.client.get('/api/accounts/users/', {'search': 'qa'})
+        self.assertEqual(self.usernames(response), ['tester'])
+        # Prefix only, not substring.
+        response = self.client.get('/api/accounts/users/', {'search': 'ops'})
+        self.assertEqual(self.usernames(response), ['devops'])
+        response = self.client.get('/api/accounts/users/', {'search': 'anager'})
+        self.assertEqual(self.usernames(response), [])
+
+    def test_list_is_cached_until_a_user_changes(self):
+        self.client.force_authenticate(user=self.manager)
+        first = self.client.get('/api/accounts/users/?dept=java')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get('/api/accounts/users/?dept=java')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(len(queries.captured_queries), 0)
+
+        dev = User.objects.get(username='dev0')
+        dev.dept = 'php'
+        dev.save()
+        self.assertEqual(self.usernames(self.client.get('/api/accounts/users/?dept=java')), ['dev2', 'dev4'])
+        User.objects.get(username='dev2').delete()
+        self.assertEqual(self.usernames(self.client.get('/api/accounts/users/?dept=java')), ['dev4'])
+
+        self.client.force_authenticate(user=self.tester)
+        response = self.client.get('/api/accounts/users/?dept=java')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_picker_returns_active_ids_and_usernames(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/accounts/users/picker/', {'role': 'developer'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'id': user.id, 'username': user.username}
+            for user in User.objects.filter(username__in=['dev0', 'dev1', 'dev2', 'dev3', 'dev4']).order_by('username')
+        ])
+
+    def test_picker_etag(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/accounts/users/picker/')
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/accounts/users/picker/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries.captured_queries), 0)
+        # Other filters describe another list.
+        response = self.client.get('/api/accounts/users/picker/?role=developer', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        dev = User.objects.get(username='dev0')
+        dev.username = 'dev0-renamed'
+        dev.save()
+        response = self.client.get('/api/accounts/users/picker/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('dev0-renamed', [user['username'] for user in response.data])
+
+    def test_picker_needs_the_user_list_permission(self):
+        self.client.force_authenticate(user=self.tester)
+        response = self.client.get('/api/accounts/users/picker/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
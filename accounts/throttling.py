@@ -0,0 +1,26 @@
+import hashlib
+from collections.abc import Mapping
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPRateThrottle(SimpleRateThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailRateThrottle(SimpleRateThrottle):
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        # Not a JSON object or form: leave it to LoginIPRateThrottle and the
+        # serializer's 400.
+        if not isinstance(request.data, Mapping):
+            return None
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -1,10 +1,12 @@
 from django.urls import path
-from .views import RegisterView, LoginView, LogoutView, UserProfileView, UserListView
+from .views import RegisterView, LoginView, LogoutView, TokenRefreshView, UserProfileView, UserListView, UserPickerView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('profile/<int:pk>/', UserProfileView.as_view(), name='user-profile'),
     path('users/', UserListView.as_view(), name='user-list'),
+    path('users/picker/', UserPickerView.as_view(), name='user-picker'),
 ]
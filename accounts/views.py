@@ -1,11 +1,21 @@
+import hashlib
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from bug_report.response_cache import CachedResponseMixin, get_version
+from .denylist import DenylistRefreshToken
+from .filters import UserFilterBackend
+from .pagination import UserCursorPagination
 from .permissions import IsAdminOrManagerOrTeamLead
-from .serializers import RegisterSerializer, LoginSerializer, UserProfileSerializer, AdminUserProfileSerializer
+from .throttling import LoginEmailRateThrottle, LoginIPRateThrottle
+from .serializers import (
+    RegisterSerializer, LoginSerializer, TokenRefreshSerializer, UserProfileSerializer, AdminUserProfileSerializer
+)
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -18,6 +28,7 @@ class RegisterView(generics.CreateAPIView):
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPRateThrottle, LoginEmailRateThrottle]
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -33,20 +44,18 @@ class LogoutView(generics.GenericAPIView):
             if refresh_token is None:
                 return Response({'detail': 'Refresh token is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Validate and blacklist the refresh token
-            token = RefreshToken(refresh_token)
-            try:
-                outstanding_token = OutstandingToken.objects.get(token=token)
-            except OutstandingToken.DoesNotExist:
-                return Response({'detail': 'Invalid refresh token.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Validate the refresh token and deny its jti until it expires
+            token = DenylistRefreshToken(refresh_token)
+            token.denylist()
 
-            BlacklistedToken.objects.create(token=outstanding_token)
-            
             return Response({'detail': 'Logged out successfully.'}, status=status.HTTP_205_RESET_CONTENT)
         
         except TokenError as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class TokenRefreshView(BaseTokenRefreshView):
+    serializer_class = TokenRefreshSerializer
+
 class UserProfileView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated]
@@ -67,7 +76,39 @@ class UserProfileView(generics.RetrieveUpdateDestroyAPIView):
         if not (self.request.user.is_staff or self.request.user.role in ['manager', 'team_lead']) and obj.id != self.request.user.id:
             self.permission_denied(self.request, message="You do not have permission to access this profile.")
         return obj
-class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+class UserListView(CachedResponseMixin, generics.ListAPIView):
+    queryset = User.objects.only(*AdminUserProfileSerializer.Meta.fields)
     serializer_class = AdminUserProfileSerializer
     permission_classes = [IsAuthenticated, IsAdminOrManagerOrTeamLead]
+    pagination_class = UserCursorPagination
+    filter_backends = [UserFilterBackend]
+    cache_namespace = 'users'
+
+class UserPickerView(CachedResponseMixin, generics.ListAPIView):
+    """
+    Active users as bare {id, username} pairs for assignee pickers, taking the
+    same filters and permissions as UserListView. The ETag is derived from
+    the version of the 'users' response cache namespace, which moves whenever
+    a user is saved or deleted, so If-None-Match is answered without a query.
+    """
+    queryset = User.objects.filter(is_active=True).order_by('username')
+    permission_classes = [IsAuthenticated, IsAdminOrManagerOrTeamLead]
+    filter_backends = [UserFilterBackend]
+    cache_namespace = 'users'
+
+    def get(self, request, *args, **kwargs):
+        state = repr((get_version(self.cache_namespace), request.get_full_path()))
+        etag = quote_etag(hashlib.sha256(state.encode()).hexdigest()[:32])
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return Response([
+            {'id': user_id, 'username': username}
+            for user_id, username in self.filter_queryset(self.get_queryset()).values_list('id', 'username')
+        ])
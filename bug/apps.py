@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BugConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bug'
+
+    def ready(self):
+        from . import events, metrics, notifications, signals, thumbnails  # noqa: F401
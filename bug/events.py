@@ -0,0 +1,176 @@
+# events.py for bug app
+#
+# Fans bugs_changed out to the Server-Sent Events feed (bug.views.bug_events).
+# Events are published once the writing transaction commits, through the
+# broker configured in settings.BUG_EVENT_BROKER.
+
+import asyncio
+import itertools
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from .signals import bugs_changed
+
+EVENT_FIELDS = ('bug_id', 'project_id', 'created_by_id', 'assigned_to_id', 'status', 'updated_date')
+
+
+def event_for_change(before, after):
+    """Return the event for one (before, after) pair of Bug.snapshot() dicts."""
+    if before is None:
+        kind = 'bug.created'
+    elif after is None:
+        kind = 'bug.deleted'
+    elif before['status'] != after['status']:
+        kind = 'bug.status_changed'
+    else:
+        kind = 'bug.updated'
+    current = after or before
+    data = {name: current[name] for name in EVENT_FIELDS}
+    if before is not None and after is not None:
+        data['previous_status'] = before['status']
+        data['previous_assigned_to_id'] = before['assigned_to_id']
+    # Everyone who could see the bug before or after the change.
+    audience = sorted({
+        user_id for snapshot in (before, after) if snapshot
+        for user_id in (snapshot['created_by_id'], snapshot['assigned_to_id']) if user_id
+    })
+    return {'type': kind, 'data': data, 'audience': audience}
+
+
+def is_visible(event, user):
+    # Same rule as BugQuerySet.visible_to().
+    return user.is_superuser or user.is_staff or user.pk in event['audience']
+
+
+class Subscription:
+    """A subscriber's bounded queue, bound to the event loop it was made on."""
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def deliver(self, event):
+        # Runs on self.loop. A subscriber that falls behind is marked lagged
+        # rather than buffering without limit; the feed then asks the client
+        # to reconnect and refetch.
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout):
+        """Return the next event, or None after `timeout` seconds of silence."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseEventBroker:
+    """
+    Delivers published events to the subscriptions of this process.
+
+    A broker shared between processes (Redis pub/sub, PostgreSQL
+    LISTEN/NOTIFY, ...) overrides publish() to send events out and calls
+    dispatch() for each event it receives.
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        raise NotImplementedError
+
+    def dispatch(self, event):
+        event = {**event, 'id': next(self._ids)}
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop is closed.
+                self.unsubscribe(subscription)
+
+
+class InMemoryEventBroker(BaseEventBroker):
+    """Process-local fan-out, for a single ASGI process."""
+
+    def publish(self, event):
+        self.dispatch(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    config = settings.BUG_EVENT_BROKER
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    if setting == 'BUG_EVENT_BROKER':
+        get_broker.cache_clear()
+
+
+def publish_events(events):
+    broker = get_broker()
+    for event in events:
+        broker.publish(event)
+
+
+@receiver(bugs_changed)
+def publish_bug_events(sender, changes, **kwargs):
+    events = [event_for_change(before, after) for before, after in changes]
+    transaction.on_commit(lambda: publish_events(events))
+
+
+def format_event(event):
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(user, broker):
+    """Yield the Server-Sent Events the user may see, with periodic keepalives."""
+    subscription = broker.subscribe()
+    try:
+        # Sends the headers right away and tells clients to wait 5s between
+        # reconnects.
+        yield 'retry: 5000\n\n'
+        while True:
+            event = await subscription.get(settings.BUG_EVENT_HEARTBEAT)
+            if subscription.lagged:
+                yield 'event: reset\ndata: {}\n\n'
+                return
+            if event is None:
+                yield ': keepalive\n\n'
+            elif is_visible(event, user):
+                yield format_event(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,63 @@
+# filters.py for bug app
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connections
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import Bug
+
+
+class BugFilterBackend(BaseFilterBackend):
+    """
+    Filter bugs by `status`, `bug_priority`, `bug_severity` and `project`
+    (comma separated values are OR'ed) and search `bug_description` with
+    `search`.
+
+    On PostgreSQL the search runs against the GIN indexed `search_vector`
+    column; other databases fall back to a case-insensitive substring match.
+    """
+    choice_params = {
+        'status': dict(Bug.STATUS_CHOICES),
+        'bug_priority': dict(Bug.PRIORITY_CHOICES),
+        'bug_severity': dict(Bug.SEVERITY_CHOICES),
+    }
+    search_param = 'search'
+    search_config = 'english'
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        errors = {}
+
+        for param, choices in self.choice_params.items():
+            values = self.get_values(params, param)
+            if not values:
+                continue
+            invalid = [value for value in values if value not in choices]
+            if invalid:
+                errors[param] = [f'"{value}" is not a valid choice.' for value in invalid]
+                continue
+            queryset = queryset.filter(**{f'{param}__in': values})
+
+        projects = self.get_values(params, 'project')
+        if projects:
+            if not all(value.isdigit() for value in projects):
+                errors['project'] = ['Expected a comma separated list of project ids.']
+            else:
+                queryset = queryset.filter(project_id__in=[int(value) for value in projects])
+
+        if errors:
+            raise ValidationError(errors)
+
+        terms = params.get(self.search_param, '').strip()
+        if terms:
+            queryset = self.search(queryset, terms)
+        return queryset
+
+    def get_values(self, params, param):
+        return [value.strip() for value in params.get(param, '').split(',') if value.strip()]
+
+    def search(self, queryset, terms):
+        if connections[queryset.db].vendor == 'postgresql':
+            query = SearchQuery(terms, config=self.search_config, search_type='websearch')
+            return queryset.filter(search_vector=query)
+        return queryset.filter(bug_description__icontains=terms)
@@ -0,0 +1,52 @@
+# history.py for bug app
+#
+# Builds BugHistory rows for bug writes. The views collect the rows of one
+# write and record_history() inserts them with a single bulk_create once
+# the surrounding transaction commits, so a rolled back write leaves no
+# history. The insert stays on the request thread rather than the task
+# queue: queued work is lost when the process exits, and audit rows must
+# also arrive in changed_at order for the BRIN index.
+
+from django.conf import settings
+from django.db import transaction
+from bug_report.exports import ndjson_lines
+from .models import BugHistory
+
+
+def history_entry(bug_id, project_id, before, after, actor, changed_at):
+    """
+    Return the BugHistory row going from `before` to `after` (dicts of
+    Bug.history_values(); `before` is None for a create), or None when no
+    tracked field changed.
+    """
+    if before is None:
+        action = 'created'
+        changes = {name: [None, value] for name, value in after.items() if value not in (None, '')}
+    else:
+        changes = {name: [before[name], value] for name, value in after.items() if name in before and before[name] != value}
+        if not changes:
+            return None
+        action = 'status_changed' if 'status' in changes else 'updated'
+    return BugHistory(
+        bug_id=bug_id, project_id=project_id, actor=actor, changed_at=changed_at, action=action, changes=changes
+    )
+
+
+def bug_history_entry(bug, before, actor):
+    """history_entry() for a Bug instance that was just saved."""
+    changed_at = bug.report_date if before is None else bug.updated_date
+    return history_entry(bug.pk, bug.project_id, before, bug.history_values(), actor, changed_at)
+
+
+def record_history(entries):
+    entries = [entry for entry in entries if entry is not None]
+    if entries:
+        transaction.on_commit(
+            lambda: BugHistory.objects.bulk_create(entries, batch_size=settings.BUG_HISTORY_BATCH_SIZE)
+        )
+
+
+def export_lines(queryset, chunk_size=2000):
+    """Yield BugHistory rows as newline-delimited JSON, reading in chunks."""
+    fields = ['id', 'bug_id', 'project_id', 'actor_id', 'changed_at', 'action', 'changes']
+    return ndjson_lines(fields, queryset.values_list(*fields).iterator(chunk_size=chunk_size))
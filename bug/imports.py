@@ -0,0 +1,204 @@
+# imports.py for bug app
+#
+# Bulk imports of bugs from CSV or JSON files. The upload is stored with a
+# BugImportJob and, once the job is committed, run_import parses it row by
+# row on the 'imports' task queue. Each batch of rows is validated with
+# BugSerializer against users and projects fetched in bulk (and remembered
+# for the rest of the job), then inserted with one bulk_create in its own
+# transaction together with the job's progress counters.
+
+import codecs
+import csv
+import json
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from bug_report.tasks import task
+from project.models import Project
+from .history import bug_history_entry, record_history
+from .models import Bug, BugImportError, BugImportJob
+from .serializers import BugSerializer
+from .signals import bugs_changed
+
+logger = logging.getLogger(__name__)
+
+# Characters between the objects of a JSON array or of NDJSON.
+JSON_SEPARATORS = frozenset(' \t\r\n,[]')
+
+
+def iter_csv_rows(file):
+    yield from csv.DictReader(codecs.getreader('utf-8-sig')(file))
+
+
+def iter_json_rows(file, chunk_size=64 * 1024):
+    """
+    Yield the values of a JSON array, or of newline-delimited JSON, reading
+    the file in chunks; only the value being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    reader = codecs.getreader('utf-8-sig')(file)
+    buffer, position, eof = '', 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in JSON_SEPARATORS:
+            position += 1
+        if position < len(buffer):
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield value
+                continue
+        elif eof:
+            return
+        chunk = reader.read(chunk_size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+ROW_PARSERS = {
+    'csv': iter_csv_rows,
+    'json': iter_json_rows,
+}
+
+
+class BulkLookup:
+    """
+    Instances of `queryset` by the value of `field`. load() fetches the
+    values not seen yet with one IN query and remembers the answer, misses
+    included, so each user or project is looked up once per job. Values
+    matching several rows (project names are not unique) are ambiguous.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.found = {}
+        self.ambiguous = set()
+        self.seen = set()
+
+    def load(self, values):
+        missing = {value for value in values if value not in self.seen}
+        if not missing:
+            return
+        self.seen |= missing
+        for instance in self.queryset.filter(**{f'{self.field}__in': missing}):
+            value = getattr(instance, self.field)
+            if value in self.found:
+                self.ambiguous.add(value)
+            self.found[value] = instance
+
+
+def row_value(row, name):
+    value = row.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+
+def row_item(row, users, projects):
+    """Return (item for BugSerializer, creator, errors) for one parsed row."""
+    # CSV leaves missing cells empty; drop them so the model defaults apply.
+    item = {name: value for name, value in row.items() if name and value not in (None, '')}
+    errors = {}
+
+    project_name = row_value(row, 'project')
+    if project_name is None:
+        errors['project'] = ['This field is required.']
+    elif str(project_name) in projects.ambiguous:
+        errors['project'] = [f'More than one project is named "{project_name}".']
+    elif str(project_name) not in projects.found:
+        errors['project'] = [f'No project is named "{project_name}".']
+    else:
+        item['project'] = projects.found[str(project_name)].pk
+
+    creator = None
+    username = row_value(row, 'created_by')
+    if username is not None:
+        creator = users.found.get(str(username))
+        if creator is None:
+            errors['created_by'] = [f'No user is named "{username}".']
+    return item, creator, errors
+
+
+def import_batch(job, batch, users, projects):
+    """Validate and insert one batch of (row number, row) pairs."""
+    rows = [(number, row) for number, row in batch if isinstance(row, dict)]
+    users.load(
+        str(value) for _, row in rows for value in (row_value(row, 'assigned_to'), row_value(row, 'created_by'))
+        if value is not None
+    )
+    projects.load(str(value) for _, row in rows if (value := row_value(row, 'project')) is not None)
+    context = {
+        'users_by_username': users.found,
+        'projects_by_id': {project.pk: project for project in projects.found.values()},
+    }
+
+    bugs, errors = [], []
+    for number, row in batch:
+        if not isinstance(row, dict):
+            errors.append(BugImportError(job=job, row=number, errors={'non_field_errors': ['Expected an object.']}))
+            continue
+        item, creator, row_errors = row_item(row, users, projects)
+        serializer = BugSerializer(data=item, context=context)
+        if serializer.is_valid() and not row_errors:
+            bugs.append(Bug(created_by=creator or job.created_by, **serializer.validated_data))
+        else:
+            errors.append(BugImportError(job=job, row=number, errors={**serializer.errors, **row_errors}))
+
+    with transaction.atomic():
+        Bug.objects.bulk_create(bugs)
+        bugs_changed.send(sender=Bug, changes=[(None, bug.snapshot()) for bug in bugs], actor_id=job.created_by_id)
+        record_history([bug_history_entry(bug, None, job.created_by) for bug in bugs])
+        kept = max(settings.BUG_IMPORT_MAX_ERRORS - job.failed_rows, 0)
+        BugImportError.objects.bulk_create(errors[:kept])
+        BugImportJob.objects.filter(pk=job.pk).update(
+            processed_rows=F('processed_rows') + len(batch),
+            imported_rows=F('imported_rows') + len(bugs),
+            failed_rows=F('failed_rows') + len(errors),
+            updated_at=timezone.now(),
+        )
+    job.processed_rows += len(batch)
+    job.imported_rows += len(bugs)
+    job.failed_rows += len(errors)
+
+
+@task(queue='imports')
+def run_import(job_id):
+    """
+    Import a pending job. Rows already counted in processed_rows are
+    skipped, and the upload is kept until the job completes, so a job cut
+    off by a restart or stopped by an unexpected error can be resumed by
+    resume_bug_imports.
+    """
+    jobs = BugImportJob.objects.filter(pk=job_id)
+    now = timezone.now()
+    if not jobs.filter(status='pending').update(status='running', started_at=now, updated_at=now):
+        return
+    job = jobs.select_related('created_by').get()
+    users = BulkLookup(get_user_model().objects.only('id', 'username'), 'username')
+    projects = BulkLookup(Project.objects.only('id', 'project_name'), 'project_name')
+    try:
+        with job.file.open('rb') as file:
+            rows = islice(enumerate(ROW_PARSERS[job.file_format](file), 1), job.processed_rows, None)
+            while batch := list(islice(rows, settings.BUG_IMPORT_BATCH_SIZE)):
+                import_batch(job, batch, users, projects)
+    except (ValueError, csv.Error) as exc:
+        # Covers JSON and Unicode decoding errors, both ValueErrors. Running
+        # the job again would stop at the same row, so drop the upload.
+        outcome = {'status': 'failed', 'error': f'Could not read the file after row {job.processed_rows}: {exc}'}
+    except Exception:
+        logger.exception('Bug import %s failed', job_id)
+        jobs.update(status='failed', error='The import stopped unexpectedly.', finished_at=timezone.now())
+        return
+    else:
+        outcome = {'status': 'completed'}
+    # The upload holds every row of the import; keep it no longer than needed.
+    job.file.delete(save=False)
+    jobs.update(file='', finished_at=timezone.now(), **outcome)
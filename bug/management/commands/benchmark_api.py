@@ -0,0 +1,162 @@
+import json
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.throttling import LoginEmailRateThrottle, LoginIPRateThrottle
+from bug.models import Bug
+from .generate_benchmark_data import BENCH_PASSWORD, USER_PREFIX, bench_users
+
+User = get_user_model()
+
+SCENARIOS = ['login', 'bug-list', 'bug-detail', 'bug-status-update', 'project-list', 'user-list']
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the API scenarios in-process through the Django test client against '
+        'the configured database (see generate_benchmark_data) and report '
+        'requests per second, p50/p95/p99 latency and queries per request. Use '
+        '--output to save the results and --baseline to compare a later run '
+        'with them. Login throttling is switched off for the run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                            help=f'Scenarios to run (default: all of {", ".join(SCENARIOS)}).')
+        parser.add_argument('--user', default=f'{USER_PREFIX}0', help='Username to act as.')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='Compare with results written earlier by --output.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['scenarios']) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}.')
+        try:
+            self.user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["user"]!r}; run generate_benchmark_data first.')
+        self.rng = random.Random(options['seed'])
+        self.emails = list(bench_users().values_list('email', flat=True)[:1000]) or [self.user.email]
+        self.bug_ids = list(Bug.objects.visible_to(self.user).values_list('pk', flat=True)[:1000])
+        self.own_bug_ids = list(Bug.objects.filter(created_by=self.user).values_list('pk', flat=True)[:1000])
+
+        baseline = {}
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        results = {}
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']))
+            for throttle in (LoginIPRateThrottle, LoginEmailRateThrottle):
+                stack.enter_context(mock.patch.object(throttle, 'allow_request', lambda *args: True))
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+            for name in options['scenarios'] or SCENARIOS:
+                request = getattr(self, f'scenario_{name.replace("-", "_")}')(client)
+                if request is None:
+                    self.stdout.write(self.style.WARNING(f'{name}: skipped, {self.user.username} has no bugs to use'))
+                    continue
+                for _ in range(options['warmup']):
+                    request()
+                results[name] = self.measure(request, options['requests'])
+                self.stdout.write(self.format(name, results[name], baseline.get(name)))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def measure(self, request, count):
+        counter = QueryCounter()
+        latencies = []
+        errors = 0
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            started = time.perf_counter()
+            for _ in range(count):
+                request_started = time.perf_counter()
+                response = request()
+                latencies.append((time.perf_counter() - request_started) * 1000)
+                errors += response.status_code >= 400
+            elapsed = time.perf_counter() - started
+
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': count,
+            'errors': errors,
+            'rps': count / elapsed,
+            'p50_ms': quantiles[49],
+            'p95_ms': quantiles[94],
+            'p99_ms': quantiles[98],
+            'queries_per_request': counter.count / count,
+        }
+
+    def format(self, name, result, baseline=None):
+        line = (
+            f'{name}: {result["rps"]:.0f} req/s, p50 {result["p50_ms"]:.1f} ms, '
+            f'p95 {result["p95_ms"]:.1f} ms, p99 {result["p99_ms"]:.1f} ms, '
+            f'{result["queries_per_request"]:.1f} queries/req, {result["errors"]} errors'
+        )
+        if baseline:
+            changes = ', '.join(
+                f'{key} {(result[key] - baseline[key]) / baseline[key]:+.0%}'
+                for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms') if baseline.get(key)
+            )
+            line += f'\n    vs baseline: {changes}, queries/req {baseline["queries_per_request"]:.1f}'
+        return line
+
+    def scenario_login(self, client):
+        def request():
+            return client.post('/api/accounts/login/', {
+                'email': self.rng.choice(self.emails), 'password': BENCH_PASSWORD,
+            })
+        return request
+
+    def scenario_bug_list(self, client):
+        return lambda: client.get('/api/bugs/')
+
+    def scenario_bug_detail(self, client):
+        if not self.bug_ids:
+            return None
+        return lambda: client.get(f'/api/bugs/{self.rng.choice(self.bug_ids)}/')
+
+    def scenario_bug_status_update(self, client):
+        if not self.own_bug_ids:
+            return None
+
+        def request():
+            return client.patch(
+                f'/api/bugs/{self.rng.choice(self.own_bug_ids)}/status/',
+                {'status': self.rng.choice(['open', 'in_progress', 'closed'])},
+                content_type='application/json',
+            )
+        return request
+
+    def scenario_project_list(self, client):
+        return lambda: client.get('/api/projects/')
+
+    def scenario_user_list(self, client):
+        return lambda: client.get('/api/accounts/users/')
@@ -0,0 +1,65 @@
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from bug.models import Bug
+
+from .generate_benchmark_data import bench_users
+
+
+def legacy_visible_to(user):
+    return Bug.objects.filter(created_by=user) | Bug.objects.filter(assigned_to=user)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the query plan and latency of the UNION based Bug visibility '
+        'filter with the legacy OR filter. Tops the benchmark data up to --rows '
+        'bugs through generate_benchmark_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        call_command(
+            'generate_benchmark_data',
+            users=options['users'],
+            bugs=options['rows'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE bug_bug')
+
+        user = bench_users().order_by('?').first()
+        strategies = [
+            ('legacy OR filter', legacy_visible_to(user)),
+            ('UNION visible_to', Bug.objects.visible_to(user)),
+        ]
+        for label, queryset in strategies:
+            page = queryset.order_by('-report_date', '-bug_id')[:options['page_size']]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{label} (user {user.username})'))
+            self.stdout.write(self.explain(page))
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(page.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'first page: median {statistics.median(timings):.2f} ms, '
+                f'max {max(timings):.2f} ms over {len(timings)} runs\n'
+            )
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            return queryset.explain(analyze=True, buffers=True)
+        return queryset.explain()
@@ -0,0 +1,137 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bug.models import Bug
+from project.models import Project
+
+User = get_user_model()
+
+USER_PREFIX = 'bench_user_'
+PROJECT_PREFIX = 'Benchmark project '
+BENCH_PASSWORD = 'benchmark-password'
+
+
+def bench_users():
+    return User.objects.filter(username__startswith=USER_PREFIX)
+
+
+def bench_projects():
+    return Project.objects.filter(project_name__startswith=PROJECT_PREFIX)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate benchmark users, projects (with members) and bugs with batched '
+        'inserts, topping up to the requested counts so it can be rerun. All '
+        f'users share the password "{BENCH_PASSWORD}"; {USER_PREFIX}0 is a team '
+        'lead and the default actor of benchmark_api.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--members', type=int, default=20, help='Members per project.')
+        parser.add_argument('--bugs', type=int, default=100_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            users = self.create_users(options['users'], rng, batch_size)
+            projects = self.create_projects(options['projects'], options['members'], users, rng, batch_size)
+            self.create_bugs(options['bugs'], projects, users, rng, batch_size)
+        # bulk_create skips the signals that keep the metric tables current.
+        call_command('rebuild_bug_metrics', batch_size=batch_size, stdout=self.stdout)
+
+    def create_users(self, count, rng, batch_size):
+        existing = bench_users().count()
+        if existing < count:
+            self.stdout.write(f'Creating {count - existing} users...')
+            # One hash for everyone: hashing is the slow part and the
+            # benchmark logs in with a single known password anyway.
+            password = make_password(BENCH_PASSWORD)
+            roles = [role for role, _ in User.ROLE_CHOICES]
+            depts = [dept for dept, _ in User.DEPT_CHOICES]
+            User.objects.bulk_create([
+                User(
+                    username=f'{USER_PREFIX}{i}',
+                    email=f'{USER_PREFIX}{i}@example.com',
+                    password=password,
+                    role='team_lead' if i == 0 else rng.choice(roles),
+                    dept='python' if i == 0 else rng.choice(depts),
+                )
+                for i in range(existing, count)
+            ], batch_size=batch_size)
+        return list(bench_users().order_by('pk').values_list('pk', flat=True)[:count])
+
+    def create_projects(self, count, members, users, rng, batch_size):
+        existing = bench_projects().count()
+        if existing < count:
+            self.stdout.write(f'Creating {count - existing} projects...')
+            today = timezone.localdate()
+            created = Project.objects.bulk_create([
+                Project(
+                    project_name=f'{PROJECT_PREFIX}{i}',
+                    project_duration=rng.randint(7, 365),
+                    client_name=f'Client {i % 25}',
+                    submission_date=today,
+                    status=rng.choice(['open', 'open', 'open', 'closed']),
+                )
+                for i in range(existing, count)
+            ], batch_size=batch_size)
+            # PostgreSQL returns the new primary keys; elsewhere read them back.
+            if any(project.pk is None for project in created):
+                created = list(bench_projects().order_by('pk')[existing:count])
+
+            Membership = Project.users.through
+            memberships = []
+            for project in created:
+                team = rng.sample(users, min(members, len(users)))
+                if users[0] not in team:
+                    team[0] = users[0]
+                memberships.extend(Membership(project_id=project.pk, customuser_id=user_id) for user_id in team)
+            Membership.objects.bulk_create(memberships, batch_size=batch_size)
+        return list(
+            bench_projects().order_by('pk').values_list('pk', flat=True)[:count]
+        )
+
+    def create_bugs(self, count, projects, users, rng, batch_size):
+        existing = Bug.objects.filter(project_id__in=projects).count()
+        if existing >= count:
+            return
+        members = {}
+        for project_id, user_id in Project.users.through.objects.filter(
+            project_id__in=projects
+        ).values_list('project_id', 'customuser_id'):
+            members.setdefault(project_id, []).append(user_id)
+
+        self.stdout.write(f'Creating {count - existing} bugs...')
+        bug_types = [value for value, _ in Bug.BUG_TYPE_CHOICES]
+        severities = [value for value, _ in Bug.SEVERITY_CHOICES]
+        remaining = count - existing
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            bugs = []
+            for _ in range(size):
+                project_id = rng.choice(projects)
+                team = members.get(project_id) or users
+                bugs.append(Bug(
+                    bug_type=rng.choice(bug_types),
+                    created_by_id=rng.choice(team),
+                    assigned_to_id=rng.choice(team) if rng.random() < 0.8 else None,
+                    bug_description=f'Benchmark bug {rng.getrandbits(32):08x}',
+                    project_id=project_id,
+                    bug_priority=rng.choice(['low', 'medium', 'high']),
+                    bug_severity=rng.choice(severities),
+                    status=rng.choices(['open', 'in_progress', 'closed'], weights=[5, 2, 3])[0],
+                ))
+            Bug.objects.bulk_create(bugs, batch_size=batch_size)
+            remaining -= size
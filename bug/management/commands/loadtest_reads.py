@@ -0,0 +1,84 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bug.models import Bug
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the bug and project read endpoints on one or more running '
+        'deployments and compare throughput and latency, e.g.\n'
+        '  gunicorn bug_report.wsgi -w 4 -b :8000\n'
+        '  uvicorn bug_report.asgi:application --workers 4 --port 8001\n'
+        '  manage.py loadtest_reads wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001\n'
+        'Tokens are signed locally, so run it with the servers\' settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='name=base_url pairs to compare.')
+        parser.add_argument('--user', required=True, help='Username to authenticate as.')
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5000, help='Requests per endpoint and target.')
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["user"]!r}.')
+        token = str(AccessToken.for_user(user))
+
+        paths = ['/api/bugs/', '/api/projects/']
+        bug_id = Bug.objects.visible_to(user).values_list('pk', flat=True).first()
+        if bug_id is not None:
+            paths.insert(1, f'/api/bugs/{bug_id}/')
+
+        targets = []
+        for target in options['targets']:
+            name, sep, base_url = target.partition('=')
+            if not sep:
+                raise CommandError(f'Expected name=base_url, got {target!r}.')
+            targets.append((name, base_url.rstrip('/')))
+
+        for path in paths:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'GET {path} ({options["requests"]} requests, concurrency {options["concurrency"]})'
+            ))
+            for name, base_url in targets:
+                self.stdout.write(f'  {name}: ' + self.run(base_url + path, token, options))
+
+    def run(self, url, token, options):
+        def fetch(_):
+            request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return ok, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for ok, latency in results if ok)
+        errors = len(results) - len(latencies)
+        if not latencies:
+            return f'all {errors} requests failed'
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return (
+            f'{len(results) / elapsed:.0f} req/s, p50 {quantiles[49]:.1f} ms, '
+            f'p95 {quantiles[94]:.1f} ms, p99 {quantiles[98]:.1f} ms, {errors} errors'
+        )
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+from bug.models import Bug, BugDailyMetric, BugWorkload
+
+
+class Command(BaseCommand):
+    help = 'Recompute BugWorkload and BugDailyMetric from the Bug table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        time_to_close = ExpressionWrapper(F('updated_date') - F('report_date'), output_field=DurationField())
+        closed = Q(status='closed')
+
+        workloads = (
+            Bug.objects.values('project_id', 'assigned_to_id')
+            .annotate(
+                open_count=Count('pk', filter=Q(status='open')),
+                in_progress_count=Count('pk', filter=Q(status='in_progress')),
+                closed_count=Count('pk', filter=closed),
+                time_to_close_total=Sum(time_to_close, filter=closed),
+            )
+            .order_by()
+        )
+        opened = (
+            Bug.objects.annotate(day=TruncDate('report_date'))
+            .values('day', 'project_id', 'assigned_to_id')
+            .annotate(opened_count=Count('pk'))
+            .order_by()
+        )
+        closed_by_day = (
+            Bug.objects.filter(closed)
+            .annotate(day=TruncDate('updated_date'))
+            .values('day', 'project_id', 'assigned_to_id')
+            .annotate(closed_count=Count('pk'), time_to_close_total=Sum(time_to_close))
+            .order_by()
+        )
+
+        daily = {}
+        for row in opened.iterator():
+            key = (row['day'], row['project_id'], row['assigned_to_id'])
+            daily[key] = BugDailyMetric(
+                day=row['day'], project_id=row['project_id'], assignee_id=row['assigned_to_id'],
+                opened_count=row['opened_count'],
+            )
+        for row in closed_by_day.iterator():
+            key = (row['day'], row['project_id'], row['assigned_to_id'])
+            metric = daily.setdefault(key, BugDailyMetric(
+                day=row['day'], project_id=row['project_id'], assignee_id=row['assigned_to_id'],
+            ))
+            metric.closed_count = row['closed_count']
+            metric.time_to_close_total = row['time_to_close_total']
+
+        with transaction.atomic():
+            BugWorkload.objects.all().delete()
+            BugDailyMetric.objects.all().delete()
+            created_workloads = BugWorkload.objects.bulk_create(
+                (
+                    BugWorkload(
+                        project_id=row['project_id'],
+                        assignee_id=row['assigned_to_id'],
+                        open_count=row['open_count'],
+                        in_progress_count=row['in_progress_count'],
+                        closed_count=row['closed_count'],
+                        time_to_close_total=row['time_to_close_total'] or timedelta(),
+                    )
+                    for row in workloads.iterator()
+                ),
+                batch_size=options['batch_size'],
+            )
+            BugDailyMetric.objects.bulk_create(daily.values(), batch_size=options['batch_size'])
+
+        self.stdout.write(f'Rebuilt {len(created_workloads)} workload rows and {len(daily)} daily rows.')
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from bug.imports import run_import
+from bug.models import BugImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Resume bug imports that a restart cut off (running, but without '
+        'progress for --stalled-after minutes) or that stopped on an '
+        'unexpected error and still have their upload. Each job continues '
+        'after its last imported batch. Run it after deploys, e.g. from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stalled-after', type=int, default=30, help='Minutes without progress.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['stalled_after'])
+        resumable = BugImportJob.objects.filter(
+            Q(status='running') & (Q(updated_at__lt=cutoff) | Q(updated_at__isnull=True))
+            | Q(status='failed') & ~Q(file='')
+        )
+        resumed = 0
+        for job_id in resumable.values_list('pk', flat=True):
+            # Filtered again so a job that moved on meanwhile is left alone.
+            if resumable.filter(pk=job_id).update(status='pending', error='', finished_at=None):
+                run_import(job_id)
+                resumed += 1
+        self.stdout.write(f'Resumed {resumed} import job{"" if resumed == 1 else "s"}.')
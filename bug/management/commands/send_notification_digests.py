@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from bug.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Email every user whose oldest pending bug notification is at least '
+        'NOTIFICATION_DIGEST_WINDOW_SECONDS old a digest of all their pending '
+        'notifications. Run it every minute or so, e.g. from cron.'
+    )
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(f'Sent {sent} digest{"" if sent == 1 else "s"}.')
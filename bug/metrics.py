@@ -0,0 +1,99 @@
+# metrics.py for bug app
+#
+# Keeps BugWorkload and BugDailyMetric in step with Bug writes. Every bug
+# contributes a fixed set of counters to the two tables (see contributions()),
+# so a change is applied as "after minus before" and the tables always equal
+# what rebuild_bug_metrics would compute from scratch.
+
+from collections import defaultdict
+from weakref import WeakKeyDictionary
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, QuerySet, Subquery
+from django.dispatch import receiver
+from django.utils import timezone
+from project.models import Project
+from .models import BugDailyMetric, BugWorkload
+from .signals import bugs_changed
+
+
+def contributions(snapshot):
+    """Yield (model, key, counters) for what one bug adds to the metric tables."""
+    if snapshot is None:
+        return
+    key = {'project_id': snapshot['project_id'], 'assignee_id': snapshot['assigned_to_id']}
+    workload = {f"{snapshot['status']}_count": 1}
+
+    yield BugDailyMetric, {**key, 'day': timezone.localdate(snapshot['report_date'])}, {'opened_count': 1}
+    if snapshot['status'] == 'closed':
+        time_to_close = snapshot['updated_date'] - snapshot['report_date']
+        workload['time_to_close_total'] = time_to_close
+        yield BugDailyMetric, {**key, 'day': timezone.localdate(snapshot['updated_date'])}, {
+            'closed_count': 1,
+            'time_to_close_total': time_to_close,
+        }
+    yield BugWorkload, key, workload
+
+
+def apply_changes(changes):
+    deltas = defaultdict(dict)
+    for before, after in changes:
+        for sign, snapshot in ((-1, before), (1, after)):
+            for model, key, counters in contributions(snapshot):
+                totals = deltas[model, tuple(sorted(key.items()))]
+                for name, value in counters.items():
+                    totals[name] = totals.get(name, value * 0) + sign * value
+
+    for (model, key), counters in deltas.items():
+        counters = {name: value for name, value in counters.items() if value}
+        if counters:
+            increment(model, dict(key), counters)
+
+
+def increment(model, key, counters):
+    # Update a single row picked by a subquery, so a duplicate row created by
+    # two racing inserts is never counted twice; readers always Sum() rows.
+    row = model.objects.filter(**key).values('pk')[:1]
+    updated = model.objects.filter(pk=Subquery(row)).update(
+        **{name: F(name) + value for name, value in counters.items()}
+    )
+    # A missing row is only created for additions: taking something away
+    # from a row that is gone (e.g. cascaded away with its project or user)
+    # must not bring it back.
+    if not updated and any(value > value * 0 for value in counters.values()):
+        model.objects.create(**key, **counters)
+
+
+def unassigned(snapshot, user_ids):
+    if snapshot is None or snapshot['assigned_to_id'] not in user_ids:
+        return snapshot
+    return {**snapshot, 'assigned_to_id': None}
+
+
+# The users removed by each user delete(), by its origin, so the cascade
+# reads them once rather than once per bug.
+deleted_users = WeakKeyDictionary()
+
+
+def deleted_user_ids(origin):
+    if not isinstance(origin, QuerySet):
+        return {origin.pk}
+    if origin not in deleted_users:
+        # Bugs are deleted before the users they point at, so the queryset
+        # still matches the users being deleted.
+        deleted_users[origin] = set(origin.values_list('pk', flat=True))
+    return deleted_users[origin]
+
+
+@receiver(bugs_changed)
+def update_bug_metrics(sender, changes, origin=None, **kwargs):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if issubclass(origin_model, Project):
+        # The project's metric rows are deleted by the same cascade.
+        return
+    if issubclass(origin_model, get_user_model()):
+        # The cascade has already moved the users' metric rows to
+        # assignee NULL (SET_NULL); take the deleted bugs off those rows.
+        user_ids = deleted_user_ids(origin)
+        changes = [(unassigned(before, user_ids), unassigned(after, user_ids)) for before, after in changes]
+    apply_changes(changes)
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0001_initial'),
+        ('project', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['-report_date', '-bug_id'], name='bug_report_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['created_by', '-report_date', '-bug_id'], name='bug_creator_report_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['assigned_to', '-report_date', '-bug_id'], name='bug_assignee_report_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:02
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+SEARCH_VECTOR_INDEX = django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='bug_search_vector_idx')
+
+
+def create_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('bug', 'Bug'), SEARCH_VECTOR_INDEX)
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('bug', 'Bug'), SEARCH_VECTOR_INDEX)
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE TRIGGER bug_search_vector_update "
+        "BEFORE INSERT OR UPDATE OF bug_description ON bug_bug "
+        "FOR EACH ROW EXECUTE PROCEDURE "
+        "tsvector_update_trigger(search_vector, 'pg_catalog.english', bug_description)"
+    )
+    schema_editor.execute(
+        "UPDATE bug_bug SET search_vector = to_tsvector('pg_catalog.english', coalesce(bug_description, ''))"
+    )
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP TRIGGER IF EXISTS bug_search_vector_update ON bug_bug')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0002_bug_keyset_indexes'),
+        ('project', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bug',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['project', '-report_date', '-bug_id'], name='bug_project_report_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['status', '-report_date', '-bug_id'], name='bug_status_report_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['-updated_date', '-bug_id'], name='bug_updated_date_idx'),
+        ),
+        # GIN and the trigger are PostgreSQL only; other backends keep the
+        # column empty and search with a plain substring match.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='bug', index=SEARCH_VECTOR_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_vector_index, drop_search_vector_index),
+            ],
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
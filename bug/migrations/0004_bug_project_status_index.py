@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0003_bug_filter_indexes_search_vector'),
+        ('project', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['project', 'status'], include=('bug_severity', 'bug_priority'), name='bug_project_status_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:09
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0004_bug_project_status_index'),
+        ('project', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugDailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('opened_count', models.IntegerField(default=0)),
+                ('closed_count', models.IntegerField(default=0)),
+                ('time_to_close_total', models.DurationField(default=datetime.timedelta)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bug_daily_metrics', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bug_daily_metrics', to='project.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'day'], name='bug_daily_project_day_idx'), models.Index(fields=['assignee', 'day'], name='bug_daily_assignee_day_idx'), models.Index(fields=['day'], name='bug_daily_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BugWorkload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('closed_count', models.IntegerField(default=0)),
+                ('time_to_close_total', models.DurationField(default=datetime.timedelta)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bug_workloads', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bug_workloads', to='project.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'assignee'], name='bug_workload_key_idx'), models.Index(fields=['assignee'], name='bug_workload_assignee_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:12
+
+import bug.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0005_bug_metrics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bug',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=bug.storage.bug_image_storage, upload_to='bugs/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0006_bug_image_content_hash_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bug',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:41
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+CHANGED_AT_BRIN_INDEX = django.contrib.postgres.indexes.BrinIndex(
+    autosummarize=True, fields=['changed_at'], name='bug_history_changed_at_brin'
+)
+
+
+def create_changed_at_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('bug', 'BugHistory'), CHANGED_AT_BRIN_INDEX)
+
+
+def drop_changed_at_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('bug', 'BugHistory'), CHANGED_AT_BRIN_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0007_bug_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bug_id', models.IntegerField()),
+                ('project_id', models.IntegerField()),
+                ('changed_at', models.DateTimeField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('status_changed', 'Status changed')], max_length=20)),
+                ('changes', models.JSONField()),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bug_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bug_id', 'changed_at'], name='bug_history_bug_idx'), models.Index(fields=['project_id', 'changed_at'], name='bug_history_project_idx')],
+            },
+        ),
+        # BRIN is PostgreSQL only; elsewhere range scans use the composite
+        # indexes above or the table itself.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='bughistory', index=CHANGED_AT_BRIN_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_changed_at_brin_index, drop_changed_at_brin_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0009_bug_import_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('assigned', 'Assigned'), ('status_changed', 'Status changed')], max_length=20)),
+                ('changes', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('bug', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='bug.bug')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bug_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='bug_notification_created_idx'), models.Index(fields=['recipient', 'created_at'], name='bug_notification_recipient_idx')],
+            },
+        ),
+    ]
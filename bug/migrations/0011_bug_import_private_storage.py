@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:03
+
+import bug.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0010_bug_notifications'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bugimportjob',
+            name='file',
+            field=models.FileField(blank=True, storage=bug.storage.private_storage, upload_to='imports/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bug', '0011_bug_import_private_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bugimportjob',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
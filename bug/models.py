@@ -1,11 +1,85 @@
 # models.py for bug app
 
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, router, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from project.models import Project
+from .storage import bug_image_storage, private_storage
 
 User = get_user_model()
 
+
+class BugVersionConflict(Exception):
+    """Bug.save() found the row changed by another write, or gone, since the instance was loaded."""
+
+
+class BugQuerySet(models.QuerySet):
+    def for_api(self):
+        """
+        Shape the queryset for BugSerializer: join the two user foreign keys
+        and load only the username from each, so a page of bugs costs one
+        query. `project` is rendered as a primary key straight from
+        `project_id` and needs no join.
+        """
+        bug_fields = [field.name for field in Bug._meta.concrete_fields if field.name != 'search_vector']
+        return self.select_related('created_by', 'assigned_to').only(
+            *bug_fields, 'created_by__username', 'assigned_to__username'
+        )
+
+    def visible_to(self, user):
+        """
+        Bugs the user may see: everything for staff, otherwise the bugs they
+        created or are assigned to.
+
+        `created_by = u OR assigned_to = u` over one table tends to plan as a
+        sequential scan on large tables. A UNION of two single-column lookups
+        gives each branch its own index scan, and the result still composes
+        with further filters, ordering and pagination.
+        """
+        if user.is_superuser or user.is_staff:
+            return self
+        bugs = self.model._default_manager
+        participant_ids = bugs.filter(created_by=user).values('pk').union(
+            bugs.filter(assigned_to=user).values('pk')
+        )
+        return self.filter(pk__in=participant_ids)
+
+    def transition_status(self, bug_id, status, user, expected_version=None):
+        """
+        Set the bug's status with a conditional UPDATE that writes only
+        status, updated_date and version. The row is first read with SELECT
+        ... FOR UPDATE under the permission rule (creator or superuser) and,
+        when given, the version the client expects; the lock keeps the
+        before snapshot exact until the UPDATE commits, even when other
+        transitions of the same bug run concurrently.
+
+        Return the (before, after) snapshots for bugs_changed and the new
+        version, or None when no row matched; the caller works out whether
+        that was a missing bug, a permission or a version conflict.
+        """
+        predicates = {}
+        if not user.is_superuser:
+            predicates['created_by_id'] = user.pk
+        if expected_version is not None:
+            predicates['version'] = expected_version
+        now = timezone.now()
+        with transaction.atomic(using=self.db, savepoint=False):
+            before = (
+                self.select_for_update().filter(pk=bug_id, **predicates)
+                .values(*Bug.SNAPSHOT_FIELDS, 'version').first()
+            )
+            if before is None:
+                return None
+            version = before.pop('version') + 1
+            self.filter(pk=bug_id).update(status=status, updated_date=now, version=version)
+        return before, {**before, 'status': status, 'updated_date': now}, version
+
+
 class Bug(models.Model):
     BUG_TYPE_CHOICES = [
         ('error', 'Error'),
@@ -46,12 +120,249 @@ class Bug(models.Model):
     updated_date = models.DateTimeField(auto_now=True)
     bug_description = models.TextField()
     url_bug = models.URLField(blank=True, null=True)
-    image = models.ImageField(upload_to='bugs/', blank=True, null=True)
+    image = models.ImageField(upload_to='bugs/', storage=bug_image_storage, blank=True, null=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     bug_priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES)
     bug_severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     is_current_project = models.BooleanField(default=True)
+    # Bumped by every write; the status endpoint only applies a change made
+    # against the version the client last saw.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    # Maintained by a database trigger on PostgreSQL, see migration 0003.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BugQuerySet.as_manager()
+
+    # Fields whose changes are recorded in BugHistory (bug.history).
+    HISTORY_FIELDS = (
+        'bug_type', 'assigned_to_id', 'bug_description', 'url_bug', 'image', 'project_id',
+        'bug_priority', 'bug_severity', 'status', 'is_current_project',
+    )
+
+    # Columns captured by snapshot() for the bugs_changed signal (bug.signals).
+    SNAPSHOT_FIELDS = (
+        'bug_id', 'project_id', 'created_by_id', 'assigned_to_id', 'status', 'report_date', 'updated_date',
+    )
+
+    class Meta:
+        # Match the (report_date, bug_id) keyset used by the list endpoint, both
+        # for staff (whole table) and for the creator/assignee visibility paths.
+        indexes = [
+            models.Index(fields=['-report_date', '-bug_id'], name='bug_report_date_idx'),
+            models.Index(fields=['created_by', '-report_date', '-bug_id'], name='bug_creator_report_idx'),
+            models.Index(fields=['assigned_to', '-report_date', '-bug_id'], name='bug_assignee_report_idx'),
+            models.Index(fields=['project', '-report_date', '-bug_id'], name='bug_project_report_idx'),
+            models.Index(fields=['status', '-report_date', '-bug_id'], name='bug_status_report_idx'),
+            # Covers the per-project stats aggregate (Project.objects.with_bug_stats)
+            # with an index-only scan; INCLUDE is PostgreSQL only.
+            models.Index(
+                fields=['project', 'status'], include=['bug_severity', 'bug_priority'], name='bug_project_status_idx'
+            ),
+            models.Index(fields=['-updated_date', '-bug_id'], name='bug_updated_date_idx'),
+            GinIndex(fields=['search_vector'], name='bug_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f"{self.bug_id} - {self.bug_type} -{self.status}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the state as loaded so a later save can report what changed.
+        if all(name in field_names for name in cls.SNAPSHOT_FIELDS):
+            instance._loaded_snapshot = instance.snapshot()
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Saves of an existing bug only apply to the version it was loaded at:
+        the row is read with SELECT ... FOR UPDATE at that version, which
+        also gives bugs_changed the stored before snapshot, and the UPDATE
+        writes version + 1. Raise BugVersionConflict when another write got
+        there first.
+        """
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        expected_version = self.version
+        with transaction.atomic(using=using, savepoint=False):
+            before = (
+                type(self)._base_manager.using(using).select_for_update()
+                .filter(pk=self.pk, version=expected_version).values(*self.SNAPSHOT_FIELDS, 'image').first()
+            )
+            if before is not None:
+                # The thumbnail receiver (bug.thumbnails) skips unchanged images.
+                self._stored_image_name = before.pop('image')
+                self._loaded_snapshot = before
+                self.version = F('version') + 1
+                try:
+                    super().save(*args, **kwargs)
+                except BaseException:
+                    self.version = expected_version
+                    raise
+                self.version = expected_version + 1
+        if before is None:
+            raise BugVersionConflict(self.pk)
+
+    def snapshot(self):
+        return {name: getattr(self, name) for name in self.SNAPSHOT_FIELDS}
+
+    def history_values(self):
+        """The HISTORY_FIELDS values as JSON-ready data, for BugHistory diffs."""
+        values = {}
+        for name in self.HISTORY_FIELDS:
+            value = getattr(self, name)
+            values[name] = (value.name or None) if isinstance(value, models.fields.files.FieldFile) else value
+        return values
+
+
+class BugWorkload(models.Model):
+    """
+    Current bug counts per project and assignee, maintained incrementally
+    by bug.metrics from the bugs_changed signal.
+    """
+    project = models.ForeignKey(Project, related_name='bug_workloads', on_delete=models.CASCADE)
+    assignee = models.ForeignKey(User, related_name='bug_workloads', on_delete=models.SET_NULL, null=True, blank=True)
+    open_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    closed_count = models.IntegerField(default=0)
+    # Sum of (updated_date - report_date) over the closed bugs.
+    time_to_close_total = models.DurationField(default=timedelta)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'assignee'], name='bug_workload_key_idx'),
+            models.Index(fields=['assignee'], name='bug_workload_assignee_idx'),
+        ]
+
+
+class BugDailyMetric(models.Model):
+    """
+    Bugs opened (by report_date) and closed (by updated_date of closed bugs)
+    per day, project and assignee, maintained like BugWorkload.
+    """
+    day = models.DateField()
+    project = models.ForeignKey(Project, related_name='bug_daily_metrics', on_delete=models.CASCADE)
+    assignee = models.ForeignKey(User, related_name='bug_daily_metrics', on_delete=models.SET_NULL, null=True, blank=True)
+    opened_count = models.IntegerField(default=0)
+    closed_count = models.IntegerField(default=0)
+    time_to_close_total = models.DurationField(default=timedelta)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'day'], name='bug_daily_project_day_idx'),
+            models.Index(fields=['assignee', 'day'], name='bug_daily_assignee_day_idx'),
+            models.Index(fields=['day'], name='bug_daily_day_idx'),
+        ]
+
+
+class BugHistory(models.Model):
+    """
+    Append-only log of bug changes: one row per create or update, holding
+    {field: [old, new]} for the HISTORY_FIELDS that changed. Written in
+    batches on commit by bug.history.
+
+    bug_id and project_id are plain columns so the log outlives the bug.
+    Rows arrive in changed_at order, which is what makes the BRIN index
+    (PostgreSQL) a good fit for time-range scans over a very large table.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('status_changed', 'Status changed'),
+    ]
+
+    bug_id = models.IntegerField()
+    project_id = models.IntegerField()
+    actor = models.ForeignKey(User, related_name='bug_history', on_delete=models.SET_NULL, null=True, blank=True)
+    changed_at = models.DateTimeField()
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    changes = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bug_id', 'changed_at'], name='bug_history_bug_idx'),
+            models.Index(fields=['project_id', 'changed_at'], name='bug_history_project_idx'),
+            BrinIndex(fields=['changed_at'], name='bug_history_changed_at_brin', autosummarize=True),
+        ]
+
+
+class BugImportJob(models.Model):
+    """
+    An uploaded CSV or JSON file of bugs, imported in the background by
+    bug.imports. The row counters are updated in the same transaction as
+    each batch of inserted bugs, so they always match what was written.
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('json', 'JSON'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(User, related_name='bug_import_jobs', on_delete=models.CASCADE)
+    # Private (never served). Kept until the job completes, or its file
+    # turns out to be unreadable, so an interrupted job can be resumed.
+    file = models.FileField(upload_to='imports/%Y/%m/', storage=private_storage, blank=True)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    # Why the whole job stopped, e.g. a file that is not valid CSV or JSON.
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Bumped with every batch; a running job that stops moving was cut off
+    # by a restart (see the resume_bug_imports command).
+    updated_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.pk} - {self.status}"
+
+
+class BugImportError(models.Model):
+    """Validation errors of one rejected row (numbered from 1) of an import."""
+    job = models.ForeignKey(BugImportJob, related_name='row_errors', on_delete=models.CASCADE)
+    row = models.PositiveIntegerField()
+    errors = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'row'], name='bug_import_error_row_idx'),
+        ]
+
+
+class BugNotification(models.Model):
+    """
+    A pending assignment or status change notice for one user. Collected
+    from bug writes and sent, then deleted, with the user's next digest by
+    bug.notifications.
+    """
+    KIND_CHOICES = [
+        ('assigned', 'Assigned'),
+        ('status_changed', 'Status changed'),
+    ]
+
+    recipient = models.ForeignKey(User, related_name='bug_notifications', on_delete=models.CASCADE)
+    bug = models.ForeignKey(Bug, related_name='notifications', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # {'status': [old, new]} for status changes.
+    changes = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='bug_notification_created_idx'),
+            models.Index(fields=['recipient', 'created_at'], name='bug_notification_recipient_idx'),
+        ]
@@ -0,0 +1,131 @@
+# notifications.py for bug app
+#
+# Tells assignees and creators about assignments and status changes. Every
+# bug write inserts its BugNotification rows once it commits, on the
+# request thread so a process exit cannot lose them; the
+# send_notification_digests command then mails each user one digest of
+# everything pending once their oldest notification has waited
+# NOTIFICATION_DIGEST_WINDOW_SECONDS, so a burst of changes becomes one
+# email. Digests go out in batches that share one SMTP connection.
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Bug, BugNotification
+from .signals import bugs_changed
+
+STATUS_LABELS = dict(Bug.STATUS_CHOICES)
+
+
+def notification_events(before, after, actor_id=None):
+    """
+    Yield (recipient id, kind, changes) for one (before, after) snapshot
+    pair. The user who made the change already knows about it.
+    """
+    if after is None:
+        return
+    assignee = after['assigned_to_id']
+    if assignee not in (None, actor_id) and (before is None or before['assigned_to_id'] != assignee):
+        yield assignee, 'assigned', {}
+    if before is not None and before['status'] != after['status']:
+        for user_id in {after['created_by_id'], assignee} - {None, actor_id}:
+            yield user_id, 'status_changed', {'status': [before['status'], after['status']]}
+
+
+@receiver(bugs_changed)
+def collect_notifications(sender, changes, actor_id=None, **kwargs):
+    now = timezone.now()
+    notifications = [
+        BugNotification(recipient_id=user_id, bug_id=after['bug_id'], kind=kind, changes=payload, created_at=now)
+        for before, after in changes
+        for user_id, kind, payload in notification_events(before, after, actor_id)
+    ]
+    if notifications:
+        transaction.on_commit(lambda: BugNotification.objects.bulk_create(notifications))
+
+
+def digest_lines(recipient, notifications):
+    """One line per bug, coalescing repeated changes to the same bug."""
+    bugs = {}
+    for notification in notifications:
+        entry = bugs.setdefault(notification.bug_id, {'bug': notification.bug, 'assigned': False, 'status': None})
+        if notification.kind == 'assigned':
+            entry['assigned'] = True
+        else:
+            old, new = notification.changes['status']
+            entry['status'] = [entry['status'][0] if entry['status'] else old, new]
+
+    lines = []
+    for entry in bugs.values():
+        bug = entry['bug']
+        updates = []
+        # Only if the bug was not handed to someone else in the meantime.
+        if entry['assigned'] and bug.assigned_to_id == recipient.pk:
+            updates.append('assigned to you')
+        if entry['status'] and entry['status'][0] != entry['status'][1]:
+            old, new = entry['status']
+            updates.append(f'status {STATUS_LABELS.get(old, old)} -> {STATUS_LABELS.get(new, new)}')
+        if updates:
+            description = bug.bug_description if len(bug.bug_description) <= 80 else bug.bug_description[:77] + '...'
+            lines.append(f'#{bug.pk} [{bug.project.project_name}] {description}: {", ".join(updates)}')
+    return lines
+
+
+def build_digest(recipient, notifications):
+    """Return the digest EmailMessage, or None when nothing is left to tell."""
+    if not recipient.email:
+        return None
+    lines = digest_lines(recipient, notifications)
+    if not lines:
+        return None
+    subject = f'{len(lines)} bug update{"s" if len(lines) > 1 else ""}'
+    body = '\n'.join([f'Hi {recipient.username},', '', 'Changes to bugs you work on:', '', *lines, ''])
+    return EmailMessage(subject, body, to=[recipient.email])
+
+
+def send_digest_batch(recipient_ids, connection):
+    with transaction.atomic():
+        # Rows locked by a concurrent sender are left to it.
+        notifications = list(
+            BugNotification.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(recipient_id__in=recipient_ids)
+            .select_related('recipient', 'bug__project')
+            .order_by('recipient_id', 'created_at', 'id')
+        )
+        messages = []
+        for _, group in groupby(notifications, key=lambda notification: notification.recipient_id):
+            group = list(group)
+            message = build_digest(group[0].recipient, group)
+            if message is not None:
+                messages.append(message)
+        if messages:
+            with connection:
+                connection.send_messages(messages)
+        BugNotification.objects.filter(pk__in=[notification.pk for notification in notifications]).delete()
+    return len(messages)
+
+
+def send_digests(now=None):
+    """
+    Send a digest to every user whose oldest pending notification is at
+    least NOTIFICATION_DIGEST_WINDOW_SECONDS old and delete what it covered.
+    Recipients are handled NOTIFICATION_DIGEST_BATCH_SIZE at a time, each
+    batch in one transaction over one SMTP connection, so a failed send
+    leaves that batch pending for the next run. Returns the digests sent.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW_SECONDS)
+    recipient_ids = sorted(set(
+        BugNotification.objects.filter(created_at__lte=cutoff).values_list('recipient_id', flat=True)
+    ))
+    connection = get_connection()
+    batch_size = settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    return sum(
+        send_digest_batch(recipient_ids[start:start + batch_size], connection)
+        for start in range(0, len(recipient_ids), batch_size)
+    )
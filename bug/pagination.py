@@ -0,0 +1,188 @@
+# pagination.py for bug app
+
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on every column of a unique ordering.
+
+    DRF's CursorPagination only filters on the first ordering field and uses
+    an OFFSET to step over ties. The cursor here carries the full ordering
+    tuple instead, so every page is one range scan on the matching composite
+    index, no matter how deep the client has paged.
+    """
+    ordering = ('-report_date', '-bug_id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page([instance async for instance in page_queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Return the unevaluated query for the requested page (plus one row)."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, self.cursor.position
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(current_position, queryset.model, reverse))
+
+        # Fetch one extra row to find out whether another page follows.
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, self.cursor.position
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        # Always end on the primary key so the keyset is unique, whatever
+        # ordering the client picked through OrderingFilter.
+        ordering = super().get_ordering(request, queryset, view)
+        pk_name = queryset.model._meta.pk.name
+        if ordering[-1].lstrip('-') not in (pk_name, 'pk'):
+            direction = '-' if ordering[-1].startswith('-') else ''
+            ordering += (direction + pk_name,)
+        return ordering
+
+    def get_keyset_filter(self, position, model, reverse=False):
+        """
+        Return a Q selecting the rows strictly after `position` in the
+        (possibly reversed) ordering, e.g. for ('-report_date', '-bug_id'):
+
+            report_date <= d AND (report_date < d OR (report_date = d AND bug_id < id))
+
+        The leading bound lets the planner turn the predicate into an index range.
+        """
+        values = self.decode_position(position, model)
+
+        lookups = []
+        for order in self.ordering:
+            descending = order.startswith('-')
+            lookups.append((order.lstrip('-'), 'lt' if descending != reverse else 'gt'))
+
+        keyset = Q()
+        for index, (field, lookup) in enumerate(lookups):
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for prior_index in range(index):
+                step &= Q(**{lookups[prior_index][0]: values[prior_index]})
+            keyset |= step
+
+        first_field, first_lookup = lookups[0]
+        return Q(**{f'{first_field}__{first_lookup}e': values[0]}) & keyset
+
+    def decode_position(self, position, model):
+        """
+        Return the ordering values of `position`, each parsed by its model
+        field, so a tampered cursor is a 404 rather than a database error.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError('Cursor position does not match the ordering.')
+            fields = [model._meta.get_field(order.lstrip('-')) for order in self.ordering]
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+            if None in values:
+                raise ValueError('Cursor position holds a null value.')
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            values.append(str(attr))
+        return json.dumps(values, separators=(',', ':'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.next_position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.previous_position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+
+class ImportErrorCursorPagination(CursorPagination):
+    # Rows are numbered in file order and are unique within a job, so each
+    # page is a range scan on the (job, row) index.
+    ordering = 'row'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -1,23 +1,74 @@
 # serializers.py for bug app (updated)
 
+import os
+
 from rest_framework import serializers
-from .models import Bug
+from django.core.files.storage import default_storage
+from django.utils.encoding import smart_str
+from bug_report.instrumentation import TimedSerializerMixin
+from .models import Bug, BugImportError, BugImportJob
+from .thumbnails import thumbnail_name
+from project.models import Project
 from django.contrib.auth import get_user_model
 
 
-class BugSerializer(serializers.ModelSerializer):
+class PrefetchedUsernameField(serializers.SlugRelatedField):
+    """
+    Looks the username up in `context['users_by_username']` when the caller
+    prefetched it (bulk requests) instead of running one query per item.
+    """
+    def to_internal_value(self, data):
+        users = self.context.get('users_by_username')
+        if users is None:
+            return super().to_internal_value(data)
+        try:
+            return users[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field, value=smart_str(data))
+
+
+class PrefetchedProjectField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks the project up in `context['projects_by_id']` when the caller
+    prefetched it (bulk requests) instead of running one query per item.
+    """
+    def to_internal_value(self, data):
+        projects = self.context.get('projects_by_id')
+        if projects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return projects[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BugSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
-    assigned_to = serializers.SlugRelatedField(slug_field='username', queryset=get_user_model().objects.all(), required=False)
+    assigned_to = PrefetchedUsernameField(slug_field='username', queryset=get_user_model().objects.all(), required=False)
+    project = PrefetchedProjectField(queryset=Project.objects.all())
+    image_thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Bug
-        fields = '__all__'
+        exclude = ['search_vector']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if hasattr(self, 'initial_data'):
             project_id = self.initial_data.get('project_id')
 
+    def get_image_thumbnail(self, obj):
+        # Rendered in the background after the upload; may 404 briefly.
+        if not obj.image:
+            return None
+        url = default_storage.url(thumbnail_name(obj.image.name))
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
     """def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         project_id = self.initial_data.get('project_id')
@@ -25,3 +76,54 @@ class BugSerializer(serializers.ModelSerializer):
             self.fields['assigned_to'].queryset = get_user_model().objects.filter(
                 id__in=ProjectUser.objects.filter(project_id=project_id).values_list('user_id', flat=True)
             )"""
+
+
+class BugStatusTransitionSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Bug.STATUS_CHOICES)
+    version = serializers.IntegerField(min_value=0, required=False)
+
+
+class BugImportJobSerializer(serializers.ModelSerializer):
+    """
+    Upload a file to import with `file`; `file_format` defaults to the one
+    its extension names. The remaining fields report the job's progress.
+    """
+    EXTENSION_FORMATS = {
+        '.csv': 'csv',
+        '.json': 'json',
+        '.jsonl': 'json',
+        '.ndjson': 'json',
+    }
+
+    created_by = serializers.ReadOnlyField(source='created_by.username')
+
+    class Meta:
+        model = BugImportJob
+        fields = [
+            'id', 'file', 'file_format', 'status', 'processed_rows', 'imported_rows', 'failed_rows', 'error',
+            'created_by', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'status', 'processed_rows', 'imported_rows', 'failed_rows', 'error', 'created_at', 'started_at',
+            'finished_at',
+        ]
+        extra_kwargs = {
+            'file': {'write_only': True, 'required': True},
+            'file_format': {'required': False},
+        }
+
+    def validate(self, attrs):
+        if not attrs.get('file_format'):
+            extension = os.path.splitext(attrs['file'].name)[1].lower()
+            if extension not in self.EXTENSION_FORMATS:
+                raise serializers.ValidationError({
+                    'file_format': ['Could not tell the format from the file name; pass csv or json.'],
+                })
+            attrs['file_format'] = self.EXTENSION_FORMATS[extension]
+        return attrs
+
+
+class BugImportErrorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BugImportError
+        fields = ['row', 'errors']
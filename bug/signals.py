@@ -0,0 +1,32 @@
+# signals.py for bug app
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Bug
+
+# Sent after bugs are created, changed or deleted, including by the bulk
+# endpoints that bypass Model.save(). `changes` is a list of (before, after)
+# pairs of Bug.snapshot() dicts; `before` is None for a create and `after`
+# is None for a delete. `actor_id` is the user who made the change, when
+# known; saves take it from the bug's `_changed_by_id`, set by the views,
+# and a new bug defaults to its creator. Deletes also pass `origin`, the
+# instance or queryset whose delete() removed the bugs (post_delete's origin).
+bugs_changed = Signal()
+
+
+@receiver(post_save, sender=Bug)
+def announce_saved_bug(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Bug.save() reads the stored row before updating it.
+    before = None if created else instance._loaded_snapshot
+    after = instance.snapshot()
+    instance._loaded_snapshot = after
+    actor_id = getattr(instance, '_changed_by_id', None) or (instance.created_by_id if created else None)
+    bugs_changed.send(sender=Bug, changes=[(before, after)], actor_id=actor_id)
+
+
+@receiver(post_delete, sender=Bug)
+def announce_deleted_bug(sender, instance, **kwargs):
+    before = getattr(instance, '_loaded_snapshot', None) or instance.snapshot()
+    bugs_changed.send(sender=Bug, changes=[(before, None)], origin=kwargs.get('origin'))
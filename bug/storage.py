@@ -0,0 +1,62 @@
+# storage.py for bug app
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """
+    Stores each file as <upload dir>/<aa>/<sha256><ext>, so identical uploads
+    share one file on disk. Files are never overwritten or removed by a bug
+    change, since other bugs may point at the same content.
+    """
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        digest = getattr(content, 'sha256', None) or self.hash_content(content)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + extension)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+    def hash_content(self, content):
+        hasher = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        content.seek(0)
+        return hasher.hexdigest()
+
+
+def bug_image_storage():
+    return ContentHashStorage()
+
+
+@deconstructible
+class PrivateStorage(FileSystemStorage):
+    """
+    Files under PRIVATE_STORAGE_ROOT, which lies outside MEDIA_ROOT and has
+    no URL: nothing stored here is served by bug_report.media.
+    """
+
+    @property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.PRIVATE_STORAGE_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError('Private files have no URL.')
+
+
+def private_storage():
+    return PrivateStorage()
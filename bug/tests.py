@@ -0,0 +1,1457 @@
+import asyncio
+import base64
+import csv
+import json
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework import status
+from PIL import Image
+from project.models import Project
+from .models import Bug, BugDailyMetric, BugHistory, BugImportJob, BugNotification, BugWorkload
+from .imports import ROW_PARSERS, import_batch, iter_json_rows, run_import
+from .notifications import send_digests
+from .serializers import BugSerializer
+from .events import InMemoryEventBroker, event_for_change, event_stream, get_broker
+from .thumbnails import generate_thumbnail, thumbnail_name
+
+User = get_user_model()
+
+
+class BugTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+
+        self.reporter = User.objects.create_user(
+            username='reporter',
+            email='reporter@example.com',
+            password='password123',
+            role='tester',
+            dept='tester'
+        )
+        self.developer = User.objects.create_user(
+            username='developer',
+            email='developer@example.com',
+            password='password123',
+            role='developer',
+            dept='python'
+        )
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='manager',
+            dept='management',
+            is_staff=True
+        )
+        self.project = Project.objects.create(
+            project_name='Tracker',
+            project_duration=30,
+            client_name='ACME',
+            submission_date=timezone.now().date()
+        )
+        self.project.users.add(self.reporter, self.developer)
+
+    def create_bug(self, **kwargs):
+        data = {
+            'bug_type': 'bug',
+            'created_by': self.reporter,
+            'assigned_to': self.developer,
+            'bug_description': 'Something is broken',
+            'project': self.project,
+            'bug_priority': 'medium',
+            'bug_severity': 'normal',
+            'status': 'open',
+        }
+        data.update(kwargs)
+        return Bug.objects.create(**data)
+
+
+class BugPaginationTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.bugs = [self.create_bug(bug_description=f'Bug {i}') for i in range(7)]
+        # Force ties on report_date so the bug_id tiebreaker has to do the work.
+        Bug.objects.filter(pk__in=[b.pk for b in self.bugs[2:5]]).update(report_date=self.bugs[2].report_date)
+        self.client.force_authenticate(user=self.admin_user)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(bug['bug_id'] for bug in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_list_is_paginated(self):
+        response = self.client.get('/api/bugs/?page_size=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_cursor_walk_returns_every_bug_once_in_order(self):
+        expected = list(Bug.objects.order_by('-report_date', '-bug_id').values_list('bug_id', flat=True))
+        self.assertEqual(self.walk('/api/bugs/?page_size=2'), expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get('/api/bugs/?page_size=3')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [bug['bug_id'] for bug in back.data['results']],
+            [bug['bug_id'] for bug in first.data['results']]
+        )
+
+    def test_cursor_is_stable_under_inserts(self):
+        first = self.client.get('/api/bugs/?page_size=3')
+        self.create_bug(bug_description='Filed while paging')
+        second = self.client.get(first.data['next'])
+        expected = list(Bug.objects.order_by('-report_date', '-bug_id').values_list('bug_id', flat=True))
+        # The new bug sorts first, so the second page must not shift onto it.
+        self.assertEqual([bug['bug_id'] for bug in second.data['results']], expected[4:7])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/bugs/?cursor=cD1nYXJiYWdl')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_positions(self):
+        for position in (['x', 'y'], ['2020-01-01', 'abc'], [None, None], ['2020-01-01'], {'a': 1}, [[1], 2]):
+            cursor = base64.b64encode(urlencode({'p': json.dumps(position)}).encode()).decode()
+            response = self.client.get('/api/bugs/', {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+
+class BugQueryCountTests(BugTestMixin, TestCase):
+    """
+    The bug endpoints must cost the same number of queries whether they
+    return one row or a full page.
+    """
+
+    def count_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, user, url):
+        self.client.force_authenticate(user=user)
+        self.create_bug()
+        single = self.count_queries('get', url)
+        for i in range(20):
+            other = self.admin_user if i % 2 else self.developer
+            self.create_bug(created_by=self.reporter, assigned_to=other)
+        many = self.count_queries('get', url)
+        self.assertEqual(single, many)
+        return many
+
+    # Each GET is the ETag fingerprint aggregate plus the page or row itself.
+    def test_list_as_staff(self):
+        self.assertEqual(self.assertConstantQueries(self.admin_user, '/api/bugs/'), 2)
+
+    def test_list_as_reporter(self):
+        self.assertEqual(self.assertConstantQueries(self.reporter, '/api/bugs/'), 2)
+
+    def test_list_as_assignee(self):
+        self.assertEqual(self.assertConstantQueries(self.developer, '/api/bugs/'), 2)
+
+    def test_detail(self):
+        bug = self.create_bug()
+        self.client.force_authenticate(user=self.reporter)
+        self.assertEqual(self.count_queries('get', f'/api/bugs/{bug.pk}/'), 2)
+
+    def test_status_update(self):
+        bug = self.create_bug()
+        self.client.force_authenticate(user=self.reporter)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(f'/api/bugs/{bug.pk}/status/', {'status': 'closed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]
+        # The locked read of the previous row and its UPDATE, then one UPDATE
+        # per metric table.
+        self.assertEqual(len(statements), 4)
+        self.assertTrue(statements[0].startswith('SELECT'))
+        self.assertTrue(statements[1].startswith('UPDATE "bug_bug"'))
+        self.assertTrue(statements[2].startswith('UPDATE "bug_bugdailymetric"'))
+        self.assertTrue(statements[3].startswith('UPDATE "bug_bugworkload"'))
+
+
+class BugStatusTransitionTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.bug = self.create_bug()
+        self.client.force_authenticate(user=self.reporter)
+        self.url = f'/api/bugs/{self.bug.pk}/status/'
+
+    def test_transition_bumps_version(self):
+        response = self.client.patch(self.url, {'status': 'in_progress', 'version': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['status'], response.data['version']), ('in_progress', 1))
+        self.bug.refresh_from_db()
+        self.assertEqual((self.bug.status, self.bug.version), ('in_progress', 1))
+        self.assertEqual(self.bug.updated_date, response.data['updated_date'])
+
+        response = self.client.patch(self.url, {'status': 'closed'}, format='json')
+        self.assertEqual(response.data['version'], 2)
+
+    def test_stale_version_conflicts(self):
+        self.client.patch(self.url, {'status': 'in_progress', 'version': 0}, format='json')
+        response = self.client.patch(self.url, {'status': 'closed', 'version': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['version'], 1)
+        self.bug.refresh_from_db()
+        self.assertEqual(self.bug.status, 'in_progress')
+
+    def test_only_status_columns_are_written(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch(self.url, {'status': 'closed', 'version': 0}, format='json')
+        statements = [query['sql'] for query in context.captured_queries]
+        update, = [sql for sql in statements if sql.startswith('UPDATE "bug_bug" ')]
+        assignments = update.split(' SET ', 1)[1].split(' WHERE ', 1)[0]
+        self.assertEqual(assignments.count(' = '), 3)
+        for column in ('"status"', '"updated_date"', '"version"'):
+            self.assertIn(column, assignments)
+        # The permission check is part of the locked read of the row.
+        read = statements[statements.index(update) - 1]
+        self.assertIn('"created_by_id" = ', read.split(' WHERE ', 1)[1])
+
+    def test_permission_and_missing_bug(self):
+        self.client.force_authenticate(user=self.developer)
+        self.assertEqual(self.client.patch(self.url, {'status': 'closed'}).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertEqual(self.client.patch('/api/bugs/999999/status/', {'status': 'closed'}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        response = self.client.patch(self.url, {'status': 'done'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.bug.refresh_from_db()
+        self.assertEqual((self.bug.status, self.bug.version), ('open', 0))
+
+    def test_other_writes_bump_version(self):
+        self.client.patch(f'/api/bugs/{self.bug.pk}/', {'bug_description': 'Edited'}, format='json')
+        self.client.patch('/api/bugs/bulk/', [{'bug_id': self.bug.pk, 'bug_priority': 'high'}], format='json')
+        self.client.patch('/api/bugs/bulk/status/', [{'bug_id': self.bug.pk, 'status': 'closed'}], format='json')
+        self.bug.refresh_from_db()
+        self.assertEqual(self.bug.version, 3)
+        response = self.client.patch(self.url, {'status': 'open', 'version': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def transition_during_validation(self):
+        # Closes the bug after the view under test loaded it, as a concurrent
+        # transition committing in between would.
+        validate = BugSerializer.validate
+
+        def validate_after_transition(serializer, attrs):
+            self.client.patch(self.url, {'status': 'closed'}, format='json')
+            return validate(serializer, attrs)
+        return mock.patch.object(BugSerializer, 'validate', validate_after_transition)
+
+    def test_stale_detail_patch_conflicts_with_a_transition(self):
+        with self.transition_during_validation():
+            response = self.client.patch(
+                f'/api/bugs/{self.bug.pk}/', {'status': 'open', 'bug_description': 'Stale'}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['version'], 1)
+        self.bug.refresh_from_db()
+        self.assertEqual((self.bug.status, self.bug.version), ('closed', 1))
+        self.assertNotEqual(self.bug.bug_description, 'Stale')
+
+        response = self.client.patch(self.url, {'status': 'open', 'version': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 2)
+
+    def test_stale_bulk_patch_item_conflicts(self):
+        with self.transition_during_validation():
+            response = self.client.patch('/api/bugs/bulk/', [{'bug_id': self.bug.pk, 'status': 'open'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [
+            {'index': 0, 'errors': {'detail': 'The bug was changed by someone else.', 'version': 1}}
+        ])
+        self.bug.refresh_from_db()
+        self.assertEqual((self.bug.status, self.bug.version), ('closed', 1))
+
+
+class BugHistoryTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.reporter)
+
+    def write(self, method, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300)
+        return response
+
+    def history(self, **filters):
+        return list(BugHistory.objects.filter(**filters).order_by('id').values('action', 'changes', 'actor_id'))
+
+    def export(self, **params):
+        response = self.client.get('/api/bugs/history/', params)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_create_update_and_status_paths(self):
+        bug_id = self.write('post', '/api/bugs/', {
+            'bug_type': 'bug', 'bug_description': 'Broken', 'project': self.project.pk,
+            'bug_priority': 'low', 'bug_severity': 'minor', 'status': 'open',
+        }).data['bug_id']
+        self.write('patch', f'/api/bugs/{bug_id}/', {'bug_priority': 'high', 'bug_description': 'Broken'})
+        self.write('patch', f'/api/bugs/{bug_id}/status/', {'status': 'closed'})
+        self.write('patch', f'/api/bugs/{bug_id}/status/', {'status': 'closed'})
+
+        created, updated, closed = self.history(bug_id=bug_id)
+        self.assertEqual(created['action'], 'created')
+        self.assertEqual(created['changes']['bug_description'], [None, 'Broken'])
+        self.assertNotIn('assigned_to_id', created['changes'])
+        self.assertEqual(updated, {
+            'action': 'updated', 'changes': {'bug_priority': ['low', 'high']}, 'actor_id': self.reporter.pk,
+        })
+        self.assertEqual(closed['action'], 'status_changed')
+        self.assertEqual(closed['changes'], {'status': ['open', 'closed']})
+
+    def test_bulk_paths_insert_once_per_write(self):
+        items = [
+            {'bug_type': 'bug', 'bug_description': f'Bug {i}', 'project': self.project.pk,
+             'bug_priority': 'low', 'bug_severity': 'minor', 'status': 'open'}
+            for i in range(3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            bug_ids = [bug['bug_id'] for bug in self.write('post', '/api/bugs/bulk/', items).data['results']]
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "bug_bughistory"')]
+        self.assertEqual(len(inserts), 1)
+
+        self.write('patch', '/api/bugs/bulk/', [{'bug_id': bug_ids[0], 'assigned_to': 'developer'}])
+        self.write('patch', '/api/bugs/bulk/status/', [{'bug_id': bug_id, 'status': 'in_progress'} for bug_id in bug_ids])
+        self.assertEqual(
+            [entry['changes'] for entry in self.history(bug_id=bug_ids[0])[1:]],
+            [{'assigned_to_id': [None, self.developer.pk]}, {'status': ['open', 'in_progress']}],
+        )
+        self.assertEqual(BugHistory.objects.filter(action='status_changed').count(), 3)
+
+    def test_nothing_is_written_before_commit(self):
+        bug = self.create_bug()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(f'/api/bugs/{bug.pk}/status/', {'status': 'closed'})
+        self.assertFalse(BugHistory.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(BugHistory.objects.get().changes, {'status': ['open', 'closed']})
+
+    def test_export_by_bug_and_project(self):
+        bug = self.create_bug()
+        other = self.create_bug(created_by=self.admin_user, assigned_to=None)
+        for target, new_status in ((bug, 'in_progress'), (other, 'closed'), (bug, 'closed')):
+            self.client.force_authenticate(user=target.created_by)
+            self.write('patch', f'/api/bugs/{target.pk}/status/', {'status': new_status})
+
+        self.client.force_authenticate(user=self.reporter)
+        lines = self.export(bug=bug.pk)
+        self.assertEqual([line['changes']['status'] for line in lines], [['open', 'in_progress'], ['in_progress', 'closed']])
+        self.assertEqual(set(lines[0]), {'id', 'bug_id', 'project_id', 'actor_id', 'changed_at', 'action', 'changes'})
+        # The reporter cannot see the admin's bug.
+        self.assertEqual(len(self.export(project=self.project.pk)), 2)
+        self.assertEqual(self.export(bug=other.pk), [])
+
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertEqual(len(self.export(project=self.project.pk)), 3)
+        BugHistory.objects.filter(pk=lines[0]['id']).update(changed_at=timezone.now() - timedelta(days=10))
+        self.assertEqual(len(self.export(project=self.project.pk, since=str(timezone.localdate() - timedelta(days=1)))), 2)
+        until = (timezone.now() - timedelta(days=5)).isoformat()
+        self.assertEqual([line['id'] for line in self.export(project=self.project.pk, until=until)], [lines[0]['id']])
+
+        self.assertEqual(self.client.get('/api/bugs/history/').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/bugs/history/', {'bug': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get('/api/bugs/history/', {'bug': bug.pk, 'since': 'yesterday'}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class BugVisibilityTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.outsider = User.objects.create_user(
+            username='outsider',
+            email='outsider@example.com',
+            password='password123',
+            role='developer',
+            dept='java'
+        )
+        self.reported = self.create_bug(assigned_to=None)
+        self.assigned = self.create_bug(created_by=self.outsider, assigned_to=self.developer)
+        self.unrelated = self.create_bug(created_by=self.outsider, assigned_to=self.outsider)
+
+    def visible_ids(self, user):
+        return set(Bug.objects.visible_to(user).values_list('bug_id', flat=True))
+
+    def test_creator_and_assignee_visibility(self):
+        self.assertEqual(self.visible_ids(self.reporter), {self.reported.pk})
+        self.assertEqual(self.visible_ids(self.developer), {self.assigned.pk})
+        self.assertEqual(self.visible_ids(self.outsider), {self.assigned.pk, self.unrelated.pk})
+
+    def test_staff_sees_everything(self):
+        self.assertEqual(self.visible_ids(self.admin_user), set(Bug.objects.values_list('bug_id', flat=True)))
+
+    def test_detail_hidden_from_other_users(self):
+        self.client.force_authenticate(user=self.developer)
+        response = self.client.get(f'/api/bugs/{self.reported.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BugFilterTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_bug = self.create_bug(bug_description='Login button does nothing', bug_priority='high')
+        self.crash_bug = self.create_bug(bug_description='App crashes on save', status='closed', bug_severity='critical')
+        self.other_project = Project.objects.create(
+            project_name='Website',
+            project_duration=10,
+            client_name='ACME',
+            submission_date=timezone.now().date()
+        )
+        self.website_bug = self.create_bug(project=self.other_project, status='in_progress')
+        self.client.force_authenticate(user=self.admin_user)
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/bugs/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [bug['bug_id'] for bug in response.data['results']]
+
+    def test_filter_by_choices(self):
+        self.assertEqual(self.get_ids('status=closed'), [self.crash_bug.pk])
+        self.assertEqual(self.get_ids('bug_priority=high'), [self.login_bug.pk])
+        self.assertEqual(self.get_ids('bug_severity=critical'), [self.crash_bug.pk])
+        self.assertEqual(
+            set(self.get_ids('status=closed,in_progress')),
+            {self.crash_bug.pk, self.website_bug.pk}
+        )
+
+    def test_filter_by_project(self):
+        self.assertEqual(self.get_ids(f'project={self.other_project.pk}'), [self.website_bug.pk])
+
+    def test_invalid_filter_values(self):
+        response = self.client.get('/api/bugs/?status=broken&project=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+        self.assertIn('project', response.data)
+
+    def test_search_description(self):
+        self.assertEqual(self.get_ids('search=crashes'), [self.crash_bug.pk])
+
+    def test_ordering_keeps_keyset_pagination(self):
+        self.login_bug.save()
+        response = self.client.get('/api/bugs/?ordering=-updated_date&page_size=2')
+        self.assertEqual(response.data['results'][0]['bug_id'], self.login_bug.pk)
+        second = self.client.get(response.data['next'])
+        ids = [bug['bug_id'] for bug in response.data['results'] + second.data['results']]
+        self.assertEqual(sorted(ids), sorted([self.login_bug.pk, self.crash_bug.pk, self.website_bug.pk]))
+
+    def test_search_vector_not_exposed(self):
+        response = self.client.get(f'/api/bugs/{self.login_bug.pk}/')
+        self.assertNotIn('search_vector', response.data)
+
+
+class BugExportTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.open_bug = self.create_bug(bug_description='Crash, "badly"\non save')
+        self.closed_bug = self.create_bug(status='closed', assigned_to=None)
+        self.hidden_bug = self.create_bug(created_by=self.admin_user, assigned_to=self.admin_user)
+        self.client.force_authenticate(user=self.reporter)
+
+    def export(self, query=''):
+        response = self.client.get(f'/api/bugs/export/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="bugs.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([int(row['bug_id']) for row in rows], [self.closed_bug.pk, self.open_bug.pk])
+        self.assertEqual(rows[1]['bug_description'], 'Crash, "badly"\non save')
+        self.assertEqual(rows[1]['created_by'], 'reporter')
+        self.assertEqual(rows[0]['assigned_to'], '')
+        self.assertEqual(rows[0]['project'], str(self.project.pk))
+
+    def test_ndjson_export_uses_list_filters(self):
+        response, content = self.export('as=ndjson&status=open')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['bug_id'] for row in rows], [self.open_bug.pk])
+        self.assertEqual(rows[0]['assigned_to'], 'developer')
+        self.assertEqual(rows[0]['report_date'][:10], self.open_bug.report_date.date().isoformat())
+
+        response = self.client.get('/api/bugs/export/?status=broken')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/bugs/export/?as=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_rows_are_read_with_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            _, content = self.export('as=ndjson')
+        self.assertEqual(len(content.splitlines()), 2)
+        self.assertEqual(len([query for query in context.captured_queries if 'bug_bug' in query['sql']]), 1)
+
+
+class BugBulkTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.reporter)
+
+    def bug_payload(self, **kwargs):
+        data = {
+            'bug_type': 'bug',
+            'bug_description': 'Filed by automation',
+            'project': self.project.pk,
+            'assigned_to': 'developer',
+            'bug_priority': 'low',
+            'bug_severity': 'minor',
+            'status': 'open',
+        }
+        data.update(kwargs)
+        return data
+
+    def test_bulk_create(self):
+        payload = [self.bug_payload(bug_description=f'Automated {i}') for i in range(5)]
+        response = self.client.post('/api/bugs/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Bug.objects.filter(created_by=self.reporter).count(), 5)
+        self.assertEqual(response.data['results'][0]['assigned_to'], 'developer')
+
+    def test_bulk_create_query_count_is_constant(self):
+        # The first bug of the day also inserts its two metric rows.
+        with CaptureQueriesContext(connection) as first:
+            self.client.post('/api/bugs/bulk/', [self.bug_payload()], format='json')
+        self.assertEqual(len(first.captured_queries), 9)
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/bugs/bulk/', [self.bug_payload()], format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post('/api/bugs/bulk/', [self.bug_payload() for _ in range(30)], format='json')
+        # User and project lookups, then one INSERT and one UPDATE per
+        # metric table inside a savepoint.
+        self.assertEqual(len(small.captured_queries), 7)
+        self.assertEqual(len(large.captured_queries), 7)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        payload = [
+            self.bug_payload(),
+            self.bug_payload(assigned_to='nobody'),
+            self.bug_payload(project=999),
+            self.bug_payload(status='broken'),
+        ]
+        response = self.client.post('/api/bugs/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertIn('assigned_to', response.data['errors'][0]['errors'])
+        self.assertIn('project', response.data['errors'][1]['errors'])
+        self.assertEqual(Bug.objects.count(), 1)
+
+    def test_bulk_create_all_invalid(self):
+        response = self.client.post('/api/bugs/bulk/', [self.bug_payload(project=None)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_requires_a_list(self):
+        response = self.client.post('/api/bugs/bulk/', self.bug_payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        bugs = [self.create_bug() for _ in range(3)]
+        hidden = self.create_bug(created_by=self.admin_user, assigned_to=None)
+        payload = [
+            {'bug_id': bugs[0].pk, 'bug_priority': 'high'},
+            {'bug_id': bugs[1].pk, 'assigned_to': 'admin'},
+            {'bug_id': hidden.pk, 'bug_priority': 'high'},
+            {'bug_id': bugs[0].pk, 'bug_priority': 'low'},
+        ]
+        response = self.client.patch('/api/bugs/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2, 3])
+        bugs[0].refresh_from_db()
+        bugs[1].refresh_from_db()
+        self.assertEqual(bugs[0].bug_priority, 'high')
+        self.assertEqual(bugs[1].assigned_to, self.admin_user)
+        self.assertGreater(bugs[0].updated_date, bugs[2].updated_date)
+
+    def test_bulk_status_update(self):
+        mine = [self.create_bug() for _ in range(3)]
+        theirs = self.create_bug(created_by=self.developer)
+        payload = [
+            {'bug_id': mine[0].pk, 'status': 'closed'},
+            {'bug_id': mine[1].pk, 'status': 'closed'},
+            {'bug_id': mine[2].pk, 'status': 'in_progress'},
+            {'bug_id': theirs.pk, 'status': 'closed'},
+            {'bug_id': 'abc', 'status': 'closed'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/api/bugs/bulk/status/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([error['index'] for error in response.data['errors']], [3, 4])
+        self.assertEqual(
+            sorted(Bug.objects.filter(created_by=self.reporter).values_list('status', flat=True)),
+            ['closed', 'closed', 'in_progress']
+        )
+        self.assertEqual(Bug.objects.get(pk=theirs.pk).status, 'open')
+        # Ownership lookup, then one UPDATE per target status and one per
+        # metric table inside a savepoint.
+        self.assertEqual(len(queries.captured_queries), 7)
+
+
+class BugImportTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.private_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.private_root)
+        storage = override_settings(MEDIA_ROOT=self.media_root, PRIVATE_STORAGE_ROOT=self.private_root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.client.force_authenticate(user=self.admin_user)
+
+    def upload(self, content, name):
+        with mock.patch.object(run_import, 'delay') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/bugs/imports/', {
+                    'file': SimpleUploadedFile(name, content.encode()),
+                }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        schedule.assert_called_once_with(response.data['id'])
+        return response.data['id']
+
+    def run_job(self, job_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            run_import(job_id)
+        return self.client.get(f'/api/bugs/imports/{job_id}/').data
+
+    def test_csv_import_in_batches(self):
+        content = (
+            'bug_type,bug_description,project,assigned_to,created_by,bug_priority,bug_severity,status\n'
+            'bug,"First, with a comma",Tracker,developer,,low,minor,open\n'
+            'error,Second,Tracker,,developer,high,critical,closed\n'
+            'bug,Third,Nowhere,,,low,minor,open\n'
+            'bug,Fourth,Tracker,ghost,,low,minor,sideways\n'
+            'issue,Fifth,Tracker,,,medium,normal,in_progress\n'
+        )
+        job_id = self.upload(content, 'bugs.csv')
+        with override_settings(BUG_IMPORT_BATCH_SIZE=2), CaptureQueriesContext(connection) as context:
+            job = self.run_job(job_id)
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['file_format'], 'csv')
+        self.assertEqual((job['processed_rows'], job['imported_rows'], job['failed_rows']), (5, 3, 2))
+
+        bugs = Bug.objects.order_by('bug_id')
+        self.assertEqual([bug.bug_description for bug in bugs], ['First, with a comma', 'Second', 'Fifth'])
+        self.assertEqual(bugs[0].assigned_to, self.developer)
+        self.assertEqual(bugs[0].created_by, self.admin_user)
+        self.assertEqual(bugs[1].created_by, self.developer)
+        self.assertEqual(BugHistory.objects.filter(action='created').count(), 3)
+        self.assertEqual(BugWorkload.objects.aggregate(total=Sum('open_count'))['total'], 1)
+
+        # One INSERT per batch with valid rows, and every name looked up once.
+        inserts = [query for query in context.captured_queries if query['sql'].startswith('INSERT INTO "bug_bug"')]
+        self.assertEqual(len(inserts), 2)
+        project_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "project_project"' in query['sql']
+        ]
+        self.assertEqual(len(project_lookups), 2)
+
+        errors = self.client.get(f'/api/bugs/imports/{job_id}/errors/').data['results']
+        self.assertEqual([error['row'] for error in errors], [3, 4])
+        self.assertIn('No project is named "Nowhere".', errors[0]['errors']['project'])
+        self.assertEqual(set(errors[1]['errors']), {'assigned_to', 'status'})
+
+    def test_json_import(self):
+        rows = [
+            {'bug_type': 'bug', 'bug_description': f'Bug {i}', 'project': 'Tracker',
+             'bug_priority': 'low', 'bug_severity': 'minor', 'status': 'open'}
+            for i in range(3)
+        ]
+        job_id = self.upload(json.dumps(rows + ['not an object']), 'bugs.json')
+        with mock.patch.dict(ROW_PARSERS, json=lambda file: iter_json_rows(file, chunk_size=7)):
+            job = self.run_job(job_id)
+        self.assertEqual((job['status'], job['imported_rows'], job['failed_rows']), ('completed', 3, 1))
+
+        ndjson = '\n'.join(json.dumps(row) for row in rows[:2]) + '\n{"bug_type": '
+        job_id = self.upload(ndjson, 'bugs.ndjson')
+        # Batches are all or nothing, so with batches of one row the rows
+        # before the broken one are kept.
+        with override_settings(BUG_IMPORT_BATCH_SIZE=1):
+            job = self.run_job(job_id)
+        self.assertEqual((job['status'], job['imported_rows']), ('failed', 2))
+        self.assertIn('after row 2', job['error'])
+
+    def test_upload_validation_and_permissions(self):
+        response = self.client.post('/api/bugs/imports/', {'file_format': 'csv'}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', response.data)
+
+        response = self.client.post('/api/bugs/imports/', {
+            'file': SimpleUploadedFile('bugs.txt', b'bug_type\n'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file_format', response.data)
+
+        self.client.force_authenticate(user=self.reporter)
+        response = self.client.post('/api/bugs/imports/', {
+            'file': SimpleUploadedFile('bugs.csv', b'bug_type\n'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_upload_is_private_and_deleted_when_done(self):
+        job_id = self.upload('bug_type,bug_description,project,bug_priority,bug_severity,status\n', 'bugs.csv')
+        name = BugImportJob.objects.get(pk=job_id).file.name
+        self.assertTrue(os.path.isfile(os.path.join(self.private_root, name)))
+        self.assertEqual(os.listdir(self.media_root), [])
+        self.assertEqual(self.client.get(f'/media/{name}').status_code, status.HTTP_404_NOT_FOUND)
+
+        self.run_job(job_id)
+        self.assertFalse(os.path.exists(os.path.join(self.private_root, name)))
+        self.assertEqual(BugImportJob.objects.get(pk=job_id).file.name, '')
+
+    def test_resume_interrupted_imports(self):
+        content = 'bug_type,bug_description,project,bug_priority,bug_severity,status\n' + ''.join(
+            f'bug,Bug {i},Tracker,low,minor,open\n' for i in range(4)
+        )
+        failed_id = self.upload(content, 'failed.csv')
+        stalled_id = self.upload(content, 'stalled.csv')
+        busy_id = self.upload(content, 'busy.csv')
+
+        # An unexpected error on the second batch keeps the upload.
+        batches = []
+
+        def fail_on_second_batch(*args):
+            batches.append(args)
+            if len(batches) == 2:
+                raise RuntimeError
+            return import_batch(*args)
+
+        with override_settings(BUG_IMPORT_BATCH_SIZE=2), self.assertLogs('bug.imports'), \
+                mock.patch('bug.imports.import_batch', fail_on_second_batch):
+            job = self.run_job(failed_id)
+        self.assertEqual((job['status'], job['imported_rows']), ('failed', 2))
+        self.assertNotEqual(BugImportJob.objects.get(pk=failed_id).file.name, '')
+
+        # A restart left one job running after its first row; another
+        # running job is still making progress.
+        long_ago = timezone.now() - timedelta(hours=1)
+        self.create_bug()
+        BugImportJob.objects.filter(pk=stalled_id).update(
+            status='running', processed_rows=1, imported_rows=1, started_at=long_ago, updated_at=long_ago,
+        )
+        BugImportJob.objects.filter(pk=busy_id).update(status='running', updated_at=timezone.now())
+
+        stdout = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('resume_bug_imports', stdout=stdout)
+        self.assertIn('Resumed 2 import jobs.', stdout.getvalue())
+        for job_id in (failed_id, stalled_id):
+            job = BugImportJob.objects.get(pk=job_id)
+            self.assertEqual((job.status, job.processed_rows, job.imported_rows), ('completed', 4, 4))
+            self.assertEqual((job.file.name, job.error), ('', ''))
+        self.assertEqual(BugImportJob.objects.get(pk=busy_id).status, 'running')
+        self.assertEqual(Bug.objects.count(), 8)
+
+    def test_jobs_run_once(self):
+        job_id = self.upload('bug_type,bug_description,project,bug_priority,bug_severity,status\n', 'bugs.csv')
+        self.assertEqual(self.run_job(job_id)['status'], 'completed')
+        with CaptureQueriesContext(connection) as context:
+            run_import(job_id)
+        self.assertEqual(len(context.captured_queries), 1)
+
+
+class BugMetricsTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.reporter)
+
+    def metric_state(self):
+        # Summed per key, as the metric endpoints read them: a cascade that
+        # sets an assignee to NULL can leave several rows for one key.
+        workloads = sorted(
+            BugWorkload.objects.values_list('project_id', 'assignee_id').annotate(
+                Sum('open_count'), Sum('in_progress_count'), Sum('closed_count'), Sum('time_to_close_total')
+            ).exclude(open_count__sum=0, in_progress_count__sum=0, closed_count__sum=0),
+            key=str,
+        )
+        daily = sorted(
+            BugDailyMetric.objects.values_list('day', 'project_id', 'assignee_id').annotate(
+                Sum('opened_count'), Sum('closed_count'), Sum('time_to_close_total')
+            ).exclude(opened_count__sum=0, closed_count__sum=0),
+            key=str,
+        )
+        return workloads, daily
+
+    def assertMatchesRebuild(self):
+        incremental = self.metric_state()
+        call_command('rebuild_bug_metrics', stdout=StringIO())
+        self.assertEqual(incremental, self.metric_state())
+
+    def test_deleting_a_project_with_bugs(self):
+        self.create_bug()
+        self.create_bug(status='closed')
+        other = Project.objects.create(
+            project_name='Website', project_duration=10, client_name='ACME', submission_date=timezone.now().date()
+        )
+        self.create_bug(project=other)
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.delete(f'/api/projects/{self.project.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        connection.check_constraints()
+        self.assertFalse(BugWorkload.objects.filter(project_id=self.project.pk).exists())
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_user_with_bugs(self):
+        self.create_bug(created_by=self.developer, assigned_to=self.developer)
+        self.create_bug(created_by=self.developer, assigned_to=self.reporter)
+        self.create_bug(status='closed')
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.delete(f'/api/accounts/profile/{self.developer.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        connection.check_constraints()
+        self.assertEqual(Bug.objects.count(), 1)
+        self.assertMatchesRebuild()
+
+    def test_deleting_users_with_a_queryset(self):
+        self.create_bug(created_by=self.developer, assigned_to=self.developer)
+        self.create_bug(created_by=self.developer, assigned_to=None)
+        self.create_bug(assigned_to=None)
+        self.create_bug(created_by=self.admin_user, assigned_to=self.reporter)
+
+        User.objects.filter(pk__in=[self.developer.pk, self.reporter.pk]).delete()
+        connection.check_constraints()
+        self.assertEqual(Bug.objects.count(), 1)
+        # Only the admin's bug is left, now unassigned.
+        self.assertEqual(BugWorkload.objects.filter(assignee=None).aggregate(total=Sum('open_count'))['total'], 1)
+        self.assertMatchesRebuild()
+
+    def test_single_writes_match_rebuild(self):
+        bug = self.create_bug()
+        other = self.create_bug(assigned_to=None)
+        workload = BugWorkload.objects.get(project=self.project, assignee=self.developer)
+        self.assertEqual(workload.open_count, 1)
+
+        bug.status = 'in_progress'
+        bug.save()
+        bug.status = 'closed'
+        bug.save()
+        other.assigned_to = self.admin_user
+        other.save()
+        self.assertMatchesRebuild()
+
+        Bug.objects.get(pk=bug.pk).delete()
+        self.assertMatchesRebuild()
+
+    def test_status_endpoint_updates_metrics(self):
+        bug = self.create_bug()
+        response = self.client.patch(f'/api/bugs/{bug.pk}/status/', {'status': 'closed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        workload = BugWorkload.objects.get(project=self.project, assignee=self.developer)
+        self.assertEqual((workload.open_count, workload.closed_count), (0, 1))
+        self.assertMatchesRebuild()
+
+    def test_bulk_writes_match_rebuild(self):
+        payload = [
+            {
+                'bug_type': 'bug',
+                'assigned_to': 'developer',
+                'bug_description': f'Bulk bug {i}',
+                'project': self.project.pk,
+                'bug_priority': 'low',
+                'bug_severity': 'normal',
+                'status': 'open',
+            }
+            for i in range(4)
+        ]
+        response = self.client.post('/api/bugs/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertMatchesRebuild()
+
+        bug_ids = list(Bug.objects.order_by('bug_id').values_list('bug_id', flat=True))
+        response = self.client.patch('/api/bugs/bulk/', [
+            {'bug_id': bug_ids[0], 'assigned_to': 'admin'},
+            {'bug_id': bug_ids[1], 'status': 'in_progress'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertMatchesRebuild()
+
+        response = self.client.patch('/api/bugs/bulk/status/', [
+            {'bug_id': bug_ids[0], 'status': 'closed'},
+            {'bug_id': bug_ids[2], 'status': 'closed'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertMatchesRebuild()
+        self.assertEqual(BugWorkload.objects.get(assignee=self.admin_user).closed_count, 1)
+
+    def test_workload_endpoint(self):
+        self.create_bug()
+        self.create_bug(status='in_progress')
+        self.create_bug(status='closed')
+        self.create_bug(assigned_to=None)
+
+        response = self.client.get('/api/bugs/metrics/', {'group_by': 'assignee'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = {row['assignee']: row for row in response.data}
+        self.assertEqual(set(rows), {'developer', None})
+        developer = rows['developer']
+        self.assertEqual(
+            (developer['open_count'], developer['in_progress_count'], developer['closed_count']), (1, 1, 1)
+        )
+        self.assertIsNotNone(developer['avg_time_to_close_seconds'])
+        self.assertIsNone(rows[None]['avg_time_to_close_seconds'])
+
+        response = self.client.get('/api/bugs/metrics/', {'group_by': 'project', 'assignee': 'developer'})
+        self.assertEqual(response.data, [{
+            'project': self.project.pk,
+            'open_count': 1,
+            'in_progress_count': 1,
+            'closed_count': 1,
+            'avg_time_to_close_seconds': developer['avg_time_to_close_seconds'],
+        }])
+
+        for group_by in ('status', ',', ' '):
+            response = self.client.get('/api/bugs/metrics/', {'group_by': group_by})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_daily_endpoint(self):
+        self.create_bug()
+        self.create_bug(status='closed')
+        today = timezone.localdate()
+
+        response = self.client.get('/api/bugs/metrics/daily/', {'group_by': 'project'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        row = response.data[0]
+        self.assertEqual((row['day'], row['opened_count'], row['closed_count']), (today, 2, 1))
+
+        response = self.client.get('/api/bugs/metrics/daily/', {'since': str(today + timedelta(days=1))})
+        self.assertEqual(response.data, [])
+        response = self.client.get('/api/bugs/metrics/daily/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BugImageTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_authenticate(user=self.reporter)
+
+    def image_bytes(self, size=(800, 600), noise=False):
+        image = Image.new('RGB', size, 'red')
+        if noise:
+            image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+        buffer = BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def upload(self, content, name='screenshot.png'):
+        with mock.patch.object(generate_thumbnail, 'delay'):
+            return self.client.post('/api/bugs/', {
+                'bug_type': 'bug',
+                'assigned_to': 'developer',
+                'bug_description': 'Screenshot attached',
+                'project': self.project.pk,
+                'bug_priority': 'low',
+                'bug_severity': 'minor',
+                'status': 'open',
+                'image': SimpleUploadedFile(name, content, content_type='image/png'),
+            }, format='multipart')
+
+    def test_identical_uploads_are_stored_once(self):
+        content = self.image_bytes()
+        first = self.upload(content, 'one.png')
+        second = self.upload(content, 'two.PNG')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+
+        names = list(Bug.objects.values_list('image', flat=True))
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(names, [f'bugs/{digest[:2]}/{digest}.png'] * 2)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'bugs', digest[:2])), [f'{digest}.png'])
+        self.assertTrue(first.data['image_thumbnail'].endswith(f'/media/thumbs/bugs/{digest[:2]}/{digest}.png'))
+
+    def test_large_upload_is_streamed_and_hashed(self):
+        content = self.image_bytes((400, 400), noise=True)
+        self.assertGreater(len(content), 256 * 1024)
+        response = self.upload(content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(Bug.objects.get().image.name, f'bugs/{digest[:2]}/{digest}.png')
+
+    def test_thumbnail_is_queued_after_commit(self):
+        with mock.patch.object(generate_thumbnail, 'delay') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.upload(self.image_bytes())
+        name = Bug.objects.get(pk=response.data['bug_id']).image.name
+        schedule.assert_called_once_with(name)
+
+    def test_thumbnail_is_queued_only_for_a_new_image(self):
+        response = self.upload(self.image_bytes())
+        url = f'/api/bugs/{response.data["bug_id"]}/'
+        with mock.patch.object(generate_thumbnail, 'delay') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(url, {'bug_priority': 'high'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            bug = Bug.objects.get()
+            bug.bug_severity = 'major'
+            with self.captureOnCommitCallbacks(execute=True):
+                bug.save()
+            schedule.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(url, {
+                    'image': SimpleUploadedFile('other.png', self.image_bytes((20, 20)), content_type='image/png'),
+                }, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        schedule.assert_called_once_with(Bug.objects.get().image.name)
+
+    def test_generate_thumbnail(self):
+        response = self.upload(self.image_bytes((1600, 900)))
+        name = Bug.objects.get(pk=response.data['bug_id']).image.name
+        self.assertEqual(generate_thumbnail(name), thumbnail_name(name))
+        with Image.open(os.path.join(self.media_root, thumbnail_name(name))) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 180))
+        # Already rendered: nothing to do.
+        self.assertEqual(generate_thumbnail(name), thumbnail_name(name))
+
+    def test_serve_media_with_ranges(self):
+        os.makedirs(os.path.join(self.media_root, 'bugs'))
+        with open(os.path.join(self.media_root, 'bugs', 'log.txt'), 'wb') as file:
+            file.write(b'0123456789')
+
+        response = self.client.get('/media/bugs/log.txt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        last_modified = response['Last-Modified']
+
+        response = self.client.get('/media/bugs/log.txt', HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+        response = self.client.get('/media/bugs/log.txt', HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get('/media/bugs/log.txt', HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        response = self.client.get('/media/bugs/log.txt', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/media/bugs/missing.txt').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_serve_media_requires_authentication(self):
+        os.makedirs(os.path.join(self.media_root, 'bugs'))
+        open(os.path.join(self.media_root, 'bugs', 'shot.png'), 'wb').close()
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/media/bugs/shot.png').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/media/bugs/shot.png', HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        with self.settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect'):
+            response = self.client.get('/media/bugs/shot.png')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+        token = AccessToken.for_user(self.reporter)
+        response = self.client.get('/media/bugs/shot.png', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_serve_media_through_web_server(self):
+        os.makedirs(os.path.join(self.media_root, 'bugs'))
+        open(os.path.join(self.media_root, 'bugs', 'shot.png'), 'wb').close()
+        with self.settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect'):
+            response = self.client.get('/media/bugs/shot.png')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/bugs/shot.png')
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE_HEADER='X-Sendfile'):
+            response = self.client.get('/media/bugs/shot.png')
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'bugs', 'shot.png'))
+
+
+class BugConditionalGetTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.reporter)
+        self.bug = self.create_bug()
+
+    def test_detail_not_modified(self):
+        url = f'/api/bugs/{self.bug.pk}/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        # Only the fingerprint; the bug itself is never loaded.
+        self.assertEqual(len(queries.captured_queries), 1)
+
+        self.client.patch(f'/api/bugs/{self.bug.pk}/status/', {'status': 'closed'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        url = f'/api/bugs/{self.bug.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(user=self.developer)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_missing_bug_is_still_404(self):
+        response = self.client.get('/api/bugs/999999/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_fingerprint(self):
+        response = self.client.get('/api/bugs/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/bugs/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Different filters describe a different collection.
+        self.assertEqual(self.client.get('/api/bugs/?status=open', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        other = self.create_bug()
+        response = self.client.get('/api/bugs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        # A delete only lowers the row count.
+        Bug.objects.filter(pk=other.pk).delete()
+        self.assertEqual(self.client.get('/api/bugs/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        url = f'/api/bugs/{self.bug.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_has_no_last_modified(self):
+        self.create_bug()
+        response = self.client.get('/api/bugs/?status=open')
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        # The bug leaves the list; the latest change of the rest stays put.
+        self.client.patch(f'/api/bugs/{self.bug.pk}/status/', {'status': 'closed'})
+        later = http_date((timezone.now() + timedelta(hours=1)).timestamp())
+        response = self.client.get('/api/bugs/?status=open', HTTP_IF_MODIFIED_SINCE=later)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get('/api/bugs/?status=open', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BugEventTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.bug = self.create_bug()
+        self.hidden = self.create_bug(created_by=self.admin_user, assigned_to=self.admin_user)
+        self.addCleanup(get_broker.cache_clear)
+
+    def auth_headers(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_event_for_change(self):
+        before = self.bug.snapshot()
+        after = {**before, 'status': 'closed', 'assigned_to_id': self.admin_user.pk}
+        event = event_for_change(before, after)
+        self.assertEqual(event['type'], 'bug.status_changed')
+        self.assertEqual(event['data']['previous_assigned_to_id'], self.developer.pk)
+        # The previous assignee still hears about the reassignment.
+        self.assertEqual(event['audience'], sorted([self.reporter.pk, self.developer.pk, self.admin_user.pk]))
+        self.assertEqual(event_for_change(None, before)['type'], 'bug.created')
+        self.assertEqual(event_for_change(before, None)['type'], 'bug.deleted')
+        self.assertEqual(event_for_change(before, {**before, 'bug_id': before['bug_id']})['type'], 'bug.updated')
+
+    def test_events_are_published_after_commit(self):
+        with mock.patch.object(InMemoryEventBroker, 'publish') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.bug.status = 'in_progress'
+                self.bug.save()
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        event = publish.call_args.args[0]
+        self.assertEqual((event['type'], event['data']['bug_id']), ('bug.status_changed', self.bug.pk))
+
+    def test_feed_requires_authentication(self):
+        response = self.client.get('/api/bugs/events/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/bugs/events/?token=garbage')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_feed_streams_visible_events(self):
+        response = await self.async_client.get('/api/bugs/events/', headers=self.auth_headers(self.developer))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        broker = get_broker()
+        broker.publish(event_for_change(None, self.hidden.snapshot()))
+        broker.publish(event_for_change(self.bug.snapshot(), None))
+        message = (await anext(stream)).decode()
+        self.assertIn('event: bug.deleted\n', message)
+        self.assertIn(f'"bug_id": {self.bug.pk}', message)
+
+        await stream.aclose()
+
+    async def test_closing_the_stream_unsubscribes(self):
+        broker = InMemoryEventBroker()
+        stream = event_stream(self.reporter, broker)
+        await anext(stream)
+        self.assertEqual(len(broker._subscriptions), 1)
+        await stream.aclose()
+        self.assertFalse(broker._subscriptions)
+
+    async def test_feed_accepts_token_parameter_and_keeps_alive(self):
+        token = AccessToken.for_user(self.reporter)
+        with self.settings(BUG_EVENT_HEARTBEAT=0.01):
+            response = await self.async_client.get(f'/api/bugs/events/?token={token}')
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            self.assertEqual(await anext(stream), b': keepalive\n\n')
+            await stream.aclose()
+
+    async def test_lagging_client_is_reset(self):
+        with self.settings(BUG_EVENT_BROKER={'BACKEND': 'bug.events.InMemoryEventBroker', 'OPTIONS': {'queue_size': 1}}):
+            response = await self.async_client.get('/api/bugs/events/', headers=self.auth_headers(self.admin_user))
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            for _ in range(3):
+                get_broker().publish(event_for_change(None, self.bug.snapshot()))
+            await asyncio.sleep(0)
+            self.assertEqual(await anext(stream), b'event: reset\ndata: {}\n\n')
+            with self.assertRaises(StopAsyncIteration):
+                await anext(stream)
+
+
+class BugNotificationTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.superuser = User.objects.create_superuser(
+            username='root', email='root@example.com', password='password123', role='manager', dept='management'
+        )
+        self.client.force_authenticate(user=self.reporter)
+
+    def change_status_as_superuser(self, bug_id, new_status):
+        # Neither the creator nor the assignee, so both are told.
+        self.client.force_authenticate(user=self.superuser)
+        self.write('patch', f'/api/bugs/{bug_id}/status/', {'status': new_status})
+        self.client.force_authenticate(user=self.reporter)
+
+    def write(self, method, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300)
+        return response
+
+    def create_assigned_bug(self):
+        return self.write('post', '/api/bugs/', {
+            'bug_type': 'bug', 'bug_description': 'Login fails', 'project': self.project.pk,
+            'assigned_to': 'developer', 'bug_priority': 'low', 'bug_severity': 'minor', 'status': 'open',
+        }).data['bug_id']
+
+    def later(self):
+        return timezone.now() + timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW_SECONDS)
+
+    def test_assignments_and_status_changes_are_collected(self):
+        bug_id = self.create_assigned_bug()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(f'/api/bugs/{bug_id}/status/', {'status': 'closed'}, format='json')
+        self.assertEqual(BugNotification.objects.count(), 1)
+        for callback in callbacks:
+            callback()
+
+        # The reporter closed the bug, so only the assignee is told.
+        notifications = BugNotification.objects.order_by('id').values_list('recipient__username', 'kind', 'changes')
+        self.assertEqual(list(notifications), [
+            ('developer', 'assigned', {}),
+            ('developer', 'status_changed', {'status': ['open', 'closed']}),
+        ])
+
+    def test_the_actor_is_not_notified(self):
+        bug_id = self.write('post', '/api/bugs/', {
+            'bug_type': 'bug', 'bug_description': 'Login fails', 'project': self.project.pk,
+            'assigned_to': 'reporter', 'bug_priority': 'low', 'bug_severity': 'minor', 'status': 'open',
+        }).data['bug_id']
+        self.write('patch', f'/api/bugs/{bug_id}/status/', {'status': 'closed'})
+        self.write('patch', '/api/bugs/bulk/status/', [{'bug_id': bug_id, 'status': 'open'}])
+        self.assertFalse(BugNotification.objects.exists())
+
+        self.change_status_as_superuser(bug_id, 'closed')
+        self.assertEqual(
+            list(BugNotification.objects.values_list('recipient__username', 'kind')), [('reporter', 'status_changed')]
+        )
+
+    def test_digest_coalesces_pending_notifications(self):
+        bug_id = self.create_assigned_bug()
+        self.change_status_as_superuser(bug_id, 'in_progress')
+        self.change_status_as_superuser(bug_id, 'closed')
+
+        out = StringIO()
+        call_command('send_notification_digests', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Sent 0 digests.')
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(send_digests(now=self.later()), 2)
+        messages = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(messages), {'developer@example.com', 'reporter@example.com'})
+        self.assertEqual(messages['developer@example.com'].subject, '1 bug update')
+        self.assertIn(
+            f'#{bug_id} [Tracker] Login fails: assigned to you, status Open -> Closed',
+            messages['developer@example.com'].body,
+        )
+        self.assertIn(f'#{bug_id} [Tracker] Login fails: status Open -> Closed', messages['reporter@example.com'].body)
+        self.assertFalse(BugNotification.objects.exists())
+
+    def test_changes_that_cancel_out_send_nothing(self):
+        bug_id = self.create_assigned_bug()
+        self.write('patch', f'/api/bugs/{bug_id}/', {'assigned_to': 'admin'})
+        self.write('patch', f'/api/bugs/{bug_id}/status/', {'status': 'closed'})
+        self.write('patch', f'/api/bugs/{bug_id}/status/', {'status': 'open'})
+
+        self.assertEqual(send_digests(now=self.later()), 1)
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+        self.assertIn('assigned to you', mail.outbox[0].body)
+        self.assertNotIn('status', mail.outbox[0].body)
+        self.assertFalse(BugNotification.objects.exists())
+
+    def test_one_connection_per_batch(self):
+        bug_id = self.create_assigned_bug()
+        self.change_status_as_superuser(bug_id, 'closed')
+        send_messages = mock.patch.object(
+            locmem.EmailBackend, 'send_messages', autospec=True, side_effect=locmem.EmailBackend.send_messages
+        )
+        with mock.patch('bug.notifications.get_connection', wraps=get_connection) as connect, send_messages as send:
+            self.assertEqual(send_digests(now=self.later()), 2)
+        connect.assert_called_once()
+        self.assertEqual([len(call.args[1]) for call in send.call_args_list], [2])
+
+        self.change_status_as_superuser(bug_id, 'open')
+        with override_settings(NOTIFICATION_DIGEST_BATCH_SIZE=1), send_messages as send:
+            self.assertEqual(send_digests(now=self.later()), 2)
+        self.assertEqual([len(call.args[1]) for call in send.call_args_list], [1, 1])
+
+
+class BugAsyncReadTests(BugTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.bug = self.create_bug()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.reporter)}'}
+
+    def test_read_views_are_async(self):
+        from .views import BugDetailView, BugListCreateView
+        self.assertTrue(asyncio.iscoroutinefunction(BugListCreateView.as_view()))
+        self.assertTrue(asyncio.iscoroutinefunction(BugDetailView.as_view()))
+
+    async def test_list_and_detail_under_asgi(self):
+        response = await self.async_client.get('/api/bugs/', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([bug['bug_id'] for bug in response.data['results']], [self.bug.pk])
+
+        response = await self.async_client.get(f'/api/bugs/{self.bug.pk}/', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['assigned_to'], 'developer')
+
+        response = await self.async_client.get('/api/bugs/999999/', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get('/api/bugs/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_conditional_get_under_asgi(self):
+        response = await self.async_client.get(f'/api/bugs/{self.bug.pk}/', headers=self.headers)
+        response = await self.async_client.get(
+            f'/api/bugs/{self.bug.pk}/', headers={**self.headers, 'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_writes_keep_the_sync_view(self):
+        response = await self.async_client.patch(
+            f'/api/bugs/{self.bug.pk}/', {'bug_priority': 'high'}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bug_priority'], 'high')
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_generate_benchmark_data_tops_up(self):
+        options = {'users': 12, 'projects': 3, 'members': 4, 'bugs': 40, 'batch_size': 7, 'stdout': StringIO()}
+        call_command('generate_benchmark_data', **options)
+        call_command('generate_benchmark_data', **{**options, 'bugs': 50})
+
+        self.assertEqual(User.objects.filter(username__startswith='bench_user_').count(), 12)
+        projects = Project.objects.filter(project_name__startswith='Benchmark project ')
+        self.assertEqual(projects.count(), 3)
+        for project in projects:
+            self.assertEqual(project.users.count(), 4)
+            self.assertTrue(project.users.filter(username='bench_user_0').exists())
+        self.assertEqual(Bug.objects.count(), 50)
+        for bug in Bug.objects.select_related('project'):
+            self.assertTrue(bug.project.users.filter(pk=bug.created_by_id).exists())
+        self.assertEqual(sum(BugWorkload.objects.values_list('open_count', flat=True)),
+                         Bug.objects.filter(status='open').count())
+
+    def test_benchmark_visibility_seeds_through_generate_benchmark_data(self):
+        stdout = StringIO()
+        call_command('benchmark_visibility', rows=30, users=5, batch_size=10, repeat=1, stdout=stdout)
+
+        self.assertIn('UNION visible_to', stdout.getvalue())
+        self.assertEqual(Bug.objects.count(), 30)
+        self.assertTrue(User.objects.get(username='bench_user_0').check_password('benchmark-password'))
+        self.assertEqual(sum(BugWorkload.objects.values_list('open_count', flat=True)),
+                         Bug.objects.filter(status='open').count())
+
+    def test_benchmark_api_reports_every_scenario(self):
+        call_command('generate_benchmark_data', users=5, projects=2, members=3, bugs=30, stdout=StringIO())
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        results_path = os.path.join(output_dir, 'results.json')
+
+        stdout = StringIO()
+        call_command('benchmark_api', requests=3, warmup=1, output=results_path, stdout=stdout)
+        output = stdout.getvalue()
+        for scenario in ('login', 'bug-list', 'bug-detail', 'bug-status-update', 'project-list', 'user-list'):
+            self.assertIn(f'{scenario}: ', output)
+        self.assertEqual(output.count(', 0 errors'), 6)
+
+        stdout = StringIO()
+        call_command('benchmark_api', 'bug-list', requests=2, warmup=0, baseline=results_path, stdout=stdout)
+        self.assertIn('vs baseline: rps', stdout.getvalue())
@@ -0,0 +1,45 @@
+# thumbnails.py for bug app
+#
+# Thumbnails are rendered on the 'thumbnails' task queue once the saving
+# transaction commits, for new bugs with an image and for saves that store
+# a different image than the row held. The thumbnail path is derived from
+# the image path, so a deduplicated image is only thumbnailed once.
+
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from PIL import Image
+from bug_report.tasks import task
+from .models import Bug
+
+
+def thumbnail_name(name):
+    return f'thumbs/{name}'
+
+
+@task(queue='thumbnails', max_retries=2)
+def generate_thumbnail(name):
+    target = thumbnail_name(name)
+    if default_storage.exists(target):
+        return target
+    storage = Bug._meta.get_field('image').storage
+    with storage.open(name) as source, Image.open(source) as image:
+        image_format = image.format
+        image.thumbnail(settings.BUG_THUMBNAIL_SIZE)
+        buffer = BytesIO()
+        image.save(buffer, format=image_format)
+    return default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+@receiver(post_save, sender=Bug)
+def queue_bug_thumbnail(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.image or (update_fields is not None and 'image' not in update_fields):
+        return
+    # Bug.save() reads the stored image name along with the row it updates.
+    if not created and instance.image.name == getattr(instance, '_stored_image_name', None):
+        return
+    generate_thumbnail.delay_on_commit(instance.image.name)
@@ -1,10 +1,24 @@
 # urls.py for bug app
 
 from django.urls import path
-from .views import BugListCreateView, BugDetailView, BugStatusUpdateView
+from .views import (
+    BugListCreateView, BugExportView, BugDetailView, BugStatusUpdateView, BugBulkView, BugBulkStatusUpdateView,
+    BugWorkloadMetricsView, BugDailyMetricsView, BugHistoryExportView, BugImportCreateView, BugImportDetailView,
+    BugImportErrorListView, bug_events,
+)
 
 urlpatterns = [
     path('bugs/', BugListCreateView.as_view(), name='bug-list-create'),
+    path('bugs/export/', BugExportView.as_view(), name='bug-export'),
     path('bugs/<int:pk>/', BugDetailView.as_view(), name='bug-detail'),
     path('bugs/<int:pk>/status/', BugStatusUpdateView.as_view(), name='bug-status-update'),
+    path('bugs/bulk/', BugBulkView.as_view(), name='bug-bulk'),
+    path('bugs/bulk/status/', BugBulkStatusUpdateView.as_view(), name='bug-bulk-status-update'),
+    path('bugs/metrics/', BugWorkloadMetricsView.as_view(), name='bug-metrics'),
+    path('bugs/metrics/daily/', BugDailyMetricsView.as_view(), name='bug-metrics-daily'),
+    path('bugs/events/', bug_events, name='bug-events'),
+    path('bugs/history/', BugHistoryExportView.as_view(), name='bug-history-export'),
+    path('bugs/imports/', BugImportCreateView.as_view(), name='bug-import-create'),
+    path('bugs/imports/<int:pk>/', BugImportDetailView.as_view(), name='bug-import-detail'),
+    path('bugs/imports/<int:pk>/errors/', BugImportErrorListView.as_view(), name='bug-import-errors'),
 ]
\ No newline at end of file
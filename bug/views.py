@@ -1,55 +1,568 @@
 # views.py for bug app (updated)
 
-from rest_framework import generics, permissions, status
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from rest_framework import filters, generics, permissions, status
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from accounts.authentication import CachedJWTAuthentication
+from django.db import transaction
+from django.db.models import F, Sum
 from django.utils import timezone
-from .models import Bug
-from .serializers import BugSerializer
+from django.utils.dateparse import parse_date, parse_datetime
+from bug_report.async_views import AsyncListMixin, AsyncRetrieveMixin
+from bug_report.conditional import ConditionalGetMixin
+from bug_report.exports import StreamingExportMixin
+from project.models import Project
+from .models import Bug, BugDailyMetric, BugHistory, BugImportJob, BugVersionConflict, BugWorkload
+from .serializers import (
+    BugImportErrorSerializer, BugImportJobSerializer, BugSerializer, BugStatusTransitionSerializer,
+)
+from .pagination import ImportErrorCursorPagination, KeysetCursorPagination
+from .filters import BugFilterBackend
+from .events import event_stream, get_broker
+from .history import bug_history_entry, export_lines, history_entry, record_history
+from .imports import run_import
+from .signals import bugs_changed
 
 
 
 
-class BugListCreateView(generics.ListCreateAPIView):
+class BugListCreateView(ConditionalGetMixin, AsyncListMixin, generics.ListCreateAPIView):
     serializer_class = BugSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [BugFilterBackend, filters.OrderingFilter]
+    ordering_fields = ['report_date', 'updated_date']
+    ordering = ('-report_date', '-bug_id')
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        bug = serializer.save(created_by=self.request.user)
+        record_history([bug_history_entry(bug, None, self.request.user)])
+
+    def get_queryset(self):
+        return Bug.objects.for_api().visible_to(self.request.user)
+
+class BugExportView(StreamingExportMixin, generics.GenericAPIView):
+    """
+    Stream the bugs of the list view, with the same filters and ordering, as
+    CSV or NDJSON. Users are exported by username and the project by id, as
+    in BugSerializer; `image` is the stored file name.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = BugListCreateView.filter_backends
+    ordering_fields = BugListCreateView.ordering_fields
+    ordering = BugListCreateView.ordering
+    export_filename = 'bugs'
+    export_fields = {
+        'bug_id': 'bug_id',
+        'bug_type': 'bug_type',
+        'created_by': 'created_by__username',
+        'assigned_to': 'assigned_to__username',
+        'report_date': 'report_date',
+        'updated_date': 'updated_date',
+        'bug_description': 'bug_description',
+        'url_bug': 'url_bug',
+        'image': 'image',
+        'project': 'project_id',
+        'bug_priority': 'bug_priority',
+        'bug_severity': 'bug_severity',
+        'status': 'status',
+        'is_current_project': 'is_current_project',
+        'version': 'version',
+    }
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser or user.is_staff:
-            return Bug.objects.all()
-        return Bug.objects.filter(created_by=user) | Bug.objects.filter(assigned_to=user)
+        return Bug.objects.visible_to(self.request.user)
+
+def version_conflict(version):
+    return Response(
+        {'detail': 'The bug was changed by someone else.', 'version': version}, status=status.HTTP_409_CONFLICT
+    )
 
-class BugDetailView(generics.RetrieveUpdateAPIView):
+class BugDetailView(ConditionalGetMixin, AsyncRetrieveMixin, generics.RetrieveUpdateAPIView):
     serializer_class = BugSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser or user.is_staff:
-            return Bug.objects.all()
-        return Bug.objects.filter(created_by=user) | Bug.objects.filter(assigned_to=user)
+        return Bug.objects.for_api().visible_to(self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except BugVersionConflict:
+            version = Bug.objects.filter(pk=kwargs['pk']).values_list('version', flat=True).first()
+            if version is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            return version_conflict(version)
+
+    def perform_update(self, serializer):
+        before = serializer.instance.history_values()
+        serializer.instance._changed_by_id = self.request.user.pk
+        bug = serializer.save()
+        record_history([bug_history_entry(bug, before, self.request.user)])
     
     def delete(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 class BugStatusUpdateView(APIView):
+    """
+    PATCH {"status", "version"} applies a status transition with a locked
+    read and one UPDATE (see BugQuerySet.transition_status). `version` is
+    optional; when sent and the bug has changed since, the answer is 409
+    Conflict with the current version. Only the creator or a superuser may
+    change the status.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def patch(self, request, pk, format=None):
-        try:
-            bug = Bug.objects.get(pk=pk)
-        except Bug.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        serializer = BugStatusTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        expected_version = serializer.validated_data.get('version')
 
-        if bug.created_by != request.user and not request.user.is_superuser:
+        with transaction.atomic():
+            result = Bug.objects.transition_status(pk, new_status, request.user, expected_version)
+            if result is not None:
+                before, after, version = result
+                bugs_changed.send(sender=Bug, changes=[(before, after)], actor_id=request.user.pk)
+                record_history([history_entry(
+                    before['bug_id'], before['project_id'], {'status': before['status']}, {'status': new_status},
+                    request.user, after['updated_date'],
+                )])
+        if result is None:
+            return self.explain_failure(request, pk)
+        return Response({
+            'bug_id': after['bug_id'],
+            'status': after['status'],
+            'updated_date': after['updated_date'],
+            'version': version,
+        })
+
+    def explain_failure(self, request, pk):
+        current = Bug.objects.filter(pk=pk).values('created_by_id', 'version').first()
+        if current is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if current['created_by_id'] != request.user.id and not request.user.is_superuser:
             return Response(status=status.HTTP_403_FORBIDDEN)
+        return version_conflict(current['version'])
+
+
+def get_bulk_items(request):
+    items = request.data
+    if not isinstance(items, list):
+        raise ParseError('Expected a list of items.')
+    if not items:
+        raise ParseError('Expected at least one item.')
+    if len(items) > settings.BUG_BULK_MAX_ITEMS:
+        raise ParseError(f'At most {settings.BUG_BULK_MAX_ITEMS} items can be sent per request.')
+    return items
+
+
+def get_bulk_context(items):
+    """
+    Fetch every user and project referenced by the items with one query each,
+    for the Prefetched* fields on BugSerializer.
+    """
+    usernames, project_ids = set(), set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if item.get('assigned_to') not in (None, ''):
+            usernames.add(str(item['assigned_to']))
+        if str(item.get('project', '')).isdigit():
+            project_ids.add(int(item['project']))
+
+    users = get_user_model().objects.filter(username__in=usernames).only('id', 'username')
+    projects = Project.objects.filter(pk__in=project_ids).only('id')
+    return {
+        'users_by_username': {user.username: user for user in users} if usernames else {},
+        'projects_by_id': {project.pk: project for project in projects} if project_ids else {},
+    }
+
+
+def bulk_response(results, errors, success_status):
+    if errors and not results:
+        response_status = status.HTTP_400_BAD_REQUEST
+    elif errors:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = success_status
+    return Response({'results': results, 'errors': errors}, status=response_status)
+
+
+def item_error(index, errors):
+    return {'index': index, 'errors': errors}
+
+
+def get_item_bug_id(item):
+    """Return (bug_id, error) for one bulk item."""
+    bug_id = item.get('bug_id') if isinstance(item, dict) else None
+    if bug_id is None:
+        return None, {'bug_id': ['This field is required.']}
+    if isinstance(bug_id, bool) or not isinstance(bug_id, int):
+        return None, {'bug_id': ['A valid integer is required.']}
+    return bug_id, None
+
+
+class BugBulkView(APIView):
+    """
+    POST creates and PATCH updates a list of bugs in one request.
+
+    All items are validated in one pass, and valid items are written with
+    bulk_create/bulk_update inside a single transaction. Invalid items are
+    skipped and reported by their index in `errors`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, format=None):
+        items = get_bulk_items(request)
+        context = get_bulk_context(items)
+
+        bugs, errors = [], []
+        for index, item in enumerate(items):
+            serializer = BugSerializer(data=item, context=context)
+            if serializer.is_valid():
+                bugs.append(Bug(created_by=request.user, **serializer.validated_data))
+            else:
+                errors.append(item_error(index, serializer.errors))
+
+        with transaction.atomic():
+            Bug.objects.bulk_create(bugs, batch_size=settings.BUG_BULK_BATCH_SIZE)
+            bugs_changed.send(sender=Bug, changes=[(None, bug.snapshot()) for bug in bugs], actor_id=request.user.pk)
+            record_history([bug_history_entry(bug, None, request.user) for bug in bugs])
+
+        results = BugSerializer(bugs, many=True).data
+        return bulk_response(results, errors, status.HTTP_201_CREATED)
+
+    def patch(self, request, format=None):
+        items = get_bulk_items(request)
+        context = get_bulk_context(items)
+        ids = [get_item_bug_id(item)[0] for item in items]
+        visible = Bug.objects.for_api().visible_to(request.user).in_bulk([bug_id for bug_id in ids if bug_id])
+
+        pending, fields, errors, seen = [], {'updated_date', 'version'}, [], set()
+        history_before = {}
+        for index, item in enumerate(items):
+            bug_id, error = get_item_bug_id(item)
+            if error:
+                errors.append(item_error(index, error))
+                continue
+            if bug_id in seen:
+                errors.append(item_error(index, {'bug_id': ['Duplicate bug in request.']}))
+                continue
+            seen.add(bug_id)
+            bug = visible.get(bug_id)
+            if bug is None:
+                errors.append(item_error(index, {'bug_id': ['Not found.']}))
+                continue
+
+            serializer = BugSerializer(bug, data=item, partial=True, context=context)
+            if not serializer.is_valid():
+                errors.append(item_error(index, serializer.errors))
+                continue
+            history_before[bug.pk] = bug.history_values()
+            for attr, value in serializer.validated_data.items():
+                setattr(bug, attr, value)
+                fields.add(attr)
+            pending.append((index, bug))
+
+        now = timezone.now()
+        bugs, changes = [], []
+        with transaction.atomic():
+            # Only bugs still at the version they were validated against are
+            # written, as in Bug.save(); the locked rows are the before snapshots.
+            stored = {
+                row['bug_id']: row
+                for row in Bug.objects.select_for_update().filter(pk__in=[bug.pk for _, bug in pending])
+                .values(*Bug.SNAPSHOT_FIELDS, 'version')
+            }
+            for index, bug in pending:
+                before = stored.get(bug.pk)
+                version = before.pop('version') if before else None
+                if version != bug.version:
+                    errors.append(item_error(index, {'detail': 'The bug was changed by someone else.', 'version': version}))
+                    continue
+                bug.updated_date = now
+                changes.append((before, bug.snapshot()))
+                bugs.append(bug)
+            versions = [bug.version for bug in bugs]
+            for bug in bugs:
+                bug.version = F('version') + 1
+            Bug.objects.bulk_update(bugs, sorted(fields), batch_size=settings.BUG_BULK_BATCH_SIZE)
+            for bug, version in zip(bugs, versions):
+                bug.version = version + 1
+            bugs_changed.send(sender=Bug, changes=changes, actor_id=request.user.pk)
+            record_history([bug_history_entry(bug, history_before[bug.pk], request.user) for bug in bugs])
+
+        errors.sort(key=lambda error: error['index'])
+        results = BugSerializer(bugs, many=True).data
+        return bulk_response(results, errors, status.HTTP_200_OK)
+
+
+class BugBulkStatusUpdateView(APIView):
+    """
+    PATCH a list of {"bug_id", "status"} items. Applies the same rule as
+    BugStatusUpdateView (creator or superuser) and issues one UPDATE per
+    target status.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, format=None):
+        items = get_bulk_items(request)
+        ids = [get_item_bug_id(item)[0] for item in items]
+        snapshots = {
+            snapshot['bug_id']: snapshot
+            for snapshot in Bug.objects.filter(pk__in=[bug_id for bug_id in ids if bug_id]).values(*Bug.SNAPSHOT_FIELDS)
+        }
+        valid_statuses = dict(Bug.STATUS_CHOICES)
+
+        by_status, results, errors, seen = {}, [], [], set()
+        for index, item in enumerate(items):
+            bug_id, error = get_item_bug_id(item)
+            new_status = item.get('status') if isinstance(item, dict) else None
+            if error:
+                errors.append(item_error(index, error))
+            elif bug_id in seen:
+                errors.append(item_error(index, {'bug_id': ['Duplicate bug in request.']}))
+            elif bug_id not in snapshots:
+                errors.append(item_error(index, {'bug_id': ['Not found.']}))
+            elif snapshots[bug_id]['created_by_id'] != request.user.id and not request.user.is_superuser:
+                errors.append(item_error(index, {'detail': 'You do not have permission to perform this action.'}))
+            elif new_status not in valid_statuses:
+                errors.append(item_error(index, {'status': [f'"{new_status}" is not a valid choice.']}))
+            else:
+                by_status.setdefault(new_status, []).append(bug_id)
+                results.append({'bug_id': bug_id, 'status': new_status})
+            if bug_id is not None:
+                seen.add(bug_id)
+
+        now = timezone.now()
+        changes = [
+            (snapshots[bug_id], {**snapshots[bug_id], 'status': new_status, 'updated_date': now})
+            for new_status, bug_ids in by_status.items()
+            for bug_id in bug_ids
+        ]
+        with transaction.atomic():
+            for new_status, bug_ids in by_status.items():
+                Bug.objects.filter(pk__in=bug_ids).update(
+                    status=new_status, updated_date=now, version=F('version') + 1
+                )
+            bugs_changed.send(sender=Bug, changes=changes, actor_id=request.user.pk)
+            record_history([
+                history_entry(
+                    before['bug_id'], before['project_id'], {'status': before['status']}, {'status': after['status']},
+                    request.user, now,
+                )
+                for before, after in changes
+            ])
+
+        return bulk_response(results, errors, status.HTTP_200_OK)
+
+
+METRIC_GROUPS = {'project': 'project_id', 'assignee': 'assignee__username'}
+
+
+def get_metric_groups(request):
+    names = [name.strip() for name in request.query_params.get('group_by', 'project,assignee').split(',') if name.strip()]
+    invalid = [name for name in names if name not in METRIC_GROUPS]
+    if invalid or not names:
+        raise ParseError(f'group_by accepts {", ".join(METRIC_GROUPS)}.')
+    return names
+
+
+def filter_metrics(request, queryset):
+    project = request.query_params.get('project')
+    if project:
+        if not project.isdigit():
+            raise ParseError('project must be a project id.')
+        queryset = queryset.filter(project_id=int(project))
+    assignee = request.query_params.get('assignee')
+    if assignee:
+        queryset = queryset.filter(assignee__username=assignee)
+    return queryset
+
+
+def metric_rows(queryset, groups, columns, counters):
+    rows = []
+    group_columns = [METRIC_GROUPS[name] for name in groups]
+    aggregates = {name: Sum(name) for name in counters + ['time_to_close_total']}
+    for row in queryset.values(*columns, *group_columns).annotate(**aggregates).order_by(*columns, *group_columns):
+        for name in groups:
+            row[name] = row.pop(METRIC_GROUPS[name])
+        total = row.pop('time_to_close_total') or timedelta()
+        row['avg_time_to_close_seconds'] = total.total_seconds() / row['closed_count'] if row['closed_count'] else None
+        rows.append(row)
+    return rows
+
+
+class BugWorkloadMetricsView(APIView):
+    """
+    Open, in-progress and closed counts and average time to close from the
+    BugWorkload table, grouped by `group_by` (project, assignee or both) and
+    optionally filtered by `project` id and `assignee` username.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, format=None):
+        groups = get_metric_groups(request)
+        queryset = filter_metrics(request, BugWorkload.objects.all())
+        return Response(metric_rows(queryset, groups, [], ['open_count', 'in_progress_count', 'closed_count']))
+
+
+class BugDailyMetricsView(APIView):
+    """
+    Bugs opened and closed per day from the BugDailyMetric table, for the
+    `since`/`until` date range (default: the last 30 days).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, format=None):
+        groups = get_metric_groups(request)
+        today = timezone.localdate()
+        since = self.get_date(request, 'since', today - timedelta(days=30))
+        until = self.get_date(request, 'until', today)
+        queryset = filter_metrics(request, BugDailyMetric.objects.filter(day__range=(since, until)))
+        return Response(metric_rows(queryset, groups, ['day'], ['opened_count', 'closed_count']))
+
+    def get_date(self, request, param, default):
+        value = request.query_params.get(param)
+        if not value:
+            return default
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ParseError(f'{param} must be a YYYY-MM-DD date.')
+        return parsed
+
+
+class BugHistoryExportView(APIView):
+    """
+    Stream the history of one bug (`bug`) or of a project's bugs (`project`)
+    as newline-delimited JSON, oldest first, from `since` (inclusive) to
+    `until` (exclusive), both ISO dates or datetimes. Only bugs the user can
+    currently see are exported.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, format=None):
+        queryset = BugHistory.objects.order_by('changed_at', 'id')
+        for param in ('bug', 'project'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            if not value.isdigit():
+                raise ParseError(f'{param} must be an id.')
+            queryset = queryset.filter(**{f'{param}_id': int(value)})
+        if 'bug' not in request.query_params and 'project' not in request.query_params:
+            raise ParseError('Pass a bug or a project id.')
+
+        since = self.get_datetime(request, 'since')
+        if since is not None:
+            queryset = queryset.filter(changed_at__gte=since)
+        until = self.get_datetime(request, 'until')
+        if until is not None:
+            queryset = queryset.filter(changed_at__lt=until)
+        if not (request.user.is_superuser or request.user.is_staff):
+            queryset = queryset.filter(bug_id__in=Bug.objects.visible_to(request.user).values('pk'))
+
+        response = StreamingHttpResponse(export_lines(queryset), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def get_datetime(self, request, param):
+        value = request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                parsed = datetime.combine(day, time.min) if day else None
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ParseError(f'{param} must be an ISO date or datetime.')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+class BugImportCreateView(generics.CreateAPIView):
+    """
+    Upload a CSV or JSON file of bugs (multipart `file`) to import in the
+    background; responds 202 with the job to poll. Columns and keys are the
+    BugSerializer fields, except that `project` is a project name and an
+    optional `created_by` username stands in for the uploader.
+    """
+    serializer_class = BugImportJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_create(self, serializer):
+        job = serializer.save(created_by=self.request.user)
+        run_import.delay_on_commit(job.pk)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+
+class BugImportDetailView(generics.RetrieveAPIView):
+    queryset = BugImportJob.objects.select_related('created_by')
+    serializer_class = BugImportJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+
+class BugImportErrorListView(generics.ListAPIView):
+    """The rejected rows of an import job, in file order."""
+    serializer_class = BugImportErrorSerializer
+    pagination_class = ImportErrorCursorPagination
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        job = get_object_or_404(BugImportJob.objects.only('pk'), pk=self.kwargs['pk'])
+        return job.row_errors.all()
+
+
+def authenticate_event_stream(request):
+    authentication = CachedJWTAuthentication()
+    result = authentication.authenticate(request)
+    if result is not None:
+        return result[0]
+    # EventSource cannot set headers, so browsers pass the access token here.
+    token = request.GET.get('token')
+    if token:
+        return authentication.get_user(authentication.get_validated_token(token))
+    return None
+
+
+@require_GET
+async def bug_events(request):
+    """
+    Server-Sent Events feed of creates, updates, status changes and deletes
+    of the bugs the user can see. Long-lived, so serve it through
+    bug_report.asgi.
+    """
+    try:
+        user = await sync_to_async(authenticate_event_stream)(request)
+    except (AuthenticationFailed, InvalidToken) as e:
+        detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+        return JsonResponse(detail, status=e.status_code)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
 
-        serializer = BugSerializer(bug, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    response = StreamingHttpResponse(event_stream(user, get_broker()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,85 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """
+    Serve GET on DRF generic views through Django's async ORM, so a slow
+    query under ASGI (bug_report.asgi) waits on the event loop instead of
+    holding a worker thread. Authentication, permissions and throttling run
+    as in APIView.dispatch(); every other method keeps the sync view.
+
+    Subclasses provide `aget()`; see AsyncListMixin and AsyncRetrieveMixin.
+    Under WSGI Django runs the async view in a per-request event loop, so
+    both deployments serve the same responses.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = super().as_view(**initkwargs)
+        run_sync_view = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await run_sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.async_dispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.__doc__ = cls.__doc__
+        view.__module__ = cls.__module__
+        return csrf_exempt(view)
+
+    async def async_dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncListMixin(AsyncReadMixin):
+    async def aget(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        if paginator is not None and hasattr(paginator, 'apaginate_queryset'):
+            page = await paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+        elif paginator is not None:
+            page = await sync_to_async(self.paginate_queryset)(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+        instances = [instance async for instance in queryset]
+        return Response(self.get_serializer(instances, many=True).data)
+
+
+class AsyncRetrieveMixin(AsyncReadMixin):
+    async def aget(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        await sync_to_async(self.check_object_permissions)(self.request, instance)
+        return instance
@@ -0,0 +1,110 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for generic GET views, derived from
+    `last_modified_field` with one aggregate query before anything is loaded
+    or serialized.
+
+    Detail views fingerprint the requested row and send both headers. List
+    views fingerprint the whole filtered collection as (latest modification,
+    row count) and send only the ETag: a row that is deleted or leaves the
+    filter does not move the latest modification of what remains, so a date
+    cannot tell that the collection changed. The ETag also covers the user
+    and the full URL, which decide what the response contains. A matching
+    If-None-Match, or If-Modified-Since on a detail view, is answered with
+    304 Not Modified.
+    """
+    last_modified_field = 'updated_date'
+
+    def get(self, request, *args, **kwargs):
+        fingerprints = self.get_fingerprints()
+        response = self.get_not_modified_response(fingerprints)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.add_conditional_headers(response, fingerprints)
+
+    async def aget(self, request, *args, **kwargs):
+        fingerprints = await self.aget_fingerprints()
+        response = self.get_not_modified_response(fingerprints)
+        if response is None:
+            response = await super().aget(request, *args, **kwargs)
+        return self.add_conditional_headers(response, fingerprints)
+
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_fingerprint_queryset(self):
+        queryset = self.get_queryset()
+        if self.is_detail():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return self.filter_queryset(queryset)
+
+    def get_fingerprint_querysets(self):
+        """Return the (queryset, last modified field) pairs the response depends on."""
+        return [(self.get_fingerprint_queryset(), self.last_modified_field)]
+
+    def get_fingerprints(self):
+        """
+        Return a list of (latest modification, row count) pairs describing
+        the response, or None to skip conditional handling.
+        """
+        fingerprints = [self.fingerprint(queryset, field) for queryset, field in self.get_fingerprint_querysets()]
+        return self.check_fingerprints(fingerprints)
+
+    async def aget_fingerprints(self):
+        fingerprints = [
+            await self.afingerprint(queryset, field) for queryset, field in self.get_fingerprint_querysets()
+        ]
+        return self.check_fingerprints(fingerprints)
+
+    def check_fingerprints(self, fingerprints):
+        if self.is_detail() and not fingerprints[0][1]:
+            # Let the view answer 404 as usual.
+            return None
+        return fingerprints
+
+    def fingerprint_aggregates(self, field):
+        return {'latest': Max(field), 'count': Count('pk')}
+
+    def fingerprint(self, queryset, field):
+        values = queryset.order_by().aggregate(**self.fingerprint_aggregates(field))
+        return values['latest'], values['count']
+
+    async def afingerprint(self, queryset, field):
+        values = await queryset.order_by().aaggregate(**self.fingerprint_aggregates(field))
+        return values['latest'], values['count']
+
+    def get_last_modified(self, fingerprints):
+        if not self.is_detail():
+            return None
+        timestamps = [latest for latest, count in fingerprints if latest is not None]
+        return int(max(timestamps).timestamp()) if timestamps else None
+
+    def get_not_modified_response(self, fingerprints):
+        if fingerprints is None:
+            return None
+        return get_conditional_response(
+            self.request, etag=self.make_etag(fingerprints), last_modified=self.get_last_modified(fingerprints)
+        )
+
+    def add_conditional_headers(self, response, fingerprints):
+        if fingerprints is None or response.status_code not in (200, 304):
+            return response
+        response['ETag'] = self.make_etag(fingerprints)
+        last_modified = self.get_last_modified(fingerprints)
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def make_etag(self, fingerprints):
+        state = repr((self.request.user.pk, self.request.get_full_path(), fingerprints))
+        return quote_etag(hashlib.sha256(state.encode()).hexdigest()[:32])
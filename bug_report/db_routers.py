@@ -0,0 +1,93 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import LazyObject
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def sticky_key(user_id):
+    return f'db:read-primary:{user_id}'
+
+
+def authenticated_user(request):
+    # DRF assigns request.user once it has authenticated the request; before
+    # that it is Django's lazy session user, which we must not evaluate from
+    # inside the router (loading it is itself a read).
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, LazyObject) or not user.is_authenticated:
+        return None
+    return user
+
+
+class RoutingState:
+    """Replica routing for one request; the replica is picked once per request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.sticky = None
+        self.alias = None
+
+    def get_read_alias(self):
+        if self.sticky is None:
+            user = authenticated_user(self.request)
+            if user is None:
+                return None
+            self.sticky = bool(cache.get(sticky_key(user.pk)))
+        if self.sticky:
+            return None
+        if self.alias is None:
+            self.alias = random.choice(settings.DATABASE_REPLICAS)
+        return self.alias
+
+
+class ReplicaRouter:
+    """
+    Send the reads of requests marked by ReplicaRoutingMiddleware to one of
+    settings.DATABASE_REPLICAS; everything else uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not settings.DATABASE_REPLICAS:
+            return None
+        return state.get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Marks GETs to the views in DATABASE_REPLICA_URL_NAMES as safe to read
+    from a replica, unless the same user wrote something in the last
+    DATABASE_REPLICA_STICKY_SECONDS (read-your-writes). The sticky flag lives
+    in the default cache, which must be shared by all workers.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if request.method in ('GET', 'HEAD') and url_name in settings.DATABASE_REPLICA_URL_NAMES:
+            _routing.set(RoutingState(request))
+        else:
+            _routing.set(None)
+
+    def process_response(self, request, response):
+        _routing.set(None)
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS and response.status_code < 400:
+            user = authenticated_user(request)
+            if user is not None:
+                cache.set(sticky_key(user.pk), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
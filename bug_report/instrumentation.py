@@ -0,0 +1,251 @@
+import bisect
+import logging
+import random
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+slow_query_logger = logging.getLogger('bug_report.slow_queries')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.url_name = None
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics.query_count += 1
+        metrics.query_time += duration
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is not None and duration * 1000 >= threshold:
+            log_slow_query(sql, duration, context['connection'].alias)
+
+
+def log_slow_query(sql, duration, alias):
+    stack = None
+    if random.random() < settings.SLOW_QUERY_STACK_SAMPLE_RATE:
+        # Only our own frames; the ORM and DRF layers are the same every time.
+        frames = [
+            frame for frame in traceback.extract_stack()[:-3]
+            if str(settings.BASE_DIR) in frame.filename and 'site-packages' not in frame.filename
+        ]
+        stack = ''.join(traceback.format_list(frames))
+    slow_query_logger.warning(
+        'Slow query (%.1f ms on %s): %s%s',
+        duration * 1000, alias, sql, f'\n{stack}' if stack else '',
+        extra={'duration': duration, 'alias': alias, 'sql': sql},
+    )
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@contextmanager
+def serializer_timer():
+    """Time the outermost serialization of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Adds this serializer's to_representation() time to the request metrics."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+class MetricsRegistry:
+    """Process-local request metrics, keyed by (url name, method, status)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.latency = {}
+            self.queries = {}
+            self.query_seconds = {}
+            self.serializer_seconds = {}
+            self.counters = {}
+
+    def observe(self, metrics, method, status_code, duration):
+        key = (metrics.url_name or 'unresolved', method, str(status_code))
+        with self.lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(settings.METRICS_LATENCY_BUCKETS)
+            histogram.observe(duration)
+            self.queries[key] = self.queries.get(key, 0) + metrics.query_count
+            self.query_seconds[key] = self.query_seconds.get(key, 0.0) + metrics.query_time
+            self.serializer_seconds[key] = self.serializer_seconds.get(key, 0.0) + metrics.serializer_time
+
+    def increment(self, name, **labels):
+        """Add one to the counter `name` with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def render(self):
+        lines = [
+            '# HELP http_request_duration_seconds Request wall time.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            for key, histogram in sorted(self.latency.items()):
+                labels = self.labels(key)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram.total}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+            for name, kind, help_text, values in (
+                ('http_request_db_queries_total', 'counter', 'Database queries run by requests.', self.queries),
+                ('http_request_db_seconds_total', 'counter', 'Time spent in database queries.', self.query_seconds),
+                ('http_request_serializer_seconds_total', 'counter', 'Time spent serializing.', self.serializer_seconds),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for key, value in sorted(values.items()):
+                    lines.append(f'{name}{{{self.labels(key)}}} {value}')
+            counter_names = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in counter_names:
+                    counter_names.add(name)
+                    lines.append(f'# TYPE {name} counter')
+                label_text = ','.join(f'{label}="{label_value}"' for label, label_value in labels)
+                lines.append(f'{name}{{{label_text}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def labels(self, key):
+        view, method, status_code = key
+        return f'view="{view}",method="{method}",status="{status_code}"'
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentationMiddleware:
+    """
+    Measures each request's wall time, database queries and serializer time,
+    labelled with the resolved URL name. Adds a Server-Timing header when
+    SERVER_TIMING_HEADER is on and feeds the histograms served by
+    metrics_view. Put it first in MIDDLEWARE so the timing covers the rest.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.set(None)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.set(None)
+        return self.finish(request, response, metrics)
+
+    def start(self):
+        for alias in connections:
+            install_query_recorder(connections[alias])
+        metrics = RequestMetrics()
+        _current.set(metrics)
+        return metrics
+
+    def finish(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        if request.resolver_match is not None:
+            metrics.url_name = request.resolver_match.url_name
+        registry.observe(metrics, request.method, response.status_code, duration)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = ', '.join([
+                f'total;dur={duration * 1000:.1f}',
+                f'db;dur={metrics.query_time * 1000:.1f};desc="{metrics.query_count} queries"',
+                f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+            ])
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of this process' request metrics, for
+    scrapers sending `Authorization: Bearer <METRICS_TOKEN>`. Without a
+    METRICS_TOKEN the endpoint does not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not constant_time_compare(credentials.strip(), settings.METRICS_TOKEN):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
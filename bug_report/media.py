@@ -0,0 +1,117 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single satisfiable byte range, else None."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def is_authenticated(request):
+    """Whether the request carries credentials the API would accept."""
+    authenticators = [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        return Request(request, authenticators=authenticators).user.is_authenticated
+    except APIException:
+        return False
+
+
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT to an authenticated user.
+
+    With MEDIA_SENDFILE_HEADER set to X-Sendfile or X-Accel-Redirect the
+    front-end server sends the bytes and Django only checks the user and
+    the path. Otherwise the file is streamed from disk, honouring
+    If-Modified-Since and single Range requests.
+    """
+    if not is_authenticated(request):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Media file not found.')
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404('Media file not found.')
+    if not os.path.isfile(fullpath):
+        raise Http404('Media file not found.')
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        response = HttpResponse(content_type=content_type)
+        if header == 'X-Accel-Redirect':
+            response[header] = settings.MEDIA_SENDFILE_PREFIX.rstrip('/') + '/' + path.lstrip('/')
+        else:
+            response[header] = fullpath
+    elif not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        byte_range = None
+        if 'Range' in request.headers:
+            byte_range = parse_range(request.headers['Range'], stat.st_size)
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(fullpath, start, end - start + 1), status=206, content_type=content_type
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Private: shared caches must not hand the file to anonymous clients.
+    patch_cache_control(response, private=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
@@ -0,0 +1,117 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+from .instrumentation import registry
+
+# Headers set by the view (e.g. ConditionalGetMixin) that a hit replays.
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+def get_response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(namespace):
+    return f'response-cache:version:{namespace}'
+
+
+def new_version():
+    # Never reused, so an evicted version key cannot bring old entries back.
+    return time.time_ns()
+
+
+def get_version(namespace):
+    return get_response_cache().get_or_set(version_key(namespace), new_version, None)
+
+
+async def aget_version(namespace):
+    return await get_response_cache().aget_or_set(version_key(namespace), new_version, None)
+
+
+def bump_version(namespace):
+    get_response_cache().set(version_key(namespace), new_version(), None)
+
+
+def invalidate_responses(*namespaces):
+    """
+    Drop every cached response of the namespaces by moving them to a new
+    version. It moves again on commit, so a response that a concurrent
+    request rendered from the pre-commit rows is not kept either.
+    """
+    for namespace in namespaces:
+        bump_version(namespace)
+        transaction.on_commit(lambda namespace=namespace: bump_version(namespace))
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized data of successful GETs in the RESPONSE_CACHE_ALIAS
+    cache, so a hit skips the ORM and the serializer. Entries are keyed by
+    `cache_namespace` and its current version, the view's permission classes
+    and the absolute URL; invalidate_responses() retires a whole namespace
+    when the underlying rows change (see the app's signals modules).
+
+    Only for views whose response is the same for every user who passes the
+    permission checks, which run before the cache is consulted. QuerySet
+    update() sends no signals, so code that changes cached rows with it must
+    call invalidate_responses() itself.
+    """
+    cache_namespace = None
+
+    def should_cache_response(self):
+        return True
+
+    def get(self, request, *args, **kwargs):
+        if not self.should_cache_response():
+            return super().get(request, *args, **kwargs)
+        cache = get_response_cache()
+        key = self.get_response_cache_key(get_version(self.cache_namespace))
+        entry = cache.get(key)
+        if entry is not None:
+            return self.get_cached_response(entry)
+        response = super().get(request, *args, **kwargs)
+        entry = self.get_cache_entry(response)
+        if entry is not None:
+            cache.set(key, entry)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        if not self.should_cache_response():
+            return await super().aget(request, *args, **kwargs)
+        cache = get_response_cache()
+        key = self.get_response_cache_key(await aget_version(self.cache_namespace))
+        entry = await cache.aget(key)
+        if entry is not None:
+            return self.get_cached_response(entry)
+        response = await super().aget(request, *args, **kwargs)
+        entry = self.get_cache_entry(response)
+        if entry is not None:
+            await cache.aset(key, entry)
+        return response
+
+    def get_response_cache_key(self, version):
+        permissions = sorted(type(permission).__qualname__ for permission in self.get_permissions())
+        state = repr((permissions, self.request.build_absolute_uri()))
+        return f'response-cache:{self.cache_namespace}:{version}:{hashlib.sha256(state.encode()).hexdigest()}'
+
+    def get_cache_entry(self, response):
+        registry.increment('response_cache_requests_total', namespace=self.cache_namespace, result='miss')
+        if response.status_code != 200:
+            return None
+        headers = {name: response[name] for name in CACHED_HEADERS if name in response}
+        return {'data': response.data, 'headers': headers}
+
+    def get_cached_response(self, entry):
+        registry.increment('response_cache_requests_total', namespace=self.cache_namespace, result='hit')
+        response = Response(entry['data'], headers=entry['headers'])
+        etag = entry['headers'].get('ETag')
+        last_modified = parse_http_date_safe(entry['headers'].get('Last-Modified', ''))
+        if etag is None and last_modified is None:
+            return response
+        return get_conditional_response(self.request, etag=etag, last_modified=last_modified, response=response)
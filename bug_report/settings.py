@@ -19,7 +19,6 @@ INSTALLED_APPS = [
     #externals 
     'rest_framework',
     'rest_framework_simplejwt',
-    'rest_framework_simplejwt.token_blacklist',
 
     #internals
     'accounts',
@@ -29,13 +28,67 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_email': '10/min',
+    },
 }
 
+# Bulk bug endpoints: items accepted per request and rows per INSERT/UPDATE.
+BUG_BULK_MAX_ITEMS = 1000
+BUG_BULK_BATCH_SIZE = 500
+# Rows per INSERT when bug history is written on commit.
+BUG_HISTORY_BATCH_SIZE = 1000
+
+# Background tasks (bug_report.tasks): worker threads per queue, which is
+# also how many of the queue's tasks run at once. TASKS_ALWAYS_EAGER runs
+# queued tasks inline in the caller instead, e.g. under test.
+TASK_QUEUES = {
+    'default': {'workers': 4},
+    'thumbnails': {'workers': 2},
+    'imports': {'workers': 2},
+}
+TASKS_ALWAYS_EAGER = False
+
+# Bug imports (bug.imports): rows per batch (one transaction each) and
+# rejected rows whose errors are kept per job.
+BUG_IMPORT_BATCH_SIZE = 1000
+BUG_IMPORT_MAX_ERRORS = 10000
+
+# Assignment and status change notifications (bug.notifications). A user's
+# pending notifications are mailed as one digest once the oldest has waited
+# NOTIFICATION_DIGEST_WINDOW_SECONDS; the send_notification_digests command
+# (run it every minute) sends them, NOTIFICATION_DIGEST_BATCH_SIZE digests
+# per SMTP connection. Use the locmem or filebased EMAIL_BACKEND locally.
+NOTIFICATION_DIGEST_WINDOW_SECONDS = 15 * 60
+NOTIFICATION_DIGEST_BATCH_SIZE = 100
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+DEFAULT_FROM_EMAIL = 'bug-report@localhost'
+
+# Streaming exports (bug_report.exports): rows fetched per cursor round trip
+# and written per response chunk.
+EXPORT_CHUNK_SIZE = 2000
+
+# Project member endpoints: ids accepted per request and membership rows
+# added or removed per statement.
+PROJECT_MEMBERS_MAX_ITEMS = 10000
+PROJECT_MEMBERS_BATCH_SIZE = 1000
+
+# Fan-out for the bugs/events/ feed. InMemoryEventBroker only reaches clients
+# of the same process; subclass bug.events.BaseEventBroker to relay events
+# through a broker shared by all ASGI workers.
+BUG_EVENT_BROKER = {
+    'BACKEND': 'bug.events.InMemoryEventBroker',
+    'OPTIONS': {'queue_size': 1000},
+}
+# Seconds between keepalive comments on an idle feed.
+BUG_EVENT_HEARTBEAT = 15
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),  # Adjust as needed
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),  # Adjust as needed
@@ -52,15 +105,66 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# LocMemCache is per process: with several workers, point this at a shared
+# backend (Redis, Memcached) so user cache invalidation reaches all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Serialized list responses (bug_report.response_cache). Per process as
+    # configured; to share it between the workers of one host use
+    #   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #   'LOCATION': BASE_DIR / 'cache' / 'responses',
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+
+# Seconds an authenticated user's role/dept/is_staff stay cached.
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Where logged-out refresh token ids (jti) are kept until they expire. Use
+# 'accounts.denylist.InMemoryDenylistStore' for a single process, point
+# OPTIONS['alias'] at a Redis cache to share the denylist between workers,
+# or use 'accounts.denylist.DatabaseDenylistStore' and run prune_tokens
+# on a schedule.
+TOKEN_DENYLIST = {
+    'STORE': 'accounts.denylist.CacheDenylistStore',
+    'OPTIONS': {'alias': 'default'},
+}
+
 AUTHENTICATION_BACKENDS = [
     'accounts.backends.EmailBackend',
     'django.contrib.auth.backends.ModelBackend',  # Keep the default backend for the admin interface
 ]
 
+# Seconds an unknown login email is remembered, to skip the lookup on retries.
+LOGIN_MISSING_EMAIL_CACHE_TIMEOUT = 30
+
+# New passwords are hashed with the first hasher. A successful login with a
+# hash from any other entry, or with another PBKDF2 cost, is re-hashed to it.
+# Move 'django.contrib.auth.hashers.Argon2PasswordHasher' to the top (needs
+# argon2-cffi) to switch to argon2.
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 work factor; None keeps Django's default.
+PASSWORD_PBKDF2_ITERATIONS = None
+
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 MIDDLEWARE = [
+    'bug_report.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,8 +172,21 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'bug_report.db_routers.ReplicaRoutingMiddleware',
 ]
 
+# Request instrumentation (bug_report.instrumentation): Server-Timing header,
+# latency histogram buckets (seconds) and the bearer token scrapers of
+# /metrics must send (None disables the endpoint). Client addresses are no
+# use here: behind a proxy REMOTE_ADDR is the proxy's.
+SERVER_TIMING_HEADER = True
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_TOKEN = None
+# Log queries slower than this many milliseconds to 'bug_report.slow_queries'
+# (None disables it), with our own stack frames for this share of them.
+SLOW_QUERY_THRESHOLD_MS = None
+SLOW_QUERY_STACK_SAMPLE_RATE = 1.0
+
 ROOT_URLCONF = 'bug_report.urls'
 
 TEMPLATES = [
@@ -90,16 +207,50 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'bug_report.wsgi.application'
 
+# Persistent connections: each worker keeps its connection for
+# CONN_MAX_AGE seconds and checks it is still alive before reusing it.
+PRIMARY_DATABASE = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': 'Bug_Report',
+    'USER': 'postgres',
+    'PASSWORD': 'Vinayak@97',
+    'HOST': 'localhost',
+    'PORT': '5432',
+    'CONN_MAX_AGE': 60,
+    'CONN_HEALTH_CHECKS': True,
+}
+
+# Set to 'pgbouncer' when HOST/PORT point at a PgBouncer pool in transaction
+# mode: server-side cursors do not survive it, and Django's own connections
+# can then be short-lived (CONN_MAX_AGE = 0) since the pooler keeps the real
+# ones open.
+DATABASE_POOLER = None
+if DATABASE_POOLER == 'pgbouncer':
+    PRIMARY_DATABASE.update({'DISABLE_SERVER_SIDE_CURSORS': True, 'CONN_MAX_AGE': 0})
+
+# Read replicas, e.g. ['replica-1.internal', 'replica-2.internal'], become
+# aliases replica_1, replica_2, ... used by bug_report.db_routers.
+DATABASE_REPLICA_HOSTS = []
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'Bug_Report',
-        'USER': 'postgres',
-        'PASSWORD': 'Vinayak@97',
-        'HOST': 'localhost',
-        'PORT': '5432',
-    }
+    'default': PRIMARY_DATABASE,
+    **{
+        f'replica_{number}': {**PRIMARY_DATABASE, 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+        for number, host in enumerate(DATABASE_REPLICA_HOSTS, 1)
+    },
 }
+DATABASE_ROUTERS = ['bug_report.db_routers.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# List and detail GETs that may read from a replica.
+DATABASE_REPLICA_URL_NAMES = [
+    'bug-list-create', 'bug-detail',
+    'project-list-create', 'project-detail', 'project-members',
+    'user-list', 'user-picker', 'user-profile',
+    'bug-export', 'project-export',
+]
+# After a write, the user's reads go to the primary for this many seconds,
+# which should exceed the replication lag.
+DATABASE_REPLICA_STICKY_SECONDS = 10
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,5 +279,27 @@ STATIC_URL = 'static/'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Uploads that must never be served, e.g. bug import files (bug.storage).
+# Keep it outside MEDIA_ROOT.
+PRIVATE_STORAGE_ROOT = BASE_DIR / 'private'
+
+# Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are streamed to a temporary file in
+# chunks; both handlers hash the chunks for bug.storage.ContentHashStorage.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'bug.uploads.HashingMemoryFileUploadHandler',
+    'bug.uploads.HashingTemporaryFileUploadHandler',
+]
+
+# Bug image thumbnails: bounding box (rendered on the 'thumbnails' task queue).
+BUG_THUMBNAIL_SIZE = (320, 320)
+
+# Media files are served only to requests the API authenticates. Set to
+# 'X-Sendfile' (Apache) or 'X-Accel-Redirect' (nginx, with an internal
+# location at MEDIA_SENDFILE_PREFIX aliased to MEDIA_ROOT) to let the web
+# server send them; otherwise Django streams them with Range support.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
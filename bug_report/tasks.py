@@ -0,0 +1,109 @@
+import functools
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from .instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_executor(queue):
+    # The worker count of a queue caps how many of its tasks run at once;
+    # further tasks wait in the executor's queue.
+    return ThreadPoolExecutor(max_workers=settings.TASK_QUEUES[queue]['workers'], thread_name_prefix=f'task-{queue}')
+
+
+class Task:
+    """
+    A function run in the background by the thread pool of its queue
+    (settings.TASK_QUEUES). Calling the task runs it inline; delay() queues
+    a run and delay_on_commit() queues it once the current transaction
+    commits, so request handlers only enqueue work and return.
+
+    A run that raises one of `retry_on` is retried up to `max_retries`
+    times, after retry_backoff * 2 ** attempt seconds (at most
+    retry_backoff_max, with jitter). The queue lives in this process:
+    pending work is lost when the process exits, so tasks must be safe to
+    lose or have their own way to be resumed.
+    """
+
+    def __init__(self, func, queue='default', max_retries=0, retry_backoff=1.0, retry_backoff_max=300,
+                 retry_on=(Exception,)):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.queue = queue
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.retry_on = retry_on
+        self.name = f'{func.__module__}.{func.__qualname__}'
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.submit(0, args, kwargs)
+
+    def delay_on_commit(self, *args, **kwargs):
+        transaction.on_commit(lambda: self.delay(*args, **kwargs))
+
+    def submit(self, attempt, args, kwargs):
+        if settings.TASKS_ALWAYS_EAGER:
+            return self.run(attempt, args, kwargs)
+        return get_executor(self.queue).submit(self.run_in_worker, attempt, args, kwargs)
+
+    def run_in_worker(self, attempt, args, kwargs):
+        # Worker threads get no request_started/finished signals, so manage
+        # their connections the way Django does around a request.
+        close_old_connections()
+        try:
+            return self.run(attempt, args, kwargs)
+        finally:
+            close_old_connections()
+
+    def run(self, attempt, args, kwargs):
+        try:
+            result = self.func(*args, **kwargs)
+        except self.retry_on:
+            if attempt >= self.max_retries:
+                self.record('failed')
+                logger.exception('Task %s failed after %d attempts', self.name, attempt + 1)
+                return None
+            self.record('retried')
+            delay = self.get_retry_delay(attempt)
+            logger.warning('Task %s failed, retrying in %.1fs', self.name, delay, exc_info=True)
+            self.retry(delay, attempt + 1, args, kwargs)
+            return None
+        except Exception:
+            self.record('failed')
+            logger.exception('Task %s failed', self.name)
+            return None
+        self.record('succeeded')
+        return result
+
+    def get_retry_delay(self, attempt):
+        return min(self.retry_backoff * 2 ** attempt, self.retry_backoff_max) * random.uniform(0.5, 1)
+
+    def retry(self, delay, attempt, args, kwargs):
+        if settings.TASKS_ALWAYS_EAGER:
+            self.run(attempt, args, kwargs)
+            return
+        timer = threading.Timer(delay, self.submit, args=(attempt, args, kwargs))
+        timer.daemon = True
+        timer.start()
+
+    def record(self, result):
+        registry.increment('tasks_total', task=self.name, result=result)
+
+
+def task(func=None, **options):
+    """Make `func` a Task; use as @task or @task(queue=..., max_retries=...)."""
+    if func is None:
+        return lambda func: Task(func, **options)
+    return Task(func, **options)
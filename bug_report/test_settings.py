@@ -0,0 +1,27 @@
+# Runs the test suite without a PostgreSQL server:
+#   python manage.py test --settings=bug_report.test_settings
+# Two SQLite databases stand in for the primary and a read replica. They are
+# separate databases (no replication), so tests can tell which one a query
+# went to. Routing stays off unless a test enables it with
+# override_settings(DATABASE_REPLICAS=['replica']) and databases including
+# 'replica'.
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_primary.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_replica.sqlite3',
+    },
+}
+DATABASE_REPLICAS = []
+
+# Hashing every fixture password at the production cost dominates the run.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Queued tasks run inline, inside the test's transaction.
+TASKS_ALWAYS_EAGER = True
@@ -0,0 +1,219 @@
+import threading
+import time
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from bug.models import Bug
+from project.models import Project
+from .instrumentation import registry
+from .tasks import task
+
+User = get_user_model()
+
+
+class APITestMixin:
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='reporter', email='reporter@example.com', password='password123',
+            role='tester', dept='tester', is_staff=True
+        )
+        self.project = Project.objects.create(
+            project_name='Tracker', project_duration=30, client_name='ACME', submission_date=timezone.now().date()
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_bug(self, using='default', **kwargs):
+        bug = Bug(
+            bug_type='bug', created_by=self.user, bug_description='Broken', project=self.project,
+            bug_priority='low', bug_severity='minor', status='open', **kwargs
+        )
+        bug.save(using=using)
+        return bug
+
+
+@skipUnless('replica' in settings.DATABASES, "needs the 'replica' alias of bug_report.test_settings")
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(APITestMixin, TestCase):
+    # The stand-in replica does not replicate, so a row only written to the
+    # primary shows which database served a read.
+    databases = {'default', 'replica'}
+
+    def bug_ids(self):
+        response = self.client.get('/api/bugs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [bug['bug_id'] for bug in response.data['results']]
+
+    def test_list_and_detail_read_the_replica(self):
+        bug = self.create_bug()
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(self.bug_ids(), [])
+            response = self.client.get(f'/api/bugs/{bug.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(replica.captured_queries)
+
+        for model in (User, Project):
+            for instance in model.objects.all():
+                instance.save(using='replica')
+        self.create_bug(using='replica', bug_id=bug.pk)
+        self.assertEqual(self.bug_ids(), [bug.pk])
+
+    def test_reads_after_a_write_stick_to_the_primary(self):
+        response = self.client.post('/api/bugs/', {
+            'bug_type': 'bug', 'bug_description': 'New', 'project': self.project.pk,
+            'bug_priority': 'low', 'bug_severity': 'minor', 'status': 'open',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Bug.objects.using('replica').exists())
+        self.assertEqual(self.bug_ids(), [response.data['bug_id']])
+
+        cache.clear()
+        self.assertEqual(self.bug_ids(), [])
+
+    def test_other_views_read_the_primary(self):
+        self.create_bug()
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/api/bugs/metrics/')
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(replica.captured_queries)
+
+
+class InstrumentationTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.create_bug()
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/bugs/')
+        timings = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timings), {'total', 'db', 'serializer'})
+        self.assertRegex(timings['db'], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_endpoint(self):
+        self.client.get('/api/bugs/')
+        self.client.get('/api/projects/')
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="bug-list-create",method="GET",status="200"} 1', body
+        )
+        self.assertIn('http_request_duration_seconds_bucket{view="project-list-create",method="GET",status="200",le="+Inf"} 1', body)
+        self.assertRegex(body, r'http_request_db_queries_total\{view="bug-list-create",method="GET",status="200"\} [1-9]')
+        self.assertRegex(body, r'http_request_serializer_seconds_total\{view="bug-list-create",[^}]*\} \d')
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_endpoint_rejects_other_credentials(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong-token'}, {'HTTP_AUTHORIZATION': 'Basic scrape-token'}):
+            # Loopback only proves the request came through the local proxy.
+            response = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1', **headers)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="metrics"')
+        with self.settings(METRICS_TOKEN=None):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_log(self):
+        with self.assertLogs('bug_report.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/bugs/metrics/')
+        self.assertIn('bug_bugworkload', logs.output[0])
+        # The sampled stack points at our own code, not the ORM or DRF.
+        self.assertIn('bug/views.py', logs.output[0])
+        self.assertNotIn('rest_framework', logs.output[0])
+
+
+class TaskTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.calls = []
+
+    def flaky(self, failures):
+        def func(value):
+            self.calls.append(value)
+            if len(self.calls) <= failures:
+                raise ConnectionError('try again')
+            return value * 2
+        func.__qualname__ = 'flaky'
+        return func
+
+    def counters(self):
+        return {dict(labels)['result']: value for (name, labels), value in registry.counters.items()
+                if name == 'tasks_total'}
+
+    def test_calling_runs_inline(self):
+        double = task(self.flaky(0))
+        self.assertEqual(double(2), 4)
+        self.assertEqual(self.counters(), {})
+
+    def test_eager_retries(self):
+        double = task(self.flaky(2), max_retries=2)
+        with self.assertLogs('bug_report.tasks', 'WARNING'):
+            self.assertEqual(double.delay(2), None)
+        self.assertEqual(self.calls, [2, 2, 2])
+        self.assertEqual(self.counters(), {'retried': 2, 'succeeded': 1})
+
+        self.calls = []
+        with self.assertLogs('bug_report.tasks', 'ERROR'):
+            task(self.flaky(5), max_retries=1).delay(2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.counters()['failed'], 1)
+
+    def test_retry_backoff(self):
+        slow = task(self.flaky(0), retry_backoff=2, retry_backoff_max=10)
+        self.assertTrue(1 <= slow.get_retry_delay(0) <= 2)
+        self.assertTrue(4 <= slow.get_retry_delay(2) <= 8)
+        self.assertTrue(5 <= slow.get_retry_delay(6) <= 10)
+
+    def test_delay_on_commit(self):
+        double = task(self.flaky(0))
+        with self.captureOnCommitCallbacks(execute=True):
+            double.delay_on_commit(1)
+            self.assertEqual(self.calls, [])
+        self.assertEqual(self.calls, [1])
+
+        try:
+            with transaction.atomic():
+                double.delay_on_commit(2)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.calls, [1])
+
+    @override_settings(TASKS_ALWAYS_EAGER=False, TASK_QUEUES={'test-serial': {'workers': 1}})
+    def test_worker_queue(self):
+        done = threading.Event()
+        running, peak = [], []
+
+        def work(value):
+            running.append(value)
+            peak.append(len(running))
+            try:
+                time.sleep(0.01)
+                self.calls.append(value)
+                if self.calls == [0]:
+                    raise ConnectionError('try again')
+            finally:
+                running.remove(value)
+            if len(self.calls) == 4:
+                done.set()
+
+        serial = task(work, queue='test-serial', max_retries=1, retry_backoff=0)
+        with self.assertLogs('bug_report.tasks', 'WARNING'):
+            for value in range(3):
+                serial.delay(value)
+            self.assertTrue(done.wait(5))
+        self.assertEqual(sorted(self.calls), [0, 0, 1, 2])
+        # One worker: the queue never ran two tasks at once.
+        self.assertEqual(max(peak), 1)
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,49 @@
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from accounts.models import CustomUser
+
+# Bug breakdowns reported per project: group name -> Bug field.
+BUG_STAT_GROUPS = {
+    'status': 'status',
+    'severity': 'bug_severity',
+    'priority': 'bug_priority',
+}
+
+
+def bug_stat_columns():
+    """Yield (group, value, annotation name) for every bug stat column."""
+    from bug.models import Bug
+    for group, field_name in BUG_STAT_GROUPS.items():
+        for value, _ in Bug._meta.get_field(field_name).choices:
+            yield group, value, f'bugs_{group}_{value}'
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_bug_stats(self):
+        """
+        Annotate each project with bug counts per status, severity and
+        priority, computed in the same query through conditional aggregates
+        (COUNT(...) FILTER (WHERE ...) on PostgreSQL).
+        """
+        annotations = {'bugs_total': Count('bug')}
+        for group, value, name in bug_stat_columns():
+            field_name = BUG_STAT_GROUPS[group]
+            annotations[name] = Count('bug', filter=Q(**{f'bug__{field_name}': value}))
+        return self.annotate(**annotations)
+
+    def with_member_count(self):
+        """
+        Annotate `member_count` through a correlated subquery, so it can be
+        combined with with_bug_stats() without multiplying the joined rows.
+        """
+        members = (
+            Project.users.through.objects.filter(project=OuterRef('pk'))
+            .order_by().values('project').annotate(count=Count('pk')).values('count')
+        )
+        return self.annotate(member_count=Coalesce(Subquery(members, output_field=IntegerField()), Value(0)))
+
+
 class Project(models.Model):
     STATUS_CHOICES = [
         ('open', 'Open'),
@@ -11,8 +55,13 @@ class Project(models.Model):
     client_name = models.CharField(max_length=255)
     submission_date = models.DateField()
     updated_date = models.DateField(auto_now=True)
+    # Full timestamp behind the ETag/Last-Modified of project responses;
+    # also moved by membership changes (see project.signals).
+    last_modified = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     users = models.ManyToManyField(CustomUser,  related_name='projects')
-    
+
+    objects = ProjectQuerySet.as_manager()
+
     def __str__(self):
         return self.project_name
@@ -1,10 +1,80 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Project
+from .models import Project, bug_stat_columns
 from accounts.models import CustomUser
+from bug_report.instrumentation import TimedSerializerMixin
 
-class ProjectSerializer(serializers.ModelSerializer):
-    users = serializers.PrimaryKeyRelatedField(queryset=CustomUser.objects.all(), many=True)
+class MemberIdsField(serializers.ListField):
+    """
+    User primary keys, checked with one IN query rather than the lookup per
+    id of PrimaryKeyRelatedField(many=True). Represents a related manager as
+    its (usually prefetched) ids.
+    """
+    child = serializers.IntegerField(min_value=1)
+    default_error_messages = {
+        'does_not_exist': 'Invalid pk "{pk_value}" - object does not exist.',
+    }
+
+    def to_internal_value(self, data):
+        ids = list(dict.fromkeys(super().to_internal_value(data)))
+        found = set(CustomUser.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        for pk in ids:
+            if pk not in found:
+                self.fail('does_not_exist', pk_value=pk)
+        return ids
+
+    def to_representation(self, data):
+        return [user.pk for user in data.all()]
+
+
+class ProjectSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    users = MemberIdsField()
 
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['last_modified']
+
+
+class ProjectStatsSerializer(ProjectSerializer):
+    """ProjectSerializer plus the counts from Project.objects.with_bug_stats()."""
+    bug_stats = serializers.SerializerMethodField()
+
+    def get_bug_stats(self, project):
+        stats = {'total': project.bugs_total}
+        for group, value, name in bug_stat_columns():
+            stats.setdefault(group, {})[value] = getattr(project, name)
+        return stats
+
+
+class ProjectDetailSerializer(ProjectSerializer):
+    """
+    A single project with the number of members instead of their ids, which
+    are paged through ProjectMemberListView. `users` can still be written.
+    """
+    users = MemberIdsField(write_only=True)
+    member_count = serializers.SerializerMethodField()
+
+    def get_member_count(self, project):
+        if hasattr(project, 'member_count'):
+            return project.member_count
+        return project.users.count()
+
+    def update(self, instance, validated_data):
+        if 'users' in validated_data:
+            # The annotated count is about to go stale.
+            instance.__dict__.pop('member_count', None)
+        return super().update(instance, validated_data)
+
+
+class ProjectDetailStatsSerializer(ProjectDetailSerializer, ProjectStatsSerializer):
+    pass
+
+
+class ProjectMemberSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'email', 'role', 'dept']
+
+
+class ProjectMembersChangeSerializer(serializers.Serializer):
+    users = MemberIdsField(allow_empty=False, max_length=settings.PROJECT_MEMBERS_MAX_ITEMS)
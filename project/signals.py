@@ -0,0 +1,32 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from bug_report.response_cache import invalidate_responses
+from .models import Project
+
+
+@receiver(m2m_changed, sender=Project.users.through)
+def touch_projects_on_member_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Membership is part of the project response, so it must move
+    # Project.last_modified (and with it the ETag) like any other edit.
+    if reverse:
+        if action == 'pre_clear':
+            projects = Project.objects.filter(users=instance)
+        elif action in ('post_add', 'post_remove'):
+            projects = Project.objects.filter(pk__in=pk_set)
+        else:
+            return
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        projects = Project.objects.filter(pk=instance.pk)
+    else:
+        return
+    projects.update(last_modified=timezone.now())
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(m2m_changed, sender=Project.users.through)
+def invalidate_project_responses(sender, action=None, **kwargs):
+    # action is only sent by m2m_changed.
+    if action is None or action.startswith('post_'):
+        invalidate_responses('projects')
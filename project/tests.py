@@ -0,0 +1,375 @@
+import csv
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework import status
+from bug.models import Bug
+from bug_report.instrumentation import registry
+from .models import Project
+
+User = get_user_model()
+
+
+class ProjectTestMixin:
+    def setUp(self):
+        caches['responses'].clear()
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='manager',
+            dept='management',
+            is_staff=True
+        )
+        self.developer = User.objects.create_user(
+            username='developer',
+            email='developer@example.com',
+            password='password123',
+            role='developer',
+            dept='python'
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def create_project(self, name='Tracker', **kwargs):
+        data = {
+            'project_name': name,
+            'project_duration': 30,
+            'client_name': 'ACME',
+            'submission_date': timezone.now().date(),
+        }
+        data.update(kwargs)
+        project = Project.objects.create(**data)
+        project.users.add(self.developer)
+        return project
+
+    def create_bug(self, project, **kwargs):
+        data = {
+            'bug_type': 'bug',
+            'created_by': self.admin_user,
+            'assigned_to': self.developer,
+            'bug_description': 'Something is broken',
+            'project': project,
+            'bug_priority': 'medium',
+            'bug_severity': 'normal',
+            'status': 'open',
+        }
+        data.update(kwargs)
+        return Bug.objects.create(**data)
+
+
+class ProjectStatsTests(ProjectTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = self.create_project()
+        self.create_bug(self.project)
+        self.create_bug(self.project, status='in_progress', bug_priority='high')
+        self.create_bug(self.project, status='closed', bug_severity='critical', bug_priority='high')
+        self.empty_project = self.create_project('Empty')
+
+    def test_detail_stats(self):
+        response = self.client.get(f'/api/projects/{self.project.pk}/?stats=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.data['bug_stats']
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['status'], {'open': 1, 'closed': 1, 'in_progress': 1})
+        self.assertEqual(stats['priority'], {'low': 0, 'medium': 1, 'high': 2})
+        self.assertEqual(stats['severity']['critical'], 1)
+        self.assertEqual(stats['severity']['normal'], 2)
+
+    def test_list_stats(self):
+        response = self.client.get('/api/projects/?stats=1')
+        stats = {project['project_name']: project['bug_stats'] for project in response.data}
+        self.assertEqual(stats['Tracker']['total'], 3)
+        self.assertEqual(stats['Empty']['total'], 0)
+        self.assertEqual(stats['Empty']['status']['open'], 0)
+
+    def test_stats_are_opt_in(self):
+        response = self.client.get(f'/api/projects/{self.project.pk}/')
+        self.assertNotIn('bug_stats', response.data)
+        self.assertEqual(response.data['member_count'], 1)
+
+    def test_list_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/projects/?stats=1')
+        for i in range(10):
+            project = self.create_project(f'Project {i}')
+            self.create_bug(project, status='closed')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/projects/?stats=1')
+        self.assertEqual(len(response.data), 12)
+        # ETag fingerprints of the projects and of their bugs, one annotated
+        # query for projects and stats, one for the member ids.
+        self.assertEqual(len(few.captured_queries), 4)
+        self.assertEqual(len(many.captured_queries), 4)
+
+
+class ProjectConditionalGetTests(ProjectTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = self.create_project()
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['ETag']
+
+    def test_detail_changes_with_edits_and_members(self):
+        url = f'/api/projects/{self.project.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, etag)
+
+        self.client.patch(f'/api/projects/{self.project.pk}/update-status/', {'status': 'closed'})
+        etag = self.assertModified(url, etag)
+
+        self.project.users.add(self.admin_user)
+        etag = self.assertModified(url, etag)
+        self.admin_user.projects.remove(self.project)
+        self.assertModified(url, etag)
+
+    def test_stats_change_with_bugs(self):
+        url = f'/api/projects/{self.project.pk}/?stats=true'
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, etag)
+        self.create_bug(self.project)
+        self.assertModified(url, etag)
+
+    def test_list_fingerprint(self):
+        etag = self.client.get('/api/projects/')['ETag']
+        self.assertNotModified('/api/projects/', etag)
+        self.create_project('Second')
+        etag = self.assertModified('/api/projects/', etag)
+        Project.objects.filter(project_name='Second').delete()
+        self.assertModified('/api/projects/', etag)
+
+
+class ProjectAsyncReadTests(ProjectTestMixin, TestCase):
+    async def test_list_under_asgi(self):
+        project = await Project.objects.acreate(
+            project_name='Tracker', project_duration=30, client_name='ACME', submission_date=timezone.now().date()
+        )
+        await project.users.aadd(self.developer)
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.admin_user)}'}
+        response = await self.async_client.get('/api/projects/?stats=true', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['users'], [self.developer.pk])
+        self.assertEqual(response.data[0]['bug_stats']['total'], 0)
+
+
+class ProjectResponseCacheTests(ProjectTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.project = self.create_project()
+
+    def assertCached(self, url='/api/projects/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 0)
+        return response
+
+    def project_names(self):
+        return [project['project_name'] for project in self.client.get('/api/projects/').data]
+
+    def test_hit_skips_orm_and_serializer(self):
+        first = self.client.get('/api/projects/')
+        second = self.assertCached()
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries.captured_queries), 0)
+
+        metrics = registry.render()
+        self.assertIn('response_cache_requests_total{namespace="projects",result="hit"} 2', metrics)
+        self.assertIn('response_cache_requests_total{namespace="projects",result="miss"} 1', metrics)
+
+    def test_invalidated_by_project_member_and_user_changes(self):
+        self.client.get('/api/projects/')
+        self.client.patch(f'/api/projects/{self.project.pk}/update-status/', {'status': 'closed'})
+        self.assertEqual(self.client.get('/api/projects/').data[0]['status'], 'closed')
+
+        self.project.users.add(self.admin_user)
+        self.assertEqual(self.client.get('/api/projects/').data[0]['users'], [self.admin_user.pk, self.developer.pk])
+        self.admin_user.projects.clear()
+        self.assertEqual(self.client.get('/api/projects/').data[0]['users'], [self.developer.pk])
+
+        self.create_project('Second')
+        self.assertEqual(self.project_names(), ['Tracker', 'Second'])
+        self.project.delete()
+        self.assertEqual(self.project_names(), ['Second'])
+
+        self.developer.delete()
+        self.assertEqual(self.client.get('/api/projects/').data[0]['users'], [])
+        self.assertCached()
+
+    def test_key_covers_url_and_permissions(self):
+        self.client.get('/api/projects/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/projects/?page=2')
+        self.assertTrue(queries.captured_queries)
+
+        self.client.force_authenticate(user=self.developer)
+        self.assertCached()
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/projects/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_are_not_cached(self):
+        self.client.get('/api/projects/?stats=true')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/projects/?stats=true')
+        self.assertTrue(queries.captured_queries)
+
+    def test_file_based_backend(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+        with override_settings(CACHES={'default': backend, 'responses': backend}):
+            self.client.get('/api/projects/')
+            self.assertCached()
+            self.create_project('Second')
+            self.assertEqual(self.project_names(), ['Tracker', 'Second'])
+
+    async def test_hit_under_asgi(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.admin_user)}'}
+        first = await self.async_client.get('/api/projects/', headers=headers)
+        second = await self.async_client.get('/api/projects/', headers=headers)
+        self.assertEqual(second.data, first.data)
+        self.assertIn('response_cache_requests_total{namespace="projects",result="hit"} 1', registry.render())
+
+
+class ProjectExportTests(ProjectTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tracker = self.create_project()
+        self.website = self.create_project('Website')
+        self.website.users.add(self.admin_user)
+        self.client.force_authenticate(user=self.developer)
+
+    def test_export_formats(self):
+        response = self.client.get('/api/projects/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['project_name'] for row in rows], ['Tracker', 'Website'])
+        self.assertEqual([row['member_count'] for row in rows], ['1', '2'])
+
+        response = self.client.get('/api/projects/export/?as=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(rows[0]['id'], self.tracker.pk)
+        self.assertEqual(rows[0]['submission_date'], self.tracker.submission_date.isoformat())
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/projects/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProjectMemberTests(ProjectTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = self.create_project()
+        self.url = f'/api/projects/{self.project.pk}/members/'
+        User.objects.bulk_create([
+            User(username=f'member{i:03}', email=f'member{i}@example.com', role='developer', dept='python')
+            for i in range(300)
+        ])
+        self.member_ids = list(User.objects.filter(username__startswith='member').values_list('pk', flat=True))
+
+    def change_members(self, method, user_ids):
+        return getattr(self.client, method)(self.url, {'users': user_ids}, format='json')
+
+    def test_add_and_remove(self):
+        response = self.change_members('post', self.member_ids[:3] + [self.developer.pk])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'added': 3, 'member_count': 4})
+        response = self.change_members('post', self.member_ids[:5])
+        self.assertEqual(response.data, {'added': 2, 'member_count': 6})
+
+        response = self.change_members('delete', [self.developer.pk, self.admin_user.pk])
+        self.assertEqual(response.data, {'removed': 1, 'member_count': 5})
+        self.assertEqual(set(self.project.users.values_list('pk', flat=True)), set(self.member_ids[:5]))
+
+    def test_query_count_does_not_grow_with_ids(self):
+        for method, ids in (('post', self.member_ids), ('delete', self.member_ids)):
+            with CaptureQueriesContext(connection) as few:
+                self.change_members(method, ids[:5])
+            with CaptureQueriesContext(connection) as many:
+                response = self.change_members(method, ids[5:])
+            self.assertEqual(response.data['added' if method == 'post' else 'removed'], 295)
+            self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        self.assertEqual(self.project.users.count(), 1)
+
+    @override_settings(PROJECT_MEMBERS_BATCH_SIZE=100)
+    def test_rows_are_written_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.change_members('post', self.member_ids)
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT') and '"project_project_users"' in query['sql']
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(self.project.users.count(), 301)
+
+    def test_unknown_ids_are_rejected(self):
+        response = self.change_members('post', [self.member_ids[0], 999999])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['users'], ['Invalid pk "999999" - object does not exist.'])
+        response = self.change_members('post', [])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.project.users.count(), 1)
+
+    def test_listing_and_permissions(self):
+        self.change_members('post', self.member_ids[:3])
+        self.client.force_authenticate(user=self.developer)
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual([user['username'] for user in response.data['results']], ['developer', 'member000'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], ['member001', 'member002'])
+        self.assertIsNone(response.data['next'])
+
+        self.assertEqual(self.change_members('post', self.member_ids[3:4]).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get('/api/projects/999999/members/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_reports_member_count(self):
+        detail = f'/api/projects/{self.project.pk}/'
+        etag = self.client.get(detail)['ETag']
+        self.change_members('post', self.member_ids[:10])
+
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['member_count'], 11)
+        self.assertNotIn('users', response.data)
+        self.create_bug(self.project)
+        response = self.client.get(detail, {'stats': 'true'})
+        self.assertEqual((response.data['member_count'], response.data['bug_stats']['total']), (11, 1))
+        self.assertEqual(len(self.client.get('/api/projects/').data[0]['users']), 11)
+
+    def test_detail_update_query_count_does_not_grow_with_ids(self):
+        url = f'/api/projects/{self.project.pk}/'
+        with CaptureQueriesContext(connection) as few:
+            self.client.patch(url, {'users': self.member_ids[:5]}, format='json')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.patch(url, {'users': self.member_ids[5:]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['member_count'], 295)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+        response = self.client.patch(url, {'users': [self.developer.pk, 999999]}, format='json')
+        self.assertEqual(response.data['users'], ['Invalid pk "999999" - object does not exist.'])
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import ProjectListCreateView, ProjectDetailView, UpdateProjectStatusView
+from .views import ProjectListCreateView, ProjectExportView, ProjectDetailView, ProjectMemberListView, UpdateProjectStatusView
 
 urlpatterns = [
     path('projects/', ProjectListCreateView.as_view(), name='project-list-create'),
+    path('projects/export/', ProjectExportView.as_view(), name='project-export'),
     path('projects/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
+    path('projects/<int:pk>/members/', ProjectMemberListView.as_view(), name='project-members'),
     path('projects/<int:pk>/update-status/', UpdateProjectStatusView.as_view(), name='update-project-status'),
 ]
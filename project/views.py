@@ -1,27 +1,162 @@
 from rest_framework.response import Response
 from rest_framework import generics, permissions
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from accounts.models import CustomUser
+from accounts.pagination import UserCursorPagination
+from bug.models import Bug
+from bug_report.async_views import AsyncListMixin, AsyncRetrieveMixin
+from bug_report.conditional import ConditionalGetMixin
+from bug_report.exports import StreamingExportMixin
+from bug_report.response_cache import CachedResponseMixin
 from .models import Project
-from .serializers import ProjectSerializer
+from .serializers import (
+    ProjectDetailSerializer, ProjectDetailStatsSerializer, ProjectMemberSerializer,
+    ProjectMembersChangeSerializer, ProjectSerializer, ProjectStatsSerializer,
+)
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+
+class ProjectStatsMixin:
+    """
+    `?stats=true` on a GET adds per-project bug counts, computed in the same
+    query that loads the projects.
+    """
+    stats_serializer_class = ProjectStatsSerializer
+
+    def wants_stats(self):
+        return (
+            self.request.method == 'GET'
+            and self.request.query_params.get('stats', '').lower() in ('1', 'true', 'yes')
+        )
+
+    def get_queryset(self):
+        queryset = self.get_project_queryset()
+        if self.wants_stats():
+            queryset = queryset.with_bug_stats()
+        return queryset
+
+    def get_project_queryset(self):
+        return Project.objects.prefetch_related(
+            Prefetch('users', queryset=CustomUser.objects.only('id'))
+        )
+
+    def get_serializer_class(self):
+        if self.wants_stats():
+            return self.stats_serializer_class
+        return self.serializer_class
+
+    def get_fingerprint_querysets(self):
+        querysets = super().get_fingerprint_querysets()
+        if self.wants_stats():
+            # The counts change with the projects' bugs, not the projects.
+            bugs = Bug.objects.filter(project__in=self.get_fingerprint_queryset().values('pk'))
+            querysets.append((bugs, 'updated_date'))
+        return querysets
+
+
+class ProjectListCreateView(ProjectStatsMixin, CachedResponseMixin, ConditionalGetMixin, AsyncListMixin,
+                            generics.ListCreateAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
+    last_modified_field = 'last_modified'
+    cache_namespace = 'projects'
+
+    def should_cache_response(self):
+        # Bug counts move with every bug write; only the plain list is cached.
+        return not self.wants_stats()
 
     def get_permissions(self):
         if self.request.method == 'POST':
             return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectExportView(StreamingExportMixin, generics.GenericAPIView):
+    """Stream every project with its member count as CSV or NDJSON."""
+    permission_classes = [permissions.IsAuthenticated]
+    export_filename = 'projects'
+    export_fields = {
+        'id': 'id',
+        'project_name': 'project_name',
+        'project_duration': 'project_duration',
+        'client_name': 'client_name',
+        'submission_date': 'submission_date',
+        'updated_date': 'updated_date',
+        'status': 'status',
+        'member_count': 'member_count',
+    }
+
+    def get_queryset(self):
+        return Project.objects.with_member_count().order_by('pk')
+
+class ProjectDetailView(ProjectStatsMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Project.objects.all()
-    serializer_class = ProjectSerializer
+    serializer_class = ProjectDetailSerializer
+    stats_serializer_class = ProjectDetailStatsSerializer
+    last_modified_field = 'last_modified'
+
+    def get_project_queryset(self):
+        return Project.objects.with_member_count()
 
     def get_permissions(self):
         if self.request.method in ['PUT', 'DELETE']:
             return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
 
+class ProjectMemberListView(generics.ListAPIView):
+    """
+    GET pages through a project's members by username. POST adds and DELETE
+    removes the users listed in {"users": [ids]}: the ids are checked with one
+    query and the membership rows are written in batches of
+    PROJECT_MEMBERS_BATCH_SIZE, instead of rewriting the whole set.
+    """
+    serializer_class = ProjectMemberSerializer
+    pagination_class = UserCursorPagination
+
+    def get_permissions(self):
+        if self.request.method in ['POST', 'DELETE']:
+            return [permissions.IsAdminUser()]
+        return [permissions.IsAuthenticated()]
+
+    def get_project(self):
+        return get_object_or_404(Project.objects.only('pk'), pk=self.kwargs['pk'])
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(projects=self.get_project()).only(*ProjectMemberSerializer.Meta.fields)
+
+    def post(self, request, pk, format=None):
+        return self.change_members(request, add=True)
+
+    def delete(self, request, pk, format=None):
+        return self.change_members(request, add=False)
+
+    def change_members(self, request, add):
+        project = self.get_project()
+        serializer = ProjectMembersChangeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['users']
+
+        memberships = Project.users.through.objects.filter(project=project)
+        with transaction.atomic():
+            members = set(memberships.filter(customuser_id__in=user_ids).values_list('customuser_id', flat=True))
+            if add:
+                changed = [pk for pk in user_ids if pk not in members]
+            else:
+                changed = [pk for pk in user_ids if pk in members]
+            batch_size = settings.PROJECT_MEMBERS_BATCH_SIZE
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start:start + batch_size]
+                if add:
+                    project.users.add(*batch)
+                else:
+                    project.users.remove(*batch)
+        return Response({
+            'added' if add else 'removed': len(changed),
+            'member_count': memberships.count(),
+        })
+
 class UpdateProjectStatusView(generics.UpdateAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer